@@ -93,8 +93,8 @@ export async function fetchKnowledgeGraph() {
     return res.json();
 }
 
-export async function fetchInsights() {
-    const res = await fetch(`${API_BASE}/insights/`);
+export async function fetchInsights(window: "week" | "month" | "all" = "all") {
+    const res = await fetch(`${API_BASE}/insights/?window=${window}`);
     if (!res.ok) throw new Error("Failed to fetch insights");
     return res.json();
 }
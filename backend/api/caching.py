@@ -0,0 +1,59 @@
+"""
+ETag / If-None-Match support with memoized response bodies.
+Read-heavy endpoints serialize their payload once per vault version; polls
+that present the current ETag get an empty 304.
+"""
+import hashlib
+import inspect
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from services.versioning import BOOT_ID
+
+MAX_BODIES = 256  # memoized bodies kept, least recently used dropped first
+
+_bodies: "OrderedDict[str, Tuple[Any, bytes]]" = OrderedDict()
+
+
+def _etag(key: str, version) -> str:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f'"{digest}-{BOOT_ID}-{version}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def versioned_json(request: Request, key: str, version, build: Callable[[], Any]) -> Response:
+    """JSON response for `build()` at `version`, served from memo or as a 304 when possible.
+
+    `key` must identify everything the body depends on besides the version
+    (endpoint and query parameters).
+    """
+    etag = _etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    memo = _bodies.get(key)
+    if memo is not None and memo[0] == version:
+        body = memo[1]
+        _bodies.move_to_end(key)
+    else:
+        result = build()
+        if inspect.isawaitable(result):
+            result = await result
+        body = json.dumps(jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _bodies[key] = (version, body)
+        _bodies.move_to_end(key)
+        while len(_bodies) > MAX_BODIES:
+            _bodies.popitem(last=False)
+    return Response(content=body, media_type="application/json", headers=headers)
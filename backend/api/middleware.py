@@ -0,0 +1,77 @@
+"""
+ASGI middleware for the AstraOS API.
+"""
+import json
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject upload requests whose body exceeds the size limit before the
+    multipart form is parsed: an oversized Content-Length is refused up
+    front, and chunked bodies are aborted as soon as the limit is crossed.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: tuple, slack_bytes: int = 64 * 1024):
+        self.app = app
+        self.limit_mb = max_bytes // (1024 * 1024)
+        # Multipart framing (boundaries, part headers) adds a little on top of the file
+        self.max_bytes = max_bytes + slack_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # The form parser may turn the abort into its own error response;
+            # replace whatever the app sends with a 413 once the limit was hit.
+            nonlocal rejected
+            if not exceeded:
+                await send(message)
+            elif not rejected:
+                rejected = True
+                await self._reject(send)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not rejected:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"File too large. Max size: {self.limit_mb}MB"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,69 @@
-from fastapi import APIRouter
-from services.graph import build_knowledge_graph
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from core.pagination import encode_cursor, decode_cursor
+from services.graph import build_knowledge_graph, get_graph_index
+from services.versioning import content_version
+from api.caching import versioned_json
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
+NodeType = Literal["document", "concept", "tag"]
+
 
 @router.get("/")
-async def get_knowledge_graph():
+async def get_knowledge_graph(request: Request):
     """Get the full knowledge graph for visualization."""
-    graph = build_knowledge_graph()
+    return await versioned_json(request, "graph", content_version(), build_knowledge_graph)
+
+
+@router.get("/nodes")
+async def get_graph_page(
+    type: Optional[NodeType] = None,
+    tag: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=200, ge=1, le=2000),
+):
+    """Page through the graph, optionally only one node type or documents with a tag.
+
+    Each edge between matching nodes is returned exactly once, on the page of
+    whichever endpoint comes later, so the pages together form the whole subgraph.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Cursors are the (type order, node id) key of the last node on a page
+    if after is not None and not (
+        len(after) == 2 and isinstance(after[0], int) and not isinstance(after[0], bool)
+        and isinstance(after[1], str)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    page = get_graph_index().page(node_type=type, tag=tag, after=after, limit=limit)
+    return {
+        "nodes": page["nodes"],
+        "edges": page["edges"],
+        "next_cursor": encode_cursor(page["next"]) if page["next"] else None,
+    }
+
+
+@router.get("/top")
+async def get_top_nodes(
+    n: int = Query(default=50, ge=1, le=1000),
+    type: Optional[NodeType] = None,
+):
+    """The best-connected nodes and the edges between them."""
+    return get_graph_index().top_nodes(n, node_type=type)
+
+
+@router.get("/neighborhood/{node_id}")
+async def get_neighborhood(
+    node_id: str,
+    depth: int = Query(default=1, ge=1, le=3),
+    limit: int = Query(default=500, ge=1, le=5000),
+):
+    """Nodes within `depth` hops of a document, concept or tag, nearest first."""
+    graph = get_graph_index().neighborhood(node_id, depth=depth, limit=limit)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Node not found")
     return graph
@@ -1,21 +1,28 @@
-from fastapi import APIRouter, HTTPException
-from services.summarizer import generate_insights, generate_study_content
-from services.ingestion import list_documents, get_document, extract_text
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from services.ingestion import get_document
+from services.insights import get_insights as materialized_insights, insights_version
+from services.study import get_study_content as study_document
+from api.caching import versioned_json
 
 router = APIRouter(prefix="/insights", tags=["insights"])
 
 
 @router.get("/")
-async def get_insights():
-    """Get weekly AI insights across all vault documents."""
-    documents = list_documents()
-    ready_docs = [d for d in documents if d.get("status") == "ready"]
-    result = await generate_insights(ready_docs)
-    return result
+async def get_insights(request: Request, window: Literal["week", "month", "all"] = "all"):
+    """Get AI insights over all documents, or those added in the last week/month
+    (cached; the narrative refreshes in the background)."""
+    return await versioned_json(
+        request, f"insights?{window}", insights_version(window), lambda: materialized_insights(window),
+    )
 
 
 @router.post("/study/{doc_id}")
-async def get_study_content(doc_id: str):
+async def get_study_content(
+    doc_id: str,
+    regenerate: bool = Query(False, description="Generate new material instead of returning the cached set"),
+):
     """Generate flashcards, quiz, and key points for a document."""
     doc = get_document(doc_id)
     if not doc:
@@ -23,15 +30,4 @@ async def get_study_content(doc_id: str):
     if doc.get("status") != "ready":
         raise HTTPException(status_code=400, detail="Document is still processing")
 
-    # Extract text again for study content
-    from core.config import get_settings
-    import os
-    settings = get_settings()
-    file_path = os.path.join(settings.upload_dir, doc["filename"])
-    try:
-        text, _ = extract_text(file_path, doc["file_type"])
-    except Exception:
-        text = doc.get("summary", "")
-
-    result = await generate_study_content(text[:5000], doc["original_name"])
-    return result
+    return await study_document(doc, regenerate=regenerate)
@@ -12,6 +12,7 @@ async def search_vault(request: SearchRequest):
         query=request.query,
         document_ids=request.document_ids,
         top_k=request.top_k,
+        mode=request.mode,
     )
     return {
         "query": request.query,
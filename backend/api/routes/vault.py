@@ -1,8 +1,36 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Query, Request
 from fastapi.responses import JSONResponse
-from services.ingestion import ingest_document, list_documents, get_document, delete_document
-from models.schemas import DocumentUploadResponse
+from services.ingestion import (
+    ingest_document,
+    get_document,
+    delete_document,
+    delete_documents,
+    get_document_store,
+    get_ingestion_queue,
+    get_queue_position,
+    reindex_document,
+)
+from services.bulk_import import (
+    BulkImportError,
+    archive_dir,
+    cancel_import,
+    get_import,
+    import_archive,
+    import_directory,
+    list_imports,
+)
+from services.extraction import SUPPORTED_TYPES
+from services.jobs import QueueFullError
+from services.stats import get_vault_counters
+from services.versioning import catalog_version
+from api.caching import versioned_json
+from models.schemas import BatchDeleteRequest, DirectoryImportRequest, DocumentUploadResponse, DocumentStatus
+from core.pagination import encode_cursor, decode_cursor
 from core.config import get_settings
 import uuid
 import aiofiles
@@ -10,57 +38,206 @@ import aiofiles
 router = APIRouter(prefix="/vault", tags=["vault"])
 settings = get_settings()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB per read/write
+DEFAULT_PAGE_SIZE = 50  # documents per page when a cursor is given without a limit
+
+
+async def _save_upload(file: UploadFile, file_path: str, max_mb: float) -> tuple:
+    """Stream an upload to disk in fixed-size chunks, enforcing the size limit
+    and hashing as we go — memory per upload stays constant. Returns (size, sha256)."""
+    max_bytes = max_mb * 1024 * 1024
+    hasher = hashlib.sha256()
+    file_size = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Max size: {max_mb}MB"
+                    )
+                hasher.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    finally:
+        await file.close()
+    return file_size, hasher.hexdigest()
+
 
 @router.post("/upload", response_model=DocumentUploadResponse)
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(
+    file: UploadFile = File(...),
+    force_reindex: bool = Query(False, description="Process the file even if an identical one is already in the vault"),
+):
     """Upload and ingest a document into the vault."""
     os.makedirs(settings.upload_dir, exist_ok=True)
 
     # Validate file type
-    allowed_types = ["pdf", "docx", "doc", "txt", "md", "markdown"]
     ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
-    if ext not in allowed_types:
+    if ext not in SUPPORTED_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"File type '.{ext}' not supported. Allowed: {', '.join(allowed_types)}"
-        )
-
-    # Check file size
-    content = await file.read()
-    size_mb = len(content) / (1024 * 1024)
-    if size_mb > settings.max_file_size_mb:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Max size: {settings.max_file_size_mb}MB"
+            detail=f"File type '.{ext}' not supported. Allowed: {', '.join(SUPPORTED_TYPES)}"
         )
 
-    # Save to disk
     safe_name = f"{uuid.uuid4()}.{ext}"
     file_path = os.path.join(settings.upload_dir, safe_name)
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-
-    # Begin ingestion pipeline
-    doc_id = await ingest_document(
-        file_path=file_path,
-        original_name=file.filename,
-        file_type=ext,
-        file_size=len(content),
-    )
+    file_size, content_hash = await _save_upload(file, file_path, settings.max_file_size_mb)
 
+    # Queue for ingestion
+    try:
+        doc_id = await ingest_document(
+            file_path=file_path,
+            original_name=file.filename,
+            file_type=ext,
+            file_size=file_size,
+            content_hash=content_hash,
+            force_reindex=force_reindex,
+        )
+    except QueueFullError as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    doc = get_document(doc_id)
+    if doc["status"] == "ready":
+        return DocumentUploadResponse(
+            id=doc_id,
+            filename=file.filename,
+            status="ready",
+            message="Identical document already in the vault — linked to its existing index.",
+        )
+
+    queue = get_queue_position(doc_id)
+    position = f" (queue position {queue['position']})" if queue and queue["position"] else ""
     return DocumentUploadResponse(
         id=doc_id,
         filename=file.filename,
-        status="processing",
-        message="Document uploaded and being processed. Check status via /vault/{id}",
+        status="pending",
+        message=f"Document uploaded and queued for processing{position}. Check status via /vault/{{id}}",
     )
 
 
+def _utc_iso(value: Optional[datetime]) -> Optional[str]:
+    # created_at is stored as naive UTC ISO-8601, which sorts chronologically
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+@router.post("/imports")
+async def import_zip_archive(file: UploadFile = File(...)):
+    """Bulk-import the supported files in a ZIP archive; poll /vault/imports/{id} for progress."""
+    if not file.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Bulk import expects a .zip archive")
+    os.makedirs(archive_dir(), exist_ok=True)
+    archive_path = os.path.join(archive_dir(), f"{uuid.uuid4()}.zip")
+    await _save_upload(file, archive_path, settings.bulk_import_max_archive_mb)
+    try:
+        return await import_archive(archive_path, file.filename)
+    except BulkImportError as e:
+        os.remove(archive_path)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/imports/directory")
+async def import_server_directory(request: DirectoryImportRequest):
+    """Bulk-import the supported files under a directory on the server (within BULK_IMPORT_ROOTS)."""
+    try:
+        return await import_directory(request.path)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except BulkImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/imports")
+async def get_imports(limit: int = Query(20, ge=1, le=200)):
+    """Recent bulk imports, newest first, with progress counts."""
+    return {"imports": list_imports(limit)}
+
+
+@router.get("/imports/{import_id}")
+async def get_import_by_id(import_id: str):
+    """A bulk import's progress and the first files that failed or were skipped."""
+    record = get_import(import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return record
+
+
+@router.delete("/imports/{import_id}")
+async def cancel_import_by_id(import_id: str):
+    """Stop a bulk import after its current batch; files already queued still finish."""
+    record = cancel_import(import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return record
+
+
 @router.get("/documents")
-async def get_all_documents():
-    """List all documents in the vault."""
-    docs = list_documents()
-    return {"documents": docs, "total": len(docs)}
+async def get_all_documents(
+    request: Request,
+    status: Optional[DocumentStatus] = None,
+    file_type: Optional[str] = None,
+    tag: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: Literal["created_at", "updated_at", "original_name", "file_size"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,original_name,status"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list every match"),
+):
+    """List vault documents, optionally filtered, sorted, projected and paginated."""
+    filters = {
+        "status": status,
+        "file_type": file_type,
+        "tag": tag,
+        "created_from": _utc_iso(created_after),
+        "created_to": _utc_iso(created_before),
+    }
+    after = None
+    if cursor:
+        try:
+            key = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if len(key) != 4 or key[:2] != [sort, order]:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+        value_type = int if sort == "file_size" else str
+        if not isinstance(key[2], value_type) or isinstance(key[2], bool) or not isinstance(key[3], str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = key[2:]
+    projection = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    page_size = limit or (DEFAULT_PAGE_SIZE if cursor else None)
+
+    def build():
+        store = get_document_store()
+        try:
+            docs, last = store.page(
+                **filters, sort=sort, descending=order == "desc",
+                after=after, limit=page_size, fields=projection,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "documents": docs,
+            "total": store.count_matching(**filters),
+            "next_cursor": encode_cursor([sort, order, *last]) if last else None,
+        }
+    return await versioned_json(request, f"documents?{request.url.query}", catalog_version(), build)
+
+
+@router.get("/queue")
+async def get_queue_stats():
+    """Ingestion queue depth, worker usage and wait times per stage."""
+    return get_ingestion_queue().stats()
 
 
 @router.get("/documents/{doc_id}")
@@ -72,31 +249,45 @@ async def get_document_by_id(doc_id: str):
     return doc
 
 
+@router.post("/documents/{doc_id}/reindex")
+async def reindex_document_by_id(doc_id: str):
+    """Force a document to be extracted, embedded and summarized again."""
+    try:
+        found = await reindex_document(doc_id)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"id": doc_id, "status": "pending", "message": "Document queued for re-indexing"}
+
+
+@router.delete("/documents")
+async def delete_documents_batch(request: BatchDeleteRequest):
+    """Delete many documents (with their chunks and uploads) in one request."""
+    deleted = await asyncio.to_thread(delete_documents, request.document_ids)
+    found = set(deleted)
+    return {
+        "deleted": deleted,
+        "not_found": [doc_id for doc_id in dict.fromkeys(request.document_ids) if doc_id not in found],
+    }
+
+
 @router.delete("/documents/{doc_id}")
 async def delete_document_by_id(doc_id: str):
     """Delete a document from the vault."""
-    success = delete_document(doc_id)
+    success = await asyncio.to_thread(delete_document, doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Document not found")
     return {"message": "Document deleted successfully"}
 
 
 @router.get("/stats")
-async def get_vault_stats():
+async def get_vault_stats(request: Request):
     """Get overall vault statistics."""
-    docs = list_documents()
-    ready_docs = [d for d in docs if d["status"] == "ready"]
-    all_tags = list(set(tag for d in ready_docs for tag in d.get("tags", [])))
-    all_concepts = list(set(c for d in ready_docs for c in d.get("key_concepts", [])))
-    total_words = sum(d.get("word_count", 0) for d in ready_docs)
+    return await versioned_json(request, "stats", catalog_version(), _vault_stats)
 
-    return {
-        "total_documents": len(docs),
-        "ready_documents": len(ready_docs),
-        "total_chunks": sum(d.get("chunk_count", 0) for d in ready_docs),
-        "total_words": total_words,
-        "unique_tags": len(all_tags),
-        "unique_concepts": len(all_concepts),
-        "top_tags": all_tags[:10],
-        "top_concepts": all_concepts[:10],
-    }
+
+def _vault_stats() -> dict:
+    return get_vault_counters().summary()
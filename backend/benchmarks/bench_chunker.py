@@ -0,0 +1,128 @@
+"""
+Chunker microbenchmark: the previous character-based chunker against the
+streaming token-aware one.
+
+    cd backend && python benchmarks/bench_chunker.py --sizes 1 8 32 --tokenizer estimate
+
+Reports wall time, throughput and peak traced memory for each input size,
+plus a streamed run over 64 KB blocks. Time is measured without tracing; the
+streamed run's peak is taken with blocks generated on the fly, so the text
+is never held in memory at once.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chunker import TextChunker  # noqa: E402
+from services.tokens import get_tokenizer  # noqa: E402
+
+WORDS = (
+    "vector index retrieval chunk token model embedding document vault graph "
+    "concept summary latency cache throughput memory stream batch query answer"
+).split()
+
+
+class LegacyChunker:
+    """The chunker as it was before token-aware streaming (512/64 characters)."""
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 64):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def chunk_text(self, text: str) -> list:
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = re.sub(r' {2,}', ' ', text)
+        text = re.sub(r'\x00', '', text).strip()
+        sentences = []
+        for s in re.split(r'(?<=[.!?])\s+', text):
+            if '\n\n' in s:
+                sentences.extend(p.strip() for p in s.split('\n\n') if p.strip())
+            elif s.strip():
+                sentences.append(s.strip())
+        chunks, current = [], ""
+        for sentence in sentences:
+            if len(current) + len(sentence) > self.chunk_size and current:
+                chunks.append(current.strip())
+                words = current.split()
+                keep = max(1, int(len(words) * (self.chunk_overlap / self.chunk_size)))
+                current = " ".join(words[-keep:]) + " " + sentence
+            else:
+                current += (" " if current else "") + sentence
+        if current.strip():
+            chunks.append(current.strip())
+        return chunks
+
+
+def paragraphs(seed: int = 7):
+    """Endless synthetic prose: sentences of 5-30 words, paragraphs of 2-8 sentences."""
+    rng = random.Random(seed)
+    while True:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = rng.choices(WORDS, k=rng.randint(5, 30))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        yield " ".join(sentences) + "\n\n"
+
+
+def blocks(total_bytes: int, block_bytes: int = 64 * 1024):
+    """Text of about `total_bytes`, in blocks of about `block_bytes`."""
+    produced, block = 0, []
+    size = 0
+    for paragraph in paragraphs():
+        block.append(paragraph)
+        size += len(paragraph)
+        if size >= block_bytes:
+            yield "".join(block)
+            produced += size
+            block, size = [], 0
+            if produced >= total_bytes:
+                return
+
+
+def measure(fn, traced_fn=None):
+    """(result, seconds, peak bytes) for `fn`; the peak comes from `traced_fn` if given."""
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    (traced_fn or fn)()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def report(label: str, mb: float, count: int, elapsed: float, peak: int):
+    print(f"{label:<18} {mb:>7.1f} MB {elapsed:>8.2f} s {mb / elapsed:>8.1f} MB/s "
+          f"{count:>9} chunks  peak {peak / 2**20:>8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 8, 32], help="input sizes in MB")
+    parser.add_argument("--tokenizer", default="estimate", help='"", "estimate" or a tiktoken encoding')
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--overlap-tokens", type=int, default=16)
+    args = parser.parse_args()
+
+    chunker = TextChunker(args.chunk_tokens, args.overlap_tokens, get_tokenizer(args.tokenizer))
+    for mb in args.sizes:
+        size = int(mb * 2**20)
+        pieces = list(blocks(size))
+        text = "".join(pieces)
+        report("legacy", mb, *measure(lambda: len(LegacyChunker().chunk_text(text))))
+        report("token-aware", mb, *measure(lambda: len(chunker.chunk_text(text))))
+        report("token-aware stream", mb, *measure(
+            lambda: sum(1 for _ in chunker.iter_chunks(pieces)),
+            lambda: sum(1 for _ in chunker.iter_chunks(blocks(size))),
+        ))
+        del pieces, text
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+AstraOS command line — bulk imports without going through HTTP uploads.
+
+    cd backend && python cli.py import ~/wiki-export
+    cd backend && python cli.py import wiki.zip
+    cd backend && python cli.py imports
+
+Runs the same pipeline as the server (ingestion queue, batched embedding
+and Chroma writes, summarization) in this process, so stop the server
+first: the vector store is not shared between processes. Running the same
+import again after an interruption resumes it where it stopped.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import zipfile
+
+from core.config import get_settings
+from db.chroma import close_chroma_writer
+from db.metadata import close_metadata_store, get_metadata_store
+from services.bulk_import import (
+    BulkImportError,
+    get_import,
+    import_archive,
+    import_directory,
+    list_imports,
+    resume_imports,
+    stop_imports,
+    wait_for_import,
+)
+from services.embedding_cache import close_embedding_cache
+from services.extraction import shutdown_extract_pool
+from services.ingestion import get_ingestion_queue, resume_interrupted_documents
+from services.lexical import save_lexical_index
+from services.llm import close_llm_clients
+
+
+def _progress_line(record: dict) -> str:
+    p = record["progress"]
+    settled = p["done"] + p["failed"] + p["skipped"]
+    return (
+        f"[Import] {record['source']}: {settled}/{record['total']} files settled — "
+        f"{p['done']} done, {p['processing']} processing, {p['pending']} pending, "
+        f"{p['failed']} failed, {p['skipped']} skipped ({record['status']})"
+    )
+
+
+async def _report(import_id: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        print(_progress_line(get_import(import_id)), flush=True)
+
+
+async def _start_or_resume(source: str) -> str:
+    running = [r for r in get_metadata_store().list_imports(status="running", limit=1000) if r["source"] == source]
+    if running:
+        resume_imports(source=source)
+        print(f"[Import] Resuming import {running[0]['id']}")
+        return running[0]["id"]
+    if os.path.isdir(source):
+        record = await import_directory(source, check_roots=False)
+    elif zipfile.is_zipfile(source):
+        record = await import_archive(source, source)
+    else:
+        raise BulkImportError(f"Not a directory or ZIP archive: {source}")
+    print(f"[Import] Started import {record['id']}: {record['total']} files found")
+    return record["id"]
+
+
+async def run_import_command(path: str, interval: float) -> int:
+    settings = get_settings()
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    os.makedirs(settings.chroma_persist_dir, exist_ok=True)
+    queue = get_ingestion_queue()
+    queue.start()
+    reporter = None
+    try:
+        resumed = resume_interrupted_documents()
+        if resumed:
+            print(f"[Import] Re-queued {resumed} interrupted document(s)")
+        import_id = await _start_or_resume(os.path.realpath(path))
+        reporter = asyncio.ensure_future(_report(import_id, interval))
+        await wait_for_import(import_id)
+        record = get_import(import_id)
+        print(_progress_line(record))
+        for failure in record["failures"]:
+            print(f"  {failure['state']}: {failure['path']} — {failure['error']}")
+        return 0 if record["status"] == "completed" else 1
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await stop_imports()
+        await queue.stop()
+        await asyncio.to_thread(close_chroma_writer)
+        await close_llm_clients()
+        shutdown_extract_pool()
+        save_lexical_index()
+        close_embedding_cache()
+        close_metadata_store()
+
+
+def list_imports_command(limit: int) -> int:
+    for record in list_imports(limit):
+        print(f"{record['id']}  {record['created_at'][:19]}  {record['kind']:<9} {_progress_line(record)}")
+    close_metadata_store()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="import a directory or ZIP archive into the vault")
+    import_parser.add_argument("path", help="directory or .zip archive")
+    import_parser.add_argument("--interval", type=float, default=5.0, help="seconds between progress lines")
+    list_parser = commands.add_parser("imports", help="list recent imports and their progress")
+    list_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "imports":
+        return list_imports_command(args.limit)
+    try:
+        return asyncio.run(run_import_command(args.path, args.interval))
+    except BulkImportError as e:
+        print(f"[Import Error] {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("[Import] Interrupted — run the same command again to resume.", file=sys.stderr)
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,10 +8,98 @@ class Settings(BaseSettings):
     embedding_model: str = "openai"
     llm_model: str = "gpt-4o-mini"
     chroma_persist_dir: str = "./chroma_db"
+    metadata_db_path: str = "./vault.db"
     upload_dir: str = "./uploads"
     allowed_origins: str = "http://localhost:3000"
     max_file_size_mb: int = 50
 
+    # Load the embedder, vector DB and lexical index after the server binds
+    # (readiness on /health/ready) instead of blocking startup
+    warmup_in_background: bool = True
+
+    # Ingestion queue
+    ingest_extract_workers: int = 2
+    ingest_embed_workers: int = 2
+    ingest_summarize_workers: int = 2
+    ingest_max_pending: int = 1000
+    ingest_small_file_mb: float = 1.0
+    ingest_max_retries: int = 3
+    ingest_retry_backoff_s: float = 2.0
+
+    # Streaming ingestion for long PDFs (0 pages = off): windows of pages flow
+    # through extract → chunk → embed/store with this many queued per stage
+    ingest_stream_min_pages: int = 200
+    ingest_stream_window_pages: int = 20
+    ingest_stream_queue: int = 2
+
+    # Bulk imports: files per batch window, most documents an import keeps
+    # waiting in the shared queue, archive size limit, progress poll interval,
+    # and server directories the API may import from (comma-separated; empty = none)
+    bulk_import_window: int = 64
+    bulk_import_max_queued: int = 100
+    bulk_import_max_archive_mb: int = 2048
+    bulk_import_poll_s: float = 1.0
+    bulk_import_roots: str = ""
+
+    # Persistent embedding cache (0 MB disables it)
+    embedding_cache_path: str = "./embedding_cache.db"
+    embedding_cache_max_mb: int = 512
+    embedding_cache_dtype: str = "float16"  # "float16" | "float32"
+
+    # Embedding micro-batching across concurrent requests
+    embed_batch_window_ms: float = 10.0
+    embed_max_batch: int = 256
+    embed_max_batch_tokens: int = 100_000
+
+    # Write-behind chunk writer: batch limits (records / MB) and how long a
+    # small write may wait to be coalesced with others
+    chroma_write_batch: int = 1000
+    chroma_write_batch_mb: float = 16.0
+    chroma_flush_ms: float = 50.0
+
+    # Chunking, sized in tokens of CHUNK_TOKENIZER: "" = the LLM's encoding,
+    # "estimate" = ~4 characters per token, or a tiktoken encoding name
+    chunk_tokens: int = 128
+    chunk_overlap_tokens: int = 16
+    chunk_tokenizer: str = ""
+
+    # Retrieval: "hybrid" (vector + BM25, rank-fused) or "vector" only, and the
+    # threads serving queries (bounds concurrent retrievals)
+    search_mode: str = "hybrid"
+    retrieval_threads: int = 8
+
+    # BM25 index snapshot: rewritten in the background this often while it
+    # has unsaved changes, besides at shutdown (0 = only at shutdown)
+    lexical_snapshot_interval_s: float = 60.0
+
+    # Chat prompt budgets (tokens): retrieved context and conversation
+    # history, filled from this many candidate chunks
+    rag_context_tokens: int = 1200
+    rag_history_tokens: int = 600
+    rag_candidate_chunks: int = 8
+
+    # Semantic answer cache for chat (0 entries disables it): answers are
+    # reused for questions this similar that retrieve the same chunks
+    answer_cache_max_entries: int = 1000
+    answer_cache_ttl_s: float = 3600.0
+    answer_cache_similarity: float = 0.95
+
+    # Insights narrative: regenerated in the background after this many
+    # document changes, or after max age once anything changed
+    insights_regen_min_changes: int = 5
+    insights_max_age_s: float = 21600.0
+
+    # Text extraction process pool (0 = one process per CPU core)
+    extract_processes: int = 0
+    pdf_pages_per_task: int = 50
+
+    # Shared LLM HTTP client: connection pool limits and timeouts (seconds)
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry_s: float = 60.0
+    llm_connect_timeout_s: float = 5.0
+    llm_timeout_s: float = 60.0
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,25 @@
+"""
+Opaque cursors for keyset pagination.
+A cursor is the sort key of the last item on a page, JSON-encoded and
+base64url-wrapped so clients treat it as a token rather than an offset.
+"""
+import base64
+import json
+from typing import List
+
+
+def encode_cursor(key: List) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Sort key from a cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return key
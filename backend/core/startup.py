@@ -0,0 +1,43 @@
+"""
+Startup profiling — per-phase timings for imports, lifespan and warm-up,
+plus the readiness flag reported separately from liveness on /health.
+"""
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class StartupProfile:
+    def __init__(self):
+        self.phases: dict = {}
+        self.ready = False
+        self.error: Optional[str] = None
+        self._origin = time.perf_counter()
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self):
+        self.ready = True
+        self.record("time_to_ready", time.perf_counter() - self._origin)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+
+    def report(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "phases_ms": dict(self.phases)}
+
+
+_profile = StartupProfile()
+
+
+def get_startup_profile() -> StartupProfile:
+    return _profile
@@ -1,36 +1,342 @@
-import chromadb
-from chromadb.config import Settings
+"""
+ChromaDB access: the chunk collection, an exact cached chunk count, and a
+write-behind writer that batches chunk upserts by size and coalesces small
+writes from different documents.
+"""
+from concurrent.futures import Future, wait as wait_futures
 from core.config import get_settings
+from typing import List, Optional
+import asyncio
 import os
+import threading
+import time
 
 _client = None
 _collection = None
+_writer = None
+_chunk_count: Optional[int] = None
+_count_lock = threading.Lock()
+_init_lock = threading.RLock()
+
+# Rough per-record overhead on top of the vector and text (ids, metadata)
+RECORD_OVERHEAD_BYTES = 256
+
+# Document ids per `$in` filter when deleting by metadata
+WHERE_IN_BATCH = 500
 
 
 def get_chroma_client():
     global _client
     if _client is None:
-        settings = get_settings()
-        os.makedirs(settings.chroma_persist_dir, exist_ok=True)
-        _client = chromadb.PersistentClient(
-            path=settings.chroma_persist_dir,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Warm-up and request threads may race to open the client
+        with _init_lock:
+            if _client is None:
+                # Imported here: chromadb is heavy and only needed once the vault is used
+                import chromadb
+                from chromadb.config import Settings
+                settings = get_settings()
+                os.makedirs(settings.chroma_persist_dir, exist_ok=True)
+                _client = chromadb.PersistentClient(
+                    path=settings.chroma_persist_dir,
+                    settings=Settings(anonymized_telemetry=False)
+                )
     return _client
 
 
 def get_collection(collection_name: str = "astraos_vault"):
     global _collection
     if _collection is None:
-        client = get_chroma_client()
-        _collection = client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        with _init_lock:
+            if _collection is None:
+                client = get_chroma_client()
+                _collection = client.get_or_create_collection(
+                    name=collection_name,
+                    metadata={"hnsw:space": "cosine"}
+                )
     return _collection
 
 
 def reset_collection_cache():
     """Reset collection cache (e.g., after deletion)"""
-    global _collection
+    global _collection, _chunk_count
     _collection = None
+    with _count_lock:
+        _chunk_count = None
+
+
+def get_chunk_count() -> int:
+    """Number of chunks in the collection, cached and kept current by upsert/delete_chunks."""
+    global _chunk_count
+    with _count_lock:
+        if _chunk_count is None:
+            _chunk_count = get_collection().count()
+        return _chunk_count
+
+
+def _adjust_chunk_count(delta: int):
+    global _chunk_count
+    with _count_lock:
+        if _chunk_count is not None:
+            _chunk_count = max(0, _chunk_count + delta)
+
+
+def _existing_ids(ids: List[str]) -> List[str]:
+    # include=[] fetches ids only — no documents, metadata or embeddings
+    return get_collection().get(ids=ids, include=[])["ids"]
+
+
+def max_batch_size() -> int:
+    """Largest number of records Chroma accepts in one call."""
+    client = get_chroma_client()
+    getter = getattr(client, "get_max_batch_size", None)
+    return getter() if getter else client.max_batch_size
+
+
+def _record_bytes(embedding, document: str) -> int:
+    return len(embedding) * 4 + len(document) + RECORD_OVERHEAD_BYTES
+
+
+def upsert_chunks(ids: List[str], embeddings: list, documents: List[str], metadatas: List[dict]):
+    """Insert or replace chunks, keeping the cached chunk count exact.
+
+    Writes synchronously, split into batches Chroma accepts; ingestion goes
+    through the write-behind writer instead (write_chunks).
+    """
+    collection = get_collection()
+    step = max_batch_size()
+    for start in range(0, len(ids), step):
+        batch = slice(start, start + step)
+        added = len(ids[batch]) - len(_existing_ids(ids[batch]))
+        collection.upsert(
+            ids=ids[batch], embeddings=embeddings[batch], documents=documents[batch], metadatas=metadatas[batch],
+        )
+        _adjust_chunk_count(added)
+
+
+class _Write:
+    """One caller's chunks, and the future resolved once all are stored."""
+
+    def __init__(self, ids, embeddings, documents, metadatas):
+        self.records = list(zip(ids, embeddings, documents, metadatas))
+        self.nbytes = sum(_record_bytes(e, d) for _, e, d, _ in self.records)
+        self.remaining = len(self.records)
+        self.future: Future = Future()
+        self.error: Optional[BaseException] = None
+
+    def _settle(self, count: int):
+        """`count` records were attempted; resolve once none remain."""
+        self.remaining -= count
+        if self.remaining <= 0:
+            if self.error is not None:
+                self.future.set_exception(self.error)
+            else:
+                self.future.set_result(len(self.records))
+
+
+class ChromaWriter:
+    """Write-behind buffer for chunk upserts, drained by a background thread.
+
+    Writes are coalesced across callers and flushed once `max_batch` records
+    or `max_batch_bytes` are buffered, or the oldest has waited `flush_ms`;
+    each flush is cut into batches within both limits (and Chroma's own).
+    """
+
+    def __init__(self, max_batch: int, max_batch_bytes: int, flush_ms: float):
+        self.max_batch = max(1, min(max_batch, max_batch_size()))
+        self.max_batch_bytes = max(1, max_batch_bytes)
+        self.window = flush_ms / 1000
+        self._cond = threading.Condition()
+        self._pending: List[_Write] = []
+        self._in_flight: List[_Write] = []
+        self._records = 0
+        self._bytes = 0
+        self._oldest = 0.0
+        self._urgent = False
+        self._closed = False
+        self.writes = 0
+        self.batches = 0
+        self.records = 0
+        self.largest_batch = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ids: List[str], embeddings: list, documents: List[str], metadatas: List[dict]) -> Future:
+        """Queue chunks for upsert; the future resolves once they are all written."""
+        write = _Write(ids, embeddings, documents, metadatas)
+        if not write.records:
+            write.future.set_result(0)
+            return write.future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Chroma writer is closed")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(write)
+            self._records += len(write.records)
+            self._bytes += write.nbytes
+            self.writes += 1
+            self._cond.notify()
+        return write.future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until everything submitted so far has been written (or failed)."""
+        with self._cond:
+            futures = [w.future for w in self._pending + self._in_flight]
+            if self._pending:
+                self._urgent = True
+                self._cond.notify()
+        if futures:
+            wait_futures(futures, timeout=timeout)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        with self._cond:
+            buffered = self._records
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "records": self.records,
+            "largest_batch": self.largest_batch,
+            "buffered_records": buffered,
+            "errors": self.errors,
+        }
+
+    def _due(self) -> bool:
+        return (
+            self._urgent or self._closed
+            or self._records >= self.max_batch or self._bytes >= self.max_batch_bytes
+            or time.monotonic() - self._oldest >= self.window
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._pending and self._due()):
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self._oldest + self.window - time.monotonic())
+                    self._cond.wait(timeout)
+                pending, self._pending = self._pending, []
+                self._in_flight = pending
+                self._records = self._bytes = 0
+                self._urgent = False
+            try:
+                self._write(pending)
+            finally:
+                with self._cond:
+                    self._in_flight = []
+
+    def _plan_batches(self, pending: List[_Write]) -> List[list]:
+        """Split (write, record) items into batches within the record and byte limits."""
+        batches, current, size = [], [], 0
+        for write in pending:
+            for record in write.records:
+                cost = _record_bytes(record[1], record[2])
+                if current and (len(current) >= self.max_batch or size + cost > self.max_batch_bytes):
+                    batches.append(current)
+                    current, size = [], 0
+                current.append((write, record))
+                size += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _write(self, pending: List[_Write]):
+        """Write the batches in order, resolving each caller after its last one."""
+        for batch in self._plan_batches(pending):
+            ids, embeddings, documents, metadatas = zip(*(record for _, record in batch))
+            try:
+                upsert_chunks(list(ids), list(embeddings), list(documents), list(metadatas))
+                self.batches += 1
+                self.records += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            except Exception as e:
+                print(f"[Chroma Writer] Batch of {len(batch)} failed: {e}")
+                self.errors += 1
+                for write, _ in batch:
+                    write.error = write.error or e
+            counts = {}
+            for write, _ in batch:
+                counts[write] = counts.get(write, 0) + 1
+            for write, count in counts.items():
+                write._settle(count)
+
+
+def get_chroma_writer() -> ChromaWriter:
+    global _writer
+    if _writer is None:
+        with _init_lock:
+            if _writer is None:
+                settings = get_settings()
+                _writer = ChromaWriter(
+                    max_batch=settings.chroma_write_batch,
+                    max_batch_bytes=int(settings.chroma_write_batch_mb * 1024 * 1024),
+                    flush_ms=settings.chroma_flush_ms,
+                )
+    return _writer
+
+
+async def write_chunks(ids: List[str], embeddings: list, documents: List[str], metadatas: List[dict]):
+    """Upsert chunks through the write-behind writer; returns once they are durable."""
+    await asyncio.wrap_future(get_chroma_writer().submit(ids, embeddings, documents, metadatas))
+
+
+def chroma_writer_stats() -> Optional[dict]:
+    return _writer.stats() if _writer is not None else None
+
+
+def close_chroma_writer():
+    """Flush buffered writes and stop the writer thread."""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def delete_document_chunks(document_ids: List[str]):
+    """Delete every chunk of the given documents.
+
+    Goes by a `document_id $in` filter rather than the deterministic ids,
+    so chunks beyond a document's recorded count (left by an interrupted
+    run, say) go too. Only the matching ids are read back, to keep the
+    cached chunk count exact without a recount.
+    """
+    if not document_ids:
+        return
+    if _writer is not None:
+        _writer.flush()
+    collection = get_collection()
+    for start in range(0, len(document_ids), WHERE_IN_BATCH):
+        where = {"document_id": {"$in": document_ids[start:start + WHERE_IN_BATCH]}}
+        present = collection.get(where=where, include=[])["ids"]
+        if present:
+            collection.delete(ids=present)
+            _adjust_chunk_count(-len(present))
+
+
+def delete_chunks(ids: Optional[List[str]] = None, where: Optional[dict] = None) -> List[str]:
+    """Delete chunks by id or metadata filter; returns the ids that were removed.
+
+    Buffered writes are flushed first so a delete never lands before an
+    upsert that was queued ahead of it.
+    """
+    if _writer is not None:
+        _writer.flush()
+    collection = get_collection()
+    if ids is not None:
+        present = _existing_ids(ids) if ids else []
+    else:
+        present = collection.get(where=where, include=[])["ids"]
+    if present:
+        collection.delete(ids=present)
+        _adjust_chunk_count(-len(present))
+    return present
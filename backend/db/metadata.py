@@ -0,0 +1,652 @@
+"""
+Document metadata store — embedded SQLite in WAL mode.
+Indexed on status, created_at and tags so listings never need a full scan,
+and the catalogue survives restarts alongside the Chroma chunks.
+"""
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from enum import Enum
+from typing import Optional, List
+
+from core.config import get_settings
+
+_store = None
+
+# column name -> SQL type. New columns are added on open, so older vault
+# databases are migrated in place.
+COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "filename": "TEXT NOT NULL",
+    "original_name": "TEXT NOT NULL",
+    "file_type": "TEXT NOT NULL",
+    "file_size": "INTEGER NOT NULL DEFAULT 0",
+    "status": "TEXT NOT NULL",
+    "chunk_count": "INTEGER NOT NULL DEFAULT 0",
+    "tags": "TEXT NOT NULL DEFAULT '[]'",
+    "summary": "TEXT NOT NULL DEFAULT ''",
+    "key_concepts": "TEXT NOT NULL DEFAULT '[]'",
+    "created_at": "TEXT NOT NULL",
+    "updated_at": "TEXT NOT NULL",
+    "word_count": "INTEGER NOT NULL DEFAULT 0",
+    "page_count": "INTEGER NOT NULL DEFAULT 0",
+    "content_hash": "TEXT NOT NULL DEFAULT ''",
+    "text_hash": "TEXT NOT NULL DEFAULT ''",
+    # id of the document whose Chroma chunks back this record ('' = its own)
+    "chunk_source": "TEXT NOT NULL DEFAULT ''",
+}
+
+JSON_FIELDS = ("tags", "key_concepts")
+
+INDEXES = {
+    "idx_documents_status": "documents(status)",
+    "idx_documents_created_at": "documents(created_at, id)",
+    "idx_documents_updated_at": "documents(updated_at, id)",
+    "idx_documents_name": "documents(original_name, id)",
+    "idx_documents_size": "documents(file_size, id)",
+    "idx_documents_file_type": "documents(file_type)",
+    "idx_documents_content_hash": "documents(content_hash) WHERE content_hash != ''",
+    "idx_documents_text_hash": "documents(text_hash) WHERE text_hash != ''",
+    "idx_documents_chunk_source": "documents(chunk_source) WHERE chunk_source != ''",
+}
+
+HASH_FIELDS = ("content_hash", "text_hash")
+
+# Columns a listing can be ordered by (each indexed together with id)
+SORT_FIELDS = ("created_at", "updated_at", "original_name", "file_size")
+
+# Bulk import runs and their file manifests: one row per file found, so an
+# interrupted import picks up where it stopped
+IMPORT_COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "kind": "TEXT NOT NULL",  # "zip" | "directory"
+    "source": "TEXT NOT NULL",  # archive name or directory path
+    "archive": "TEXT NOT NULL DEFAULT ''",  # saved upload being read, for ZIP imports
+    "status": "TEXT NOT NULL",  # running | completed | cancelled | failed
+    "total": "INTEGER NOT NULL DEFAULT 0",
+    "error": "TEXT NOT NULL DEFAULT ''",
+    "created_at": "TEXT NOT NULL",
+    "updated_at": "TEXT NOT NULL",
+}
+
+# A manifest row is pending until its file is registered as a document
+# (queued), then settles to done/failed with that document; skipped files
+# were never supported or were too large
+IMPORT_FILE_STATES = ("pending", "queued", "done", "failed", "skipped")
+
+# Ids per IN (...) list; queries binding a list twice stay under SQLite's
+# 999-variable limit on older builds
+SQL_BATCH = 400
+
+
+def _to_db(field: str, value):
+    if field in JSON_FIELDS:
+        return json.dumps(list(value or []))
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class DocumentStore:
+    """Thread-safe SQLite-backed document catalogue."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        # Bumped on every write; lets readers cache anything derived from the catalogue
+        self.version = 0
+        self._migrate()
+        self._status_counts = {
+            row[0]: row[1]
+            for row in self._conn.execute("SELECT status, COUNT(*) FROM documents GROUP BY status")
+        }
+
+    def _migrate(self):
+        with self._lock:
+            cols = ", ".join(f"{name} {sql}" for name, sql in COLUMNS.items())
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS documents ({cols})")
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            for name, sql in COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE documents ADD COLUMN {name} {sql}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS document_tags ("
+                " tag TEXT NOT NULL,"
+                " doc_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,"
+                " PRIMARY KEY (tag, doc_id)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_document_tags_doc ON document_tags(doc_id)")
+            # Extracted text (zlib-compressed UTF-8) and generated study material
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS document_text ("
+                " doc_id TEXT PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,"
+                " text BLOB NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS study_content ("
+                " doc_id TEXT PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,"
+                " text_hash TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " created_at TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            for name, target in INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            cols = ", ".join(f"{name} {sql}" for name, sql in IMPORT_COLUMNS.items())
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS imports ({cols})")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS import_files ("
+                " import_id TEXT NOT NULL REFERENCES imports(id) ON DELETE CASCADE,"
+                " seq INTEGER NOT NULL,"
+                " path TEXT NOT NULL,"
+                " size INTEGER NOT NULL DEFAULT 0,"
+                " status TEXT NOT NULL,"
+                " doc_id TEXT NOT NULL DEFAULT '',"
+                " error TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (import_id, seq)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_import_files_status ON import_files(import_id, status, seq)"
+            )
+
+    def _current_status(self, doc_id: str) -> Optional[str]:
+        row = self._conn.execute("SELECT status FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def _move_status(self, old: Optional[str], new: Optional[str]):
+        if old == new:
+            return
+        if old is not None:
+            self._status_counts[old] -= 1
+            if not self._status_counts[old]:
+                del self._status_counts[old]
+        if new is not None:
+            self._status_counts[new] = self._status_counts.get(new, 0) + 1
+
+    def _row_to_doc(self, row: sqlite3.Row) -> dict:
+        doc = dict(row)
+        for field in JSON_FIELDS:
+            if field in doc:
+                doc[field] = json.loads(doc[field]) if doc[field] else []
+        return doc
+
+    def _write_tags(self, doc_id: str, tags):
+        self._conn.execute("DELETE FROM document_tags WHERE doc_id = ?", (doc_id,))
+        unique = {t.lower() for t in (tags or []) if t}
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO document_tags (tag, doc_id) VALUES (?, ?)",
+            [(t, doc_id) for t in unique],
+        )
+
+    def insert(self, doc: dict):
+        fields = [f for f in COLUMNS if f in doc]
+        placeholders = ", ".join("?" for _ in fields)
+        with self._lock:
+            previous = self._current_status(doc["id"])
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO documents ({', '.join(fields)}) VALUES ({placeholders})",
+                    [_to_db(f, doc[f]) for f in fields],
+                )
+                self._write_tags(doc["id"], doc.get("tags"))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._move_status(previous, _to_db("status", doc["status"]))
+            self.version += 1
+
+    def update(self, doc_id: str, fields: dict) -> bool:
+        fields = {k: v for k, v in fields.items() if k in COLUMNS and k != "id"}
+        if not fields:
+            return self.exists(doc_id)
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            previous = self._current_status(doc_id) if "status" in fields else None
+            self._conn.execute("BEGIN")
+            try:
+                cur = self._conn.execute(
+                    f"UPDATE documents SET {assignments} WHERE id = ?",
+                    [_to_db(k, v) for k, v in fields.items()] + [doc_id],
+                )
+                if cur.rowcount and "tags" in fields:
+                    self._write_tags(doc_id, fields["tags"])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if cur.rowcount:
+                if "status" in fields:
+                    self._move_status(previous, _to_db("status", fields["status"]))
+                self.version += 1
+        return cur.rowcount > 0
+
+    def touch(self):
+        """Bump the version without writing, once views derived from the last write are current."""
+        with self._lock:
+            self.version += 1
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return self._row_to_doc(row) if row else None
+
+    def exists(self, doc_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return row is not None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """List documents oldest-first, optionally filtered by status and/or tag."""
+        sql, params = self._filtered("SELECT d.* FROM documents d", status=status, tag=tag)
+        sql += " ORDER BY d.created_at, d.id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_doc(r) for r in rows]
+
+    def _filtered(
+        self,
+        select: str,
+        status: Optional[str] = None,
+        tag: Optional[str] = None,
+        file_type: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        extra: Optional[List[str]] = None,
+        extra_params: Optional[list] = None,
+    ):
+        """`select` plus the JOIN/WHERE for the given filters (all optional)."""
+        sql = select
+        clauses, params = [], []
+        if tag:
+            sql += " JOIN document_tags t ON t.doc_id = d.id"
+            clauses.append("t.tag = ?")
+            params.append(tag.lower())
+        if status:
+            clauses.append("d.status = ?")
+            params.append(_to_db("status", status))
+        if file_type:
+            clauses.append("d.file_type = ?")
+            params.append(file_type.lower().lstrip("."))
+        if created_from:
+            clauses.append("d.created_at >= ?")
+            params.append(created_from)
+        if created_to:
+            clauses.append("d.created_at < ?")
+            params.append(created_to)
+        if extra:
+            clauses.extend(extra)
+            params.extend(extra_params or [])
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql, params
+
+    def page(
+        self,
+        status: Optional[str] = None,
+        tag: Optional[str] = None,
+        file_type: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        after: Optional[list] = None,
+        limit: Optional[int] = 50,
+        fields: Optional[List[str]] = None,
+    ):
+        """Keyset-paginated listing.
+
+        `after` is the (sort value, id) of the last document already seen.
+        Returns (documents, key of the last document or None if this was the
+        final page). `fields` restricts the columns returned; no `limit`
+        returns every match.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        columns = list(COLUMNS) if not fields else list(dict.fromkeys(["id", *fields]))
+        unknown = [f for f in columns if f not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = list(dict.fromkeys([*columns, sort]))
+
+        direction = "DESC" if descending else "ASC"
+        extra, extra_params = [], []
+        if after:
+            extra.append(f"(d.{sort}, d.id) {'<' if descending else '>'} (?, ?)")
+            extra_params.extend(after)
+        sql, params = self._filtered(
+            "SELECT " + ", ".join(f"d.{c}" for c in selected) + " FROM documents d",
+            status=status, tag=tag, file_type=file_type,
+            created_from=created_from, created_to=created_to,
+            extra=extra, extra_params=extra_params,
+        )
+        sql += f" ORDER BY d.{sort} {direction}, d.id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit) + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        more = limit is not None and len(rows) > limit
+        rows = rows[:limit]
+        next_key = [rows[-1][sort], rows[-1]["id"]] if more and rows else None
+        docs = []
+        for row in rows:
+            doc = self._row_to_doc(row)
+            if sort not in columns:
+                del doc[sort]
+            docs.append(doc)
+        return docs, next_key
+
+    def count_matching(self, **filters) -> int:
+        """Number of documents matching the page() filters."""
+        if not any(v for k, v in filters.items() if k != "status"):
+            return self.count(filters.get("status"))
+        sql, params = self._filtered("SELECT COUNT(*) FROM documents d", **filters)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Document count, from in-memory per-status counters."""
+        with self._lock:
+            if status:
+                return self._status_counts.get(_to_db("status", status), 0)
+            return sum(self._status_counts.values())
+
+    def status_counts(self) -> dict:
+        with self._lock:
+            return dict(self._status_counts)
+
+    def find_ready_by_hash(self, field: str, value: str, exclude_id: Optional[str] = None) -> Optional[dict]:
+        """Oldest ready document with the given content or text hash."""
+        if field not in HASH_FIELDS or not value:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM documents WHERE {field} = ? AND status = 'ready' AND id != ? "
+                "ORDER BY created_at LIMIT 1",
+                (value, exclude_id or ""),
+            ).fetchone()
+        return self._row_to_doc(row) if row else None
+
+    def chunk_source_refs(self, source_id: str) -> int:
+        """Number of records whose chunks live under `source_id`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM documents WHERE id = ? AND chunk_source = '')"
+                " + (SELECT COUNT(*) FROM documents WHERE chunk_source = ?)",
+                (source_id, source_id),
+            ).fetchone()
+        return row[0]
+
+    def resolve_chunk_sources(self, doc_ids: List[str]) -> List[str]:
+        """Map document ids to the ids their chunks are stored under."""
+        if not doc_ids:
+            return []
+        placeholders = ", ".join("?" for _ in doc_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, chunk_source FROM documents WHERE id IN ({placeholders})",
+                list(doc_ids),
+            ).fetchall()
+        sources = {r["id"]: (r["chunk_source"] or r["id"]) for r in rows}
+        return list(dict.fromkeys(sources.get(d, d) for d in doc_ids))
+
+    def chunk_owners(self, source_ids: List[str]) -> dict:
+        """For chunk-set ids, the record search results should name: the
+        document itself while it exists, else the oldest duplicate still
+        linked to its chunks. Sets nothing refers to are left out."""
+        source_ids = list(dict.fromkeys(source_ids))
+        owners = {}
+        with self._lock:
+            for start in range(0, len(source_ids), SQL_BATCH):
+                batch = source_ids[start:start + SQL_BATCH]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT id AS source, id, original_name, 0 AS linked, created_at FROM documents "
+                    f"WHERE id IN ({placeholders}) "
+                    f"UNION ALL SELECT chunk_source, id, original_name, 1, created_at FROM documents "
+                    f"WHERE chunk_source IN ({placeholders}) ORDER BY linked, created_at, id",
+                    batch + batch,
+                ).fetchall()
+                for row in rows:
+                    owners.setdefault(row["source"], {"id": row["id"], "original_name": row["original_name"]})
+        return owners
+
+    def referenced_chunk_sources(self, source_ids: List[str]) -> set:
+        """The subset of `source_ids` whose chunks some record still uses."""
+        referenced = set()
+        with self._lock:
+            for start in range(0, len(source_ids), SQL_BATCH):
+                batch = list(source_ids[start:start + SQL_BATCH])
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT id FROM documents WHERE id IN ({placeholders}) AND chunk_source = '' "
+                    f"UNION SELECT chunk_source FROM documents WHERE chunk_source IN ({placeholders})",
+                    batch + batch,
+                ).fetchall()
+                referenced.update(r[0] for r in rows)
+        return referenced
+
+    def delete_many(self, doc_ids: List[str]) -> List[dict]:
+        """Delete records in one transaction; returns the ones that existed."""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        deleted = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for start in range(0, len(doc_ids), SQL_BATCH):
+                    batch = doc_ids[start:start + SQL_BATCH]
+                    placeholders = ", ".join("?" for _ in batch)
+                    rows = self._conn.execute(
+                        f"SELECT * FROM documents WHERE id IN ({placeholders})", batch
+                    ).fetchall()
+                    deleted.extend(self._row_to_doc(r) for r in rows)
+                    self._conn.execute(f"DELETE FROM documents WHERE id IN ({placeholders})", batch)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for doc in deleted:
+                self._move_status(doc["status"], None)
+            if deleted:
+                self.version += 1
+        return deleted
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            previous = self._current_status(doc_id)
+            cur = self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            if cur.rowcount:
+                self._move_status(previous, None)
+                self.version += 1
+        return cur.rowcount > 0
+
+    def put_text(self, doc_id: str, text: str):
+        self.put_compressed_text(doc_id, zlib.compress(text.encode("utf-8"), 6))
+
+    def put_compressed_text(self, doc_id: str, blob: bytes):
+        """Store text already zlib-compressed (e.g. built up incrementally)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO document_text (doc_id, text) VALUES (?, ?)", (doc_id, blob)
+            )
+
+    def get_text(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM document_text WHERE doc_id = ?", (doc_id,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def get_study(self, doc_id: str, text_hash: str) -> Optional[dict]:
+        """Cached study material, if it was generated from text with this hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM study_content WHERE doc_id = ? AND text_hash = ?", (doc_id, text_hash)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_study(self, doc_id: str, text_hash: str, content: dict, created_at: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO study_content (doc_id, text_hash, content, created_at) VALUES (?, ?, ?, ?)",
+                (doc_id, text_hash, json.dumps(content), created_at),
+            )
+
+    def create_import(self, record: dict, files: List[tuple]):
+        """Insert an import and its manifest of (path, size, status, error) rows in one transaction."""
+        fields = [f for f in IMPORT_COLUMNS if f in record]
+        placeholders = ", ".join("?" for _ in fields)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    f"INSERT INTO imports ({', '.join(fields)}) VALUES ({placeholders})",
+                    [record[f] for f in fields],
+                )
+                self._conn.executemany(
+                    "INSERT INTO import_files (import_id, seq, path, size, status, error) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(record["id"], seq, *row) for seq, row in enumerate(files)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_import(self, import_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM imports WHERE id = ?", (import_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_imports(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Imports newest-first, optionally only those with `status`."""
+        sql, params = "SELECT * FROM imports", []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def update_import(self, import_id: str, fields: dict) -> bool:
+        fields = {k: v for k, v in fields.items() if k in IMPORT_COLUMNS and k != "id"}
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE imports SET {assignments} WHERE id = ?", [*fields.values(), import_id]
+            )
+        return cur.rowcount > 0
+
+    def pending_import_files(self, import_id: str, limit: int) -> List[dict]:
+        """The next manifest rows not yet registered, in manifest order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, path, size FROM import_files WHERE import_id = ? AND status = 'pending' "
+                "ORDER BY seq LIMIT ?",
+                (import_id, int(limit)),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def set_import_files(self, import_id: str, updates: List[tuple]):
+        """Apply (seq, status, doc_id, error) updates to manifest rows in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE import_files SET status = ?, doc_id = ?, error = ? WHERE import_id = ? AND seq = ?",
+                    [(status, doc_id, error, import_id, seq) for seq, status, doc_id, error in updates],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # A queued file's state is its document's: ready = done, error or
+    # deleted = failed, anything else is still processing
+    _IMPORT_FILE_STATE = (
+        "CASE WHEN f.status != 'queued' THEN f.status"
+        " WHEN d.status = 'ready' THEN 'done'"
+        " WHEN d.status IS NULL OR d.status = 'error' THEN 'failed'"
+        " ELSE 'processing' END"
+    )
+
+    def import_progress(self, import_id: str) -> dict:
+        """Manifest row counts by state (pending, processing, done, failed, skipped)."""
+        progress = {state: 0 for state in ("pending", "processing", "done", "failed", "skipped")}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._IMPORT_FILE_STATE} AS state, COUNT(*) FROM import_files f "
+                "LEFT JOIN documents d ON d.id = f.doc_id WHERE f.import_id = ? GROUP BY state",
+                (import_id,),
+            ).fetchall()
+        for state, count in rows:
+            progress[state] = count
+        return progress
+
+    def import_failures(self, import_id: str, limit: int = 20) -> List[dict]:
+        """Files that failed or were skipped, with the reason."""
+        state = self._IMPORT_FILE_STATE
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT f.path, f.doc_id, {state} AS state,"
+                " CASE WHEN f.error != '' THEN f.error WHEN d.id IS NULL THEN 'Document was deleted.'"
+                " ELSE d.summary END AS error "
+                "FROM import_files f LEFT JOIN documents d ON d.id = f.doc_id "
+                f"WHERE f.import_id = ? AND {state} IN ('failed', 'skipped') ORDER BY f.seq LIMIT ?",
+                (import_id, int(limit)),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def settle_import_files(self, import_id: str):
+        """Record each queued file's final state, so the history outlives its documents."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE import_files SET status = CASE"
+                " (SELECT status FROM documents d WHERE d.id = import_files.doc_id)"
+                " WHEN 'ready' THEN 'done' WHEN 'pending' THEN 'queued' WHEN 'processing' THEN 'queued'"
+                " ELSE 'failed' END "
+                "WHERE import_id = ? AND status = 'queued'",
+                (import_id,),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_metadata_store() -> DocumentStore:
+    """Open the metadata store on first use."""
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = DocumentStore(settings.metadata_db_path)
+    return _store
+
+
+def close_metadata_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -1,29 +1,110 @@
 """
 AstraOS AI Vault — FastAPI Application Entry Point
 """
+import time
+
+_import_started = time.perf_counter()
+
 import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from api.routes import vault, chat, search, graph, insights
+from api.middleware import UploadSizeLimitMiddleware
 from core.config import get_settings
+from db.metadata import close_metadata_store
+from services.extraction import shutdown_extract_pool
+from services.embedding_cache import get_embedding_cache, close_embedding_cache
+from services.embed_batcher import get_embedding_batcher
+from services.rag import shutdown_retrieval_pool
+from services.llm import close_llm_clients, metrics as llm_metrics
+from services.answer_cache import get_answer_cache
+from services.tokens import get_encoding
+from services.chunker import get_chunker
+from services.graph import get_graph_index
+from services.stats import get_vault_counters
+from services.insights import cancel_insight_refreshes
+from services.lexical import save_lexical_index
+from services.ingestion import get_document_store, get_ingestion_queue, resume_interrupted_documents
+from services.bulk_import import resume_imports, stop_imports
+from services.embedder import get_embedder
+from services.lexical import ensure_lexical_index_loaded
+from db.chroma import get_chunk_count, chroma_writer_stats, close_chroma_writer
+from core.startup import get_startup_profile
 
 settings = get_settings()
+startup = get_startup_profile()
+startup.record("imports", time.perf_counter() - _import_started)
+
+
+async def warm_up():
+    """Load the heavy components (vector DB, embedder, lexical index) off the request path."""
+    try:
+        with startup.phase("vector_store"):
+            await asyncio.to_thread(get_chunk_count)
+        with startup.phase("embedder"):
+            await asyncio.to_thread(get_embedder)
+        with startup.phase("embedding_cache"):
+            await asyncio.to_thread(get_embedding_cache)
+        with startup.phase("tokenizer"):
+            await asyncio.to_thread(get_encoding)
+            await asyncio.to_thread(get_chunker)
+        with startup.phase("graph_index"):
+            await asyncio.to_thread(get_graph_index)
+        with startup.phase("vault_stats"):
+            await asyncio.to_thread(get_vault_counters)
+        if settings.search_mode == "hybrid":
+            with startup.phase("lexical_index"):
+                await asyncio.to_thread(ensure_lexical_index_loaded)
+        startup.mark_ready()
+        print(f"⏱️  Warm-up complete: {startup.summary()}")
+    except Exception as e:
+        startup.error = str(e)
+        print(f"[Warm-up Error] {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup & shutdown events."""
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    os.makedirs(settings.chroma_persist_dir, exist_ok=True)
+    with startup.phase("lifespan"):
+        os.makedirs(settings.upload_dir, exist_ok=True)
+        os.makedirs(settings.chroma_persist_dir, exist_ok=True)
+        queue = get_ingestion_queue()
+        queue.start()
+        resumed = resume_interrupted_documents()
+        resumed_imports = resume_imports()
+    if settings.warmup_in_background:
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        await warm_up()
+        warmup_task = None
     print("🚀 AstraOS AI Vault API started")
     print(f"📁 Upload dir: {settings.upload_dir}")
     print(f"🧠 Vector DB: {settings.chroma_persist_dir}")
+    print(f"🗂️  Metadata DB: {settings.metadata_db_path} ({get_document_store().count()} documents)")
+    if resumed:
+        print(f"🔁 Re-queued {resumed} interrupted document(s)")
+    if resumed_imports:
+        print(f"🔁 Resumed {resumed_imports} bulk import(s)")
     print(f"🤖 Embedding: {settings.embedding_model}")
     print(f"💬 LLM: {settings.llm_model}")
     yield
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    await stop_imports()
+    await queue.stop()
+    await asyncio.to_thread(close_chroma_writer)
+    await cancel_insight_refreshes()
+    await close_llm_clients()
+    shutdown_extract_pool()
+    shutdown_retrieval_pool()
+    save_lexical_index()
+    close_embedding_cache()
+    close_metadata_store()
     print("✅ AstraOS API shutdown complete")
 
 
@@ -34,6 +115,18 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Refuse oversized uploads before the multipart body is parsed
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_file_size_mb * 1024 * 1024,
+    paths=("/vault/upload",),
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.bulk_import_max_archive_mb * 1024 * 1024,
+    paths=("/vault/imports",),
+)
+
 # CORS
 origins = [o.strip() for o in settings.allowed_origins.split(",")]
 app.add_middleware(
@@ -54,8 +147,10 @@ app.include_router(insights.router, prefix="/api")
 
 @app.get("/health")
 async def health_check():
+    """Liveness — the process is up. Readiness is reported separately."""
     return {
         "status": "ok",
+        "ready": startup.ready,
         "service": "AstraOS AI Vault",
         "version": "1.0.0",
         "embedding_model": settings.embedding_model,
@@ -63,6 +158,28 @@ async def health_check():
     }
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness — 200 once warm-up has loaded the heavy components, 503 before."""
+    report = startup.report()
+    return JSONResponse(status_code=200 if startup.ready else 503, content=report)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for the ingestion queue, caches, vector writes and LLM client pool."""
+    cache = get_embedding_cache()
+    answer_cache = get_answer_cache()
+    return {
+        "ingestion_queue": get_ingestion_queue().stats(),
+        "embedding_cache": cache.stats() if cache else None,
+        "embedding_batcher": get_embedding_batcher().stats(),
+        "chroma_writer": chroma_writer_stats(),
+        "llm": llm_metrics.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+    }
+
+
 @app.get("/")
 async def root():
     return {
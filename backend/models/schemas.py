@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -35,6 +35,14 @@ class DocumentUploadResponse(BaseModel):
     message: str
 
 
+class BatchDeleteRequest(BaseModel):
+    document_ids: List[str] = Field(min_length=1, max_length=10000)
+
+
+class DirectoryImportRequest(BaseModel):
+    path: str = Field(min_length=1)  # directory on the server, under BULK_IMPORT_ROOTS
+
+
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
     content: str
@@ -52,6 +60,7 @@ class SearchRequest(BaseModel):
     query: str
     document_ids: Optional[List[str]] = None
     top_k: int = Field(default=10, ge=1, le=50)
+    mode: Optional[Literal["hybrid", "vector"]] = None  # None = server default
 
 
 class SearchResult(BaseModel):
@@ -0,0 +1,151 @@
+"""
+Semantic answer cache for vault chat.
+A cached answer is reused when a new question retrieves the same chunks
+under the same document filter and history, and its embedding is close
+enough to the original question's. Entries expire after a TTL and are
+dropped as soon as a document they were drawn from is deleted or re-ingested.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from core.config import get_settings
+
+_cache = None
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _history_key(history: Optional[List[dict]]) -> str:
+    if not history:
+        return ""
+    payload = json.dumps([(m.get("role"), m.get("content")) for m in history], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """In-memory, TTL-bounded LRU of chat answers, looked up by embedding similarity."""
+
+    def __init__(self, max_entries: int, ttl_s: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_s
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._buckets: dict = {}       # (filter, chunk ids, history) -> entry ids
+        self._by_document: dict = {}   # document id -> entry ids
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _bucket_key(document_ids, chunk_ids, history) -> tuple:
+        return (
+            tuple(sorted(document_ids)) if document_ids else (),
+            tuple(chunk_ids),
+            _history_key(history),
+        )
+
+    def get(self, query_embedding, document_ids, chunk_ids, history) -> Optional[str]:
+        key = self._bucket_key(document_ids, chunk_ids, history)
+        query = _normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            best, best_score = None, self.threshold
+            for entry_id in list(self._buckets.get(key, ())):
+                entry = self._entries[entry_id]
+                if now - entry["created"] > self.ttl:
+                    self._drop(entry_id)
+                    continue
+                score = sum(x * y for x, y in zip(query, entry["embedding"]))
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best]["answer"]
+
+    def put(self, query_embedding, document_ids, chunk_ids, history, answer: str, source_ids: Iterable[str]):
+        if not answer:
+            return
+        key = self._bucket_key(document_ids, chunk_ids, history)
+        sources = set(source_ids) | set(document_ids or ())
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "key": key,
+                "embedding": _normalize(query_embedding),
+                "answer": answer,
+                "sources": sources,
+                "created": time.time(),
+            }
+            self._buckets.setdefault(key, []).append(entry_id)
+            for doc_id in sources:
+                self._by_document.setdefault(doc_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in document_ids:
+                for entry_id in list(self._by_document.get(doc_id, ())):
+                    self._drop(entry_id)
+                    self.invalidations += 1
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        bucket = self._buckets.get(entry["key"])
+        if bucket is not None:
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[entry["key"]]
+        for doc_id in entry["sources"]:
+            refs = self._by_document.get(doc_id)
+            if refs is not None:
+                refs.discard(entry_id)
+                if not refs:
+                    del self._by_document[doc_id]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Shared cache; None when disabled via ANSWER_CACHE_MAX_ENTRIES=0."""
+    global _cache
+    settings = get_settings()
+    if settings.answer_cache_max_entries <= 0:
+        return None
+    if _cache is None:
+        _cache = AnswerCache(
+            max_entries=settings.answer_cache_max_entries,
+            ttl_s=settings.answer_cache_ttl_s,
+            threshold=settings.answer_cache_similarity,
+        )
+    return _cache
+
+
+def invalidate_answers(document_ids: Iterable[str]):
+    """Forget cached answers drawn from these documents."""
+    if _cache is not None:
+        _cache.invalidate_documents(document_ids)
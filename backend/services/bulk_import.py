@@ -0,0 +1,323 @@
+"""
+Bulk imports from a ZIP archive or a server-side directory.
+The files found are recorded as a manifest in the metadata store, then
+copied into the upload dir and ingested a window at a time: small files
+share one batched extract → chunk → embed/store pass, larger ones go
+through the regular queue, and all of them end in the shared summarize
+stage. Progress is read off the manifest, and an import interrupted by a
+restart resumes from its first file not yet registered.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.config import get_settings
+from db.metadata import get_metadata_store
+from services.extraction import SUPPORTED_TYPES
+from services.ingestion import get_ingestion_queue, ingest_registered, register_documents
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 1 MB per read/write
+MAX_FAILURES_SHOWN = 20
+LINK_OUTSIDE_ROOT = "Links outside the imported directory are not followed."
+
+_runs: Dict[str, asyncio.Task] = {}
+
+
+class BulkImportError(Exception):
+    """Raised when an import cannot be started (unreadable archive, bad path)."""
+
+
+def archive_dir() -> str:
+    """Where uploaded archives are kept while their import runs."""
+    return os.path.join(get_settings().upload_dir, "imports")
+
+
+def _file_type(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower() if "." in os.path.basename(name) else ""
+
+
+def _hidden(parts: List[str]) -> bool:
+    # Dotfiles and VCS directories, and the resource forks macOS adds to archives
+    return any(part.startswith(".") or part == "__MACOSX" for part in parts if part)
+
+
+def _manifest_row(path: str, size: int) -> tuple:
+    """(path, size, status, error) for a file found by a scan."""
+    max_mb = get_settings().max_file_size_mb
+    if _file_type(path) not in SUPPORTED_TYPES:
+        return path, size, "skipped", "File type not supported."
+    if size > max_mb * 1024 * 1024:
+        return path, size, "skipped", f"File too large. Max size: {max_mb}MB"
+    return path, size, "pending", ""
+
+
+def _within(path: str, root: str) -> bool:
+    return os.path.commonpath([path, root]) == root
+
+
+def _resolve(root: str, relative_path: str) -> str:
+    """Real path of a file under an import directory; ValueError if a link leads outside it."""
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if not _within(path, root):
+        raise ValueError(LINK_OUTSIDE_ROOT)
+    return path
+
+
+def scan_directory(path: str) -> List[tuple]:
+    """Manifest rows for the files under `path` (a real path; relative paths, sorted).
+
+    Symlinks are followed only while they stay inside `path`.
+    """
+    rows = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not _hidden([d]))
+        for name in sorted(files):
+            if _hidden([name]):
+                continue
+            full_path = os.path.join(root, name)
+            relative_path = os.path.relpath(full_path, path).replace(os.sep, "/")
+            try:
+                size = os.path.getsize(_resolve(path, relative_path))
+            except ValueError as e:
+                rows.append((relative_path, 0, "skipped", str(e)))
+                continue
+            except OSError:
+                continue
+            rows.append(_manifest_row(relative_path, size))
+    return rows
+
+
+def scan_archive(path: str) -> List[tuple]:
+    """Manifest rows for the members of a ZIP archive, in archive order."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = archive.infolist()
+    except (zipfile.BadZipFile, OSError) as e:
+        raise BulkImportError(f"Not a readable ZIP archive: {e}")
+    return [
+        _manifest_row(info.filename, info.file_size)
+        for info in members
+        if not info.is_dir() and not _hidden(info.filename.split("/"))
+    ]
+
+
+def _copy(source, file_path: str, max_bytes: int) -> tuple:
+    """Stream `source` to `file_path`; returns (size, sha256)."""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(file_path, "wb") as f:
+        while chunk := source.read(COPY_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                # Sizes in a ZIP header are not to be trusted
+                raise ValueError(f"File too large. Max size: {max_bytes // (1024 * 1024)}MB")
+            hasher.update(chunk)
+            f.write(chunk)
+    return size, hasher.hexdigest()
+
+
+def _copy_window(record: dict, rows: List[dict]) -> List[dict]:
+    """Copy a window of manifest rows into the upload dir (runs in a thread).
+
+    Returns one dict per row: ingest_document's arguments plus "seq", or
+    {"seq", "error"} for a file that could not be read.
+    """
+    settings = get_settings()
+    max_bytes = settings.max_file_size_mb * 1024 * 1024
+    archive = zipfile.ZipFile(record["archive"]) if record["kind"] == "zip" else None
+    copied = []
+    try:
+        for row in rows:
+            file_type = _file_type(row["path"])
+            # Named after the import and row, so a resumed window overwrites its own copies
+            file_path = os.path.join(settings.upload_dir, f"import-{record['id']}-{row['seq']}.{file_type}")
+            try:
+                if archive is not None:
+                    source = archive.open(row["path"])
+                else:
+                    # Checked again here: the link may have changed since the scan
+                    source = open(_resolve(record["source"], row["path"]), "rb")
+                with source:
+                    size, content_hash = _copy(source, file_path, max_bytes)
+            except Exception as e:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                copied.append({"seq": row["seq"], "error": str(e)})
+                continue
+            copied.append({
+                "seq": row["seq"],
+                "file_path": file_path,
+                "original_name": row["path"],
+                "file_type": file_type,
+                "file_size": size,
+                "content_hash": content_hash,
+            })
+    finally:
+        if archive is not None:
+            archive.close()
+    return copied
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _cancelled(import_id: str) -> bool:
+    record = get_metadata_store().get_import(import_id)
+    return record is None or record["status"] != "running"
+
+
+async def run_import(import_id: str):
+    """Work through an import's pending files, then wait for its documents to finish."""
+    settings = get_settings()
+    store = get_metadata_store()
+    queue = get_ingestion_queue()
+    record = store.get_import(import_id)
+    try:
+        while not _cancelled(import_id):
+            # Leave room in the shared queue for interactive uploads
+            while queue.depth("extract") >= settings.bulk_import_max_queued:
+                await asyncio.sleep(settings.bulk_import_poll_s)
+            rows = store.pending_import_files(import_id, settings.bulk_import_window)
+            if not rows:
+                break
+            copied = await asyncio.to_thread(_copy_window, record, rows)
+            registered = register_documents([c for c in copied if "error" not in c])
+            # Recorded before processing starts: after a crash these files are
+            # picked up as interrupted documents, not copied again
+            store.set_import_files(
+                import_id,
+                [(c["seq"], "failed", "", c["error"]) for c in copied if "error" in c]
+                + [(d["seq"], "queued", d["doc_id"], "") for d in registered],
+            )
+            store.update_import(import_id, {"updated_at": _now()})
+            await ingest_registered([d for d in registered if not d["linked"]])
+
+        while not _cancelled(import_id) and store.import_progress(import_id)["processing"]:
+            await asyncio.sleep(settings.bulk_import_poll_s)
+        store.settle_import_files(import_id)
+        if not _cancelled(import_id):
+            store.update_import(import_id, {"status": "completed", "updated_at": _now()})
+    except Exception as e:
+        print(f"[Bulk Import Error] {import_id}: {e}")
+        store.update_import(import_id, {"status": "failed", "error": str(e), "updated_at": _now()})
+    _remove_archive(record)
+    print(f"[Bulk Import] {import_id} finished: {store.import_progress(import_id)}")
+
+
+def _remove_archive(record: dict):
+    # Only archives uploaded through the API; a CLI import reads the user's file in place
+    archive = record["archive"]
+    if archive and os.path.dirname(os.path.abspath(archive)) == os.path.abspath(archive_dir()):
+        try:
+            os.remove(archive)
+        except FileNotFoundError:
+            pass
+
+
+def _start(import_id: str):
+    task = asyncio.ensure_future(run_import(import_id))
+    _runs[import_id] = task
+    task.add_done_callback(lambda _: _runs.pop(import_id, None))
+
+
+def _create(kind: str, source: str, rows: List[tuple], archive: str = "") -> dict:
+    record = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "source": source,
+        "archive": archive,
+        "status": "running",
+        "total": len(rows),
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    get_metadata_store().create_import(record, rows)
+    _start(record["id"])
+    return get_import(record["id"])
+
+
+def _allowed_directory(path: str) -> bool:
+    roots = [os.path.realpath(r.strip()) for r in get_settings().bulk_import_roots.split(",") if r.strip()]
+    return any(_within(path, root) for root in roots)
+
+
+async def import_archive(archive_path: str, name: str) -> dict:
+    """Start importing the supported files in a ZIP archive."""
+    rows = await asyncio.to_thread(scan_archive, archive_path)
+    return _create("zip", name, rows, archive=archive_path)
+
+
+async def import_directory(path: str, check_roots: bool = True) -> dict:
+    """Start importing the supported files under a server directory.
+
+    Over the API the directory must lie under one of BULK_IMPORT_ROOTS;
+    the CLI passes check_roots=False.
+    """
+    path = os.path.realpath(path)
+    if not os.path.isdir(path):
+        raise BulkImportError(f"Not a directory: {path}")
+    if check_roots and not _allowed_directory(path):
+        raise PermissionError("Directory imports are only allowed under BULK_IMPORT_ROOTS.")
+    rows = await asyncio.to_thread(scan_directory, path)
+    return _create("directory", path, rows)
+
+
+def resume_imports(source: Optional[str] = None) -> int:
+    """Restart the imports a previous process left running (only those reading `source`, if given)."""
+    running = get_metadata_store().list_imports(status="running", limit=1000)
+    running = [r for r in running if source is None or r["source"] == source]
+    for record in running:
+        if record["id"] not in _runs:
+            _start(record["id"])
+    return len(running)
+
+
+async def wait_for_import(import_id: str):
+    task = _runs.get(import_id)
+    if task is not None:
+        await asyncio.shield(task)
+
+
+async def stop_imports():
+    """Cancel the running import tasks at shutdown; they resume on the next start."""
+    tasks = list(_runs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def cancel_import(import_id: str) -> Optional[dict]:
+    """Stop an import after its current window; documents already queued still finish."""
+    store = get_metadata_store()
+    record = store.get_import(import_id)
+    if record is None:
+        return None
+    if record["status"] == "running":
+        store.update_import(import_id, {"status": "cancelled", "updated_at": _now()})
+    return get_import(import_id)
+
+
+def _describe(record: dict) -> dict:
+    described = {k: v for k, v in record.items() if k != "archive"}
+    described["progress"] = get_metadata_store().import_progress(record["id"])
+    return described
+
+
+def get_import(import_id: str) -> Optional[dict]:
+    """An import with its progress counts and the first failed or skipped files."""
+    store = get_metadata_store()
+    record = store.get_import(import_id)
+    if record is None:
+        return None
+    described = _describe(record)
+    described["failures"] = store.import_failures(import_id, MAX_FAILURES_SHOWN)
+    return described
+
+
+def list_imports(limit: int = 50) -> List[dict]:
+    return [_describe(record) for record in get_metadata_store().list_imports(limit=limit)]
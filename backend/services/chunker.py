@@ -1,84 +1,198 @@
 """
 Text chunking strategy for document ingestion.
-Uses recursive character splitting with semantic boundaries.
+Splits a text stream into sentences (and paragraphs) in a single pass and
+packs them into overlapping chunks sized in model tokens. Only the pending
+sentence and the chunk being built are held in memory, so arbitrarily large
+inputs can be chunked from an iterator of text blocks, or fed page by page
+through a ChunkStream.
 """
-from typing import List
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
 import re
 
+from core.config import get_settings
+from services.tokens import get_tokenizer
+
+# Sentence ends and paragraph breaks; the matched whitespace is dropped
+_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n[ \t]*\n\s*')
+_SPACES = re.compile(r' {2,}')
+
+# Text without a boundary for this long is cut at whitespace anyway
+MAX_PENDING_CHARS = 64 * 1024
+
+_chunker = None
+
+
+def _clean(sentence: str) -> str:
+    return _SPACES.sub(" ", sentence.replace("\x00", "")).strip()
+
 
 class TextChunker:
     def __init__(
         self,
-        chunk_size: int = 512,
-        chunk_overlap: int = 64,
+        chunk_tokens: int = 128,
+        overlap_tokens: int = 16,
+        tokenizer: Optional[Callable[[str], int]] = None,
     ):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+        self.count = tokenizer or get_tokenizer()
 
     def chunk_text(self, text: str, metadata: dict = {}) -> List[dict]:
         """Split text into overlapping chunks with metadata."""
-        # Clean text
-        text = self._clean_text(text)
-        if not text.strip():
-            return []
-
-        # Split into sentences first for semantic coherence
-        sentences = self._split_into_sentences(text)
-        chunks = self._build_chunks(sentences)
-
-        return [
-            {
-                "content": chunk,
-                "metadata": {
-                    **metadata,
-                    "chunk_index": i,
-                    "char_count": len(chunk),
-                },
-            }
-            for i, chunk in enumerate(chunks)
-        ]
-
-    def _clean_text(self, text: str) -> str:
-        """Remove excessive whitespace and normalize."""
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = re.sub(r' {2,}', ' ', text)
-        text = re.sub(r'\x00', '', text)
-        return text.strip()
-
-    def _split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences."""
-        # Split on sentence boundaries
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        # Also split on paragraph breaks
-        result = []
-        for s in sentences:
-            if '\n\n' in s:
-                parts = s.split('\n\n')
-                result.extend([p.strip() for p in parts if p.strip()])
-            else:
-                if s.strip():
-                    result.append(s.strip())
-        return result
-
-    def _build_chunks(self, sentences: List[str]) -> List[str]:
-        """Build overlapping chunks from sentences."""
+        return list(self.iter_chunks([text], metadata))
+
+    def iter_chunks(self, blocks: Iterable[str], metadata: dict = {}) -> Iterator[dict]:
+        """Chunks of the concatenated `blocks`, yielded as soon as each is complete."""
+        stream = self.stream(metadata)
+        for block in blocks:
+            yield from stream.feed(block)
+        yield from stream.close()
+
+    def stream(self, metadata: dict = {}) -> "ChunkStream":
+        """Push-style chunking, for callers that receive text piece by piece."""
+        return ChunkStream(self, metadata)
+
+    def _pieces(self, sentence: str) -> Iterator[tuple]:
+        """The sentence with its token count, split by words if it exceeds a chunk."""
+        tokens = self.count(sentence)
+        if tokens <= self.chunk_tokens:
+            yield sentence, tokens
+            return
+        words, size = [], 0
+        for word, n in self._words(sentence):
+            if size + n > self.chunk_tokens and words:
+                yield " ".join(words), size
+                words, size = [], 0
+            words.append(word)
+            size += n
+        if words:
+            yield " ".join(words), size
+
+    def _words(self, sentence: str) -> Iterator[tuple]:
+        """(word, tokens) pairs; a single word longer than a chunk is cut by characters."""
+        for word in sentence.split():
+            n = self.count(word)
+            if n <= self.chunk_tokens:
+                yield word, n
+                continue
+            step = max(1, len(word) * self.chunk_tokens // n)
+            for i in range(0, len(word), step):
+                yield word[i:i + step], self.count(word[i:i + step])
+
+    def _overlap(self, pieces: deque) -> Optional[tuple]:
+        """The last words of a finished chunk, about `overlap_tokens` long."""
+        if self.overlap_tokens <= 0:
+            return None
+        words, size = [], 0
+        for text, _ in reversed(pieces):
+            for word in reversed(text.split()):
+                n = self.count(word)
+                if size + n > self.overlap_tokens and words:
+                    return " ".join(reversed(words)), size
+                words.append(word)
+                size += n
+        return " ".join(reversed(words)), size
+
+
+class ChunkStream:
+    """Incremental chunking state: feed text as it arrives and take the chunks
+    completed so far. Chunks are numbered in order across feeds."""
+
+    def __init__(self, chunker: TextChunker, metadata: dict):
+        self.chunker = chunker
+        self.metadata = metadata
+        self.chunk_count = 0
+        self._pending = ""  # text after the last sentence boundary
+        self._pending_page: Optional[int] = None
+        self._current = deque()  # (text, tokens) pieces of the chunk being built
+        self._total = 0
+        self._page: Optional[int] = None  # page the chunk's new text starts on
+
+    def feed(self, text: str, page_number: Optional[int] = None) -> List[dict]:
+        """Add text (from `page_number`, if known); returns the chunks it completed."""
         chunks = []
-        current_chunk = ""
-        overlap_buffer = ""
-
-        for sentence in sentences:
-            # If adding this sentence would exceed chunk_size, save current and start new
-            if len(current_chunk) + len(sentence) > self.chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
-                # Calculate overlap
-                words = current_chunk.split()
-                overlap_word_count = max(1, int(len(words) * (self.chunk_overlap / self.chunk_size)))
-                overlap_buffer = " ".join(words[-overlap_word_count:])
-                current_chunk = overlap_buffer + " " + sentence
-            else:
-                current_chunk += (" " if current_chunk else "") + sentence
-
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        for sentence, page in self._sentences(text, page_number):
+            self._pack(sentence, page, chunks)
+        return chunks
 
+    def close(self) -> List[dict]:
+        """Flush the remaining text as the final chunks."""
+        chunks = []
+        sentence = _clean(self._pending)
+        if sentence:
+            self._pack(sentence, self._pending_page, chunks)
+        self._pending = ""
+        if self._current:
+            self._emit(chunks)
+            self._current.clear()
+            self._total = 0
         return chunks
+
+    def _sentences(self, text: str, page: Optional[int]) -> Iterator[tuple]:
+        """(sentence, page it starts on), carrying the unfinished tail across feeds."""
+        if not text:
+            return
+        carried = len(self._pending)  # offsets below this came from earlier feeds
+        if not self._pending.strip():
+            self._pending_page = page
+        buffer = self._pending + text
+        start = 0
+        for match in _BOUNDARY.finditer(buffer):
+            sentence = _clean(buffer[start:match.start()])
+            if sentence:
+                yield sentence, self._pending_page if start < carried else page
+            start = match.end()
+        while len(buffer) - start > MAX_PENDING_CHARS:
+            cut = buffer.rfind(" ", start, start + MAX_PENDING_CHARS)
+            cut = cut if cut > start else start + MAX_PENDING_CHARS
+            sentence = _clean(buffer[start:cut])
+            if sentence:
+                yield sentence, self._pending_page if start < carried else page
+            start = cut
+        if start >= carried:
+            self._pending_page = page
+        self._pending = buffer[start:]
+
+    def _pack(self, sentence: str, page: Optional[int], chunks: List[dict]):
+        limit = self.chunker.chunk_tokens
+        for piece, tokens in self.chunker._pieces(sentence):
+            if self._total + tokens > limit and self._current:
+                self._emit(chunks)
+                overlap = self.chunker._overlap(self._current)
+                self._current.clear()
+                self._total = 0
+                self._page = None
+                if overlap and overlap[1] + tokens <= limit:
+                    self._current.append(overlap)
+                    self._total = overlap[1]
+            if self._page is None:
+                self._page = page
+            self._current.append((piece, tokens))
+            self._total += tokens
+
+    def _emit(self, chunks: List[dict]):
+        content = " ".join(text for text, _ in self._current)
+        metadata = {
+            **self.metadata,
+            "chunk_index": self.chunk_count,
+            "char_count": len(content),
+            "token_count": self._total,
+        }
+        if self._page is not None:
+            metadata["page_number"] = self._page
+        chunks.append({"content": content, "metadata": metadata})
+        self.chunk_count += 1
+
+
+def get_chunker() -> TextChunker:
+    """Chunker configured from settings (sizes in tokens of CHUNK_TOKENIZER)."""
+    global _chunker
+    if _chunker is None:
+        settings = get_settings()
+        _chunker = TextChunker(
+            chunk_tokens=settings.chunk_tokens,
+            overlap_tokens=settings.chunk_overlap_tokens,
+            tokenizer=get_tokenizer(settings.chunk_tokenizer),
+        )
+    return _chunker
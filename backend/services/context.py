@@ -0,0 +1,93 @@
+"""
+Token-budgeted prompt assembly for RAG chat.
+Retrieved chunks are added best-score-first until the context budget is
+spent; the overlap between neighbouring chunks of the same document is
+included once, and conversation history is kept newest-first by tokens.
+"""
+from typing import List, Optional, Tuple
+
+from services.tokens import count_tokens, truncate_to_tokens
+
+SEPARATOR = "\n\n---\n\n"
+MIN_PARTIAL_TOKENS = 48  # don't bother adding a chunk cut shorter than this
+
+
+def _overlap_words(head: List[str], tail: List[str]) -> int:
+    """Number of words at the end of `head` repeated at the start of `tail`."""
+    for k in range(min(len(head), len(tail)) // 2, 0, -1):
+        if head[-k:] == tail[:k]:
+            return k
+    return 0
+
+
+def build_context(chunks: List[dict], budget_tokens: int) -> Tuple[str, List[dict]]:
+    """Fill `budget_tokens` with the highest-scoring chunks.
+
+    Returns the context text and the chunks it draws on, best first.
+    """
+    selected = {}  # (document_id, chunk_index) -> text included for that chunk
+    used, remaining = [], budget_tokens
+    for chunk in sorted(chunks, key=lambda c: c["score"], reverse=True):
+        doc_id, index = chunk["document_id"], chunk.get("chunk_index") or 0
+        if (doc_id, index) in selected:
+            continue
+        words = chunk["content"].split()
+        before, after = selected.get((doc_id, index - 1)), selected.get((doc_id, index + 1))
+        # Neighbours share the chunker's overlap words; keep them only once
+        if before is not None:
+            words = words[_overlap_words(before.split(), words):]
+        if after is not None:
+            cut = _overlap_words(words, after.split())
+            words = words[:len(words) - cut]
+        text = " ".join(words)
+        if not text:
+            continue
+
+        # A chunk that starts a new block also pays for its header and separator
+        overhead = 0
+        if before is None and after is None:
+            overhead = count_tokens(f"[{chunk['document_name']}]\n") + count_tokens(SEPARATOR)
+        cost = count_tokens(text) + overhead
+        if cost > remaining:
+            room = remaining - overhead
+            if room < MIN_PARTIAL_TOKENS:
+                break
+            text = truncate_to_tokens(text, room) + " …"
+            cost = remaining
+        selected[(doc_id, index)] = text
+        used.append(chunk)
+        remaining -= cost
+        if remaining <= 0:
+            break
+
+    # Render contiguous runs of each document as one block, best run first
+    names = {c["document_id"]: c["document_name"] for c in used}
+    rank = {(c["document_id"], c.get("chunk_index") or 0): i for i, c in enumerate(used)}
+    blocks = []
+    for doc_id, index in sorted(selected):
+        if blocks and blocks[-1]["doc"] == doc_id and blocks[-1]["last"] == index - 1:
+            block = blocks[-1]
+        else:
+            block = {"doc": doc_id, "parts": [], "rank": len(used)}
+            blocks.append(block)
+        block["parts"].append(selected[(doc_id, index)])
+        block["last"] = index
+        block["rank"] = min(block["rank"], rank[(doc_id, index)])
+    blocks.sort(key=lambda b: b["rank"])
+    context = SEPARATOR.join(f"[{names[b['doc']]}]\n" + " ".join(b["parts"]) for b in blocks)
+    return context, used
+
+
+def trim_history(history: Optional[List[dict]], budget_tokens: int) -> List[dict]:
+    """Most recent user/assistant messages that fit in `budget_tokens`, oldest first."""
+    kept, remaining = [], budget_tokens
+    for msg in reversed(history or []):
+        if msg.get("role") not in ("user", "assistant"):
+            continue
+        cost = count_tokens(msg.get("content") or "") + 4  # role and message framing
+        if cost > remaining:
+            break
+        kept.append(msg)
+        remaining -= cost
+    kept.reverse()
+    return kept
@@ -0,0 +1,143 @@
+"""
+Cross-request micro-batching for embeddings.
+Texts from concurrent ingestions and search queries are collected for a
+short window, embedded in as few backend calls as the batch-size and
+token limits allow, and the vectors are scattered back to each caller.
+"""
+import asyncio
+from typing import List, Optional
+
+from core.config import get_settings
+from services.embedder import embed_texts
+
+_batcher = None
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; only used to bound request size
+    return len(text) // 4 + 1
+
+
+class _Request:
+    def __init__(self, texts: List[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+        self.results: List[Optional[List[float]]] = [None] * len(texts)
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    def __init__(self, window_ms: float, max_batch: int, max_batch_tokens: int):
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self._pending: List[_Request] = []
+        self._pending_texts = 0
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()  # in-flight batches, referenced so they are not collected
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        request = _Request(list(texts), loop.create_future())
+        self._pending.append(request)
+        self.requests += 1
+        self._pending_texts += len(texts)
+        self._pending_tokens += sum(_estimate_tokens(t) for t in texts)
+
+        if self._pending_texts >= self.max_batch or self._pending_tokens >= self.max_batch_tokens:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await request.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        self._pending_texts = 0
+        self._pending_tokens = 0
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _plan_batches(self, pending: List[_Request]) -> List[list]:
+        """Split (request, index, text) items into batches within size and token limits."""
+        batches, current, tokens = [], [], 0
+        for request in pending:
+            for i, text in enumerate(request.texts):
+                cost = _estimate_tokens(text)
+                if current and (len(current) >= self.max_batch or tokens + cost > self.max_batch_tokens):
+                    batches.append(current)
+                    current, tokens = [], 0
+                current.append((request, i, text))
+                tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _run(self, pending: List[_Request]):
+        loop = asyncio.get_running_loop()
+        batches = self._plan_batches(pending)
+        outcomes = await asyncio.gather(
+            *(loop.run_in_executor(None, embed_texts, [text for _, _, text in batch]) for batch in batches),
+            return_exceptions=True,
+        )
+        for batch, outcome in zip(batches, outcomes):
+            self.batches += 1
+            self.texts += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for position, (request, i, _) in enumerate(batch):
+                if isinstance(outcome, BaseException):
+                    request.error = outcome
+                else:
+                    request.results[i] = outcome[position]
+        for request in pending:
+            if request.future.done():
+                continue
+            if request.error is not None:
+                request.future.set_exception(request.error)
+            else:
+                request.future.set_result(request.results)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending_texts": self._pending_texts,
+        }
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        _batcher = EmbeddingBatcher(
+            window_ms=settings.embed_batch_window_ms,
+            max_batch=settings.embed_max_batch,
+            max_batch_tokens=settings.embed_max_batch_tokens,
+        )
+    return _batcher
+
+
+async def aembed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts through the shared batcher."""
+    return await get_embedding_batcher().embed(texts)
+
+
+async def aembed_query(query: str) -> List[float]:
+    """Embed a search query through the shared batcher."""
+    # Both backends embed queries exactly like documents, so queries can share batches
+    vectors = await get_embedding_batcher().embed([query])
+    return vectors[0]
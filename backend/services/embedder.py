@@ -1,45 +1,92 @@
 """
 Embedding generation — supports OpenAI (fast) or local HuggingFace fallback.
-Embedder is initialized eagerly at import time to eliminate cold-start latency.
+The embedder is created on first use (or by the startup warm-up), so
+importing this module never pulls in langchain, torch or sentence-transformers.
+Both entry points sit behind the persistent embedding cache, so repeated
+texts and queries cost no API calls or CPU time.
 """
+import threading
 from typing import List
 from core.config import get_settings
+from services.embedding_cache import get_embedding_cache
 
 settings = get_settings()
 _embedder = None
+_init_lock = threading.Lock()
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _uses_openai() -> bool:
+    return bool(settings.openai_api_key) and settings.embedding_model == "openai"
+
+
+_model_id = f"openai:{OPENAI_EMBEDDING_MODEL}" if _uses_openai() else f"local:{LOCAL_EMBEDDING_MODEL}"
 
 
 def _init_embedder():
     global _embedder
-    if settings.openai_api_key and settings.embedding_model == "openai":
+    if _uses_openai():
         from langchain_openai import OpenAIEmbeddings
         _embedder = OpenAIEmbeddings(
-            model="text-embedding-3-small",
+            model=OPENAI_EMBEDDING_MODEL,
             openai_api_key=settings.openai_api_key,
         )
     else:
         # Only import sentence-transformers if actually needed
         from langchain_community.embeddings import HuggingFaceEmbeddings
         _embedder = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            model_name=LOCAL_EMBEDDING_MODEL,
             model_kwargs={"device": "cpu"},
             encode_kwargs={"normalize_embeddings": True},
         )
 
 
-# Initialize immediately — eliminates cold-start on first request
-_init_embedder()
-
-
 def get_embedder():
+    """The embedding backend, loaded on first call (thread-safe)."""
+    if _embedder is None:
+        with _init_lock:
+            if _embedder is None:
+                _init_embedder()
     return _embedder
 
 
+def is_embedder_loaded() -> bool:
+    return _embedder is not None
+
+
+def get_model_id() -> str:
+    return _model_id
+
+
 def embed_texts(texts: List[str]) -> List[List[float]]:
-    """Generate embeddings for a batch of texts."""
-    return _embedder.embed_documents(texts)
+    """Generate embeddings for a batch of texts, computing only cache misses."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return get_embedder().embed_documents(texts)
+
+    cached = cache.get_many(_model_id, texts)
+    missing = list(dict.fromkeys(t for i, t in enumerate(texts) if i not in cached))
+    if missing:
+        vectors = get_embedder().embed_documents(missing)
+        cache.put_many(_model_id, missing, vectors)
+        computed = dict(zip(missing, vectors))
+    else:
+        computed = {}
+    return [cached[i] if i in cached else computed[t] for i, t in enumerate(texts)]
 
 
 def embed_query(query: str) -> List[float]:
     """Generate embedding for a single query string."""
-    return _embedder.embed_query(query)
+    # Both backends embed queries exactly like documents, so they share cache entries
+    cache = get_embedding_cache()
+    if cache is None:
+        return get_embedder().embed_query(query)
+
+    cached = cache.get_many(_model_id, [query])
+    if cached:
+        return cached[0]
+    vector = get_embedder().embed_query(query)
+    cache.put_many(_model_id, [query], [vector])
+    return vector
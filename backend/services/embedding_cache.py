@@ -0,0 +1,177 @@
+"""
+Persistent embedding cache — SQLite on disk, keyed by model id + text hash.
+Vectors are stored as packed float16 (or float32) blobs and evicted
+least-recently-used once the cache grows past its size budget.
+"""
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from core.config import get_settings
+
+_cache = None
+
+_FORMATS = {"float16": "e", "float32": "f"}
+
+
+def _key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float], code: str) -> bytes:
+    if code == "f":
+        return array("f", vector).tobytes()
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def _unpack(blob: bytes, code: str) -> List[float]:
+    if code == "f":
+        return array("f", blob).tolist()
+    return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+
+
+class EmbeddingCache:
+    """Thread-safe, size-bounded LRU cache of embedding vectors."""
+
+    def __init__(self, path: str, max_bytes: int, dtype: str = "float16"):
+        self.max_bytes = max_bytes
+        self.code = _FORMATS.get(dtype, "e")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dtype TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self.entries, self.bytes = row
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, model_id: str, texts: List[str]) -> Dict[int, List[float]]:
+        """Look up texts; returns {index: vector} for the ones that were cached."""
+        keys = [_key(model_id, t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, code, blob in rows:
+                    found[key] = _unpack(blob, code)
+            if found:
+                # One transaction: in autocommit mode every touched row would be its own commit
+                now = time.time()
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            result = {i: found[k] for i, k in enumerate(keys) if k in found}
+            self.hits += len(result)
+            self.misses += len(texts) - len(result)
+        return result
+
+    def put_many(self, model_id: str, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            rows[_key(model_id, text)] = _pack(vector, self.code)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for key, blob in rows.items():
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO embeddings (key, dtype, vector, last_used) VALUES (?, ?, ?, ?)",
+                        (key, self.code, blob, now),
+                    )
+                    if cur.rowcount:
+                        self.entries += 1
+                        self.bytes += len(blob)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used vectors until the cache is at 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        while self.bytes > target and self.entries:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self.bytes -= size
+                self.entries -= 1
+                if self.bytes <= target:
+                    break
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            self._conn.execute("COMMIT")
+            self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self.entries,
+                "size_mb": round(self.bytes / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Open the cache on first use; None when disabled via EMBEDDING_CACHE_MAX_MB=0."""
+    global _cache
+    settings = get_settings()
+    if settings.embedding_cache_max_mb <= 0:
+        return None
+    if _cache is None:
+        _cache = EmbeddingCache(
+            settings.embedding_cache_path,
+            max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+            dtype=settings.embedding_cache_dtype,
+        )
+    return _cache
+
+
+def close_embedding_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
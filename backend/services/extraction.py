@@ -0,0 +1,168 @@
+"""
+Text extraction for PDF/DOCX/TXT/MD, run in a process pool.
+Large PDFs are split into page ranges extracted in parallel across cores,
+so parsing never blocks the event loop; very large ones can be read as a
+stream of page windows. This module deliberately imports nothing heavy:
+pool workers import it to unpickle the task functions.
+"""
+import asyncio
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple
+
+from core.config import get_settings
+
+# File extensions the vault can ingest
+SUPPORTED_TYPES = ("pdf", "docx", "doc", "txt", "md", "markdown")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        workers = get_settings().extract_processes or os.cpu_count() or 1
+        # spawn, not fork: the server process runs threads (Chroma, executors)
+        # that must not be duplicated into the workers mid-lock.
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_extract_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def extract_text(file_path: str, file_type: str) -> tuple[str, int]:
+    """Extract text from various document types."""
+    file_type = file_type.lower()
+
+    if file_type == "pdf":
+        return _extract_pdf(file_path)
+    elif file_type in ["docx", "doc"]:
+        return _extract_docx(file_path)
+    elif file_type in ["txt", "md", "markdown"]:
+        return _extract_text_file(file_path)
+    else:
+        return _extract_text_file(file_path)
+
+
+async def extract_text_async(file_path: str, file_type: str) -> tuple[str, int]:
+    """
+    Extract text off the event loop. PDFs longer than `pdf_pages_per_task`
+    pages are fanned out as page ranges across the process pool.
+    """
+    pages = await extract_pages_async(file_path, file_type)
+    return "\n\n".join(pages), len(pages)
+
+
+async def extract_pages_async(file_path: str, file_type: str, page_count: Optional[int] = None) -> List[str]:
+    """Text of each page of a PDF; other formats come back as a single page."""
+    loop = asyncio.get_running_loop()
+    pool = get_extract_pool()
+    try:
+        if file_type.lower() == "pdf":
+            if page_count is None:
+                page_count = await count_pages_async(file_path, file_type)
+            ranges = _page_ranges(page_count, get_settings().pdf_pages_per_task)
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(pool, _extract_pdf_pages, file_path, start, end)
+                for start, end in ranges
+            ))
+            return [page for part in parts for page in part]
+        text, _ = await loop.run_in_executor(pool, extract_text, file_path, file_type)
+        return [text]
+    except BrokenProcessPool:
+        # A worker crashed (e.g. on a malformed file) — start a fresh pool for the retry
+        shutdown_extract_pool()
+        raise
+
+
+async def count_pages_async(file_path: str, file_type: str) -> int:
+    if file_type.lower() != "pdf":
+        return 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_extract_pool(), _pdf_page_count, file_path)
+    except BrokenProcessPool:
+        shutdown_extract_pool()
+        raise
+
+
+async def iter_page_windows(
+    file_path: str, page_count: int, window: int, prefetch: int = 2,
+) -> AsyncIterator[Tuple[int, List[str]]]:
+    """(first page number, page texts) for consecutive windows of a PDF, in order.
+
+    At most `prefetch` windows are extracted ahead of the consumer, so memory
+    stays bounded however long the document is.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_extract_pool()
+    ranges = deque(_page_ranges(page_count, window))
+    in_flight = deque()
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < max(1, prefetch):
+                start, end = ranges.popleft()
+                in_flight.append((start, loop.run_in_executor(pool, _extract_pdf_pages, file_path, start, end)))
+            start, future = in_flight.popleft()
+            yield start + 1, await future
+    except BrokenProcessPool:
+        shutdown_extract_pool()
+        raise
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+def _page_ranges(page_count: int, span: int) -> List[Tuple[int, int]]:
+    span = max(1, span)
+    return [(start, min(start + span, page_count)) for start in range(0, page_count, span)]
+
+
+def _pdf_page_count(file_path: str) -> int:
+    import fitz  # pymupdf
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) of a PDF, one string per page."""
+    import fitz  # pymupdf
+    with fitz.open(file_path) as doc:
+        return [doc[i].get_text("text") for i in range(start, end)]
+
+
+def _extract_pdf(file_path: str) -> tuple[str, int]:
+    """Extract text from PDF using PyMuPDF."""
+    import fitz  # pymupdf
+    texts = []
+    page_count = 0
+    with fitz.open(file_path) as doc:
+        page_count = len(doc)
+        for page in doc:
+            texts.append(page.get_text("text"))
+    return "\n\n".join(texts), page_count
+
+
+def _extract_docx(file_path: str) -> tuple[str, int]:
+    """Extract text from DOCX."""
+    from docx import Document
+    doc = Document(file_path)
+    text = "\n".join([para.text for para in doc.paragraphs if para.text])
+    return text, 1
+
+
+def _extract_text_file(file_path: str) -> tuple[str, int]:
+    """Extract text from TXT/MD files."""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    return text, 1
@@ -1,89 +1,354 @@
 """
-Knowledge graph service — builds graph data from document relationships.
+Knowledge graph service — an in-memory index of document relationships.
+Documents, concepts and tags are deduplicated node maps; documents sharing
+concepts get one aggregated, weighted edge per pair. The index is built once
+from the ready documents and then updated as documents become ready or are
+removed, so reads only cost the size of the graph returned.
 """
-from typing import List
-from services.ingestion import list_documents
+import bisect
 import hashlib
+import heapq
+import threading
+from collections import deque
+from typing import List, Optional
+
+from db.metadata import get_metadata_store
+from models.schemas import DocumentStatus
+
+_index = None
+
+# Concepts shared by more documents than this are hubs: they stay linked
+# through their concept node, but add no document–document edges
+SHARED_CONCEPT_MAX_DOCS = 50
+
+NODE_TYPES = ("document", "concept", "tag")
+_TYPE_ORDER = {t: i for i, t in enumerate(NODE_TYPES)}
+
+
+def _term_id(kind: str, value: str) -> str:
+    return f"{kind}_" + hashlib.md5(value.lower().encode()).hexdigest()[:8]
+
+
+def _document_node(doc: dict) -> dict:
+    return {
+        "id": doc["id"],
+        "label": _truncate(doc["original_name"], 30),
+        "type": "document",
+        "size": 18,
+        "color": "#7C3AED",
+        "metadata": {
+            "summary": doc.get("summary", ""),
+            "word_count": doc.get("word_count", 0),
+            "tags": doc.get("tags", []),
+        },
+    }
+
+
+def _term_node(term_id: str, kind: str, value: str) -> dict:
+    if kind == "concept":
+        return {"id": term_id, "label": value, "type": "concept", "size": 10, "color": "#06B6D4", "metadata": {}}
+    return {"id": term_id, "label": f"#{value}", "type": "tag", "size": 8, "color": "#F59E0B", "metadata": {}}
+
+
+class GraphIndex:
+    """Adjacency-based knowledge graph, kept current one document at a time."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}    # doc id -> {"node", "terms": [term ids]}
+        self._terms = {}   # term id -> {"node", "kind", "docs": {doc id: None}}
+        self._shared = {}  # doc id -> {other doc id -> {concept id: None}}
+        self._order = None  # sorted [type order, node id] keys, rebuilt after changes
+        self.loaded = False
+
+    def load(self, documents):
+        with self._lock:
+            self._docs, self._terms, self._shared = {}, {}, {}
+            self._order = None
+            for doc in documents:
+                self.add_document(doc)
+            self.loaded = True
+
+    def add_document(self, doc: dict):
+        with self._lock:
+            self.remove_document(doc["id"])
+            self._order = None
+            doc_id = doc["id"]
+            terms = {}
+            for kind, values in (("concept", doc.get("key_concepts", [])), ("tag", doc.get("tags", []))):
+                for value in values:
+                    if value:
+                        terms.setdefault(_term_id(kind, value), (kind, value))
+            self._docs[doc_id] = {"node": _document_node(doc), "terms": list(terms)}
+
+            for term_id, (kind, value) in terms.items():
+                term = self._terms.get(term_id)
+                if term is None:
+                    term = self._terms[term_id] = {
+                        "node": _term_node(term_id, kind, value), "kind": kind, "docs": {},
+                    }
+                docs = term["docs"]
+                if kind == "concept":
+                    if len(docs) < SHARED_CONCEPT_MAX_DOCS:
+                        for other in docs:
+                            self._link(doc_id, other, term_id)
+                    elif len(docs) == SHARED_CONCEPT_MAX_DOCS:
+                        # The concept just became a hub: drop its pair edges
+                        self._relink_concept(term_id, link=False)
+                docs[doc_id] = None
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            entry = self._docs.pop(doc_id, None)
+            if entry is None:
+                return
+            self._order = None
+            for other in self._shared.pop(doc_id, {}):
+                shared = self._shared.get(other)
+                if shared is not None:
+                    shared.pop(doc_id, None)
+                    if not shared:
+                        del self._shared[other]
+            for term_id in entry["terms"]:
+                term = self._terms[term_id]
+                del term["docs"][doc_id]
+                if not term["docs"]:
+                    del self._terms[term_id]
+                elif term["kind"] == "concept" and len(term["docs"]) == SHARED_CONCEPT_MAX_DOCS:
+                    # No longer a hub: its documents are linked through it again
+                    self._relink_concept(term_id, link=True)
+
+    def _link(self, a: str, b: str, concept_id: str):
+        self._shared.setdefault(a, {}).setdefault(b, {})[concept_id] = None
+        self._shared.setdefault(b, {}).setdefault(a, {})[concept_id] = None
+
+    def _unlink(self, a: str, b: str, concept_id: str):
+        for x, y in ((a, b), (b, a)):
+            shared = self._shared.get(x, {})
+            concepts = shared.get(y)
+            if concepts is not None:
+                concepts.pop(concept_id, None)
+                if not concepts:
+                    del shared[y]
+                    if not shared:
+                        del self._shared[x]
+
+    def _relink_concept(self, concept_id: str, link: bool):
+        docs = list(self._terms[concept_id]["docs"])
+        for i, a in enumerate(docs):
+            for b in docs[i + 1:]:
+                if link:
+                    self._link(a, b, concept_id)
+                else:
+                    self._unlink(a, b, concept_id)
+
+    def _term_edge(self, doc_id: str, term_id: str) -> dict:
+        if self._terms[term_id]["kind"] == "concept":
+            return {"source": doc_id, "target": term_id, "weight": 0.8, "label": "contains"}
+        return {"source": doc_id, "target": term_id, "weight": 0.5, "label": "tagged"}
+
+    def _shared_edge(self, a: str, b: str, concepts) -> dict:
+        # Sorted: the label must not depend on the order the documents arrived in
+        labels = sorted(self._terms[c]["node"]["label"] for c in concepts)
+        label = ", ".join(labels[:3]) + (f" +{len(labels) - 3}" if len(labels) > 3 else "")
+        return {
+            "source": a,
+            "target": b,
+            "weight": round(min(1.0, 0.3 * len(labels)), 2),
+            "label": f"shares: {label}",
+            "shared": len(labels),
+        }
+
+    def snapshot(self) -> dict:
+        """Every node and edge."""
+        with self._lock:
+            nodes = [entry["node"] for entry in self._docs.values()]
+            nodes.extend(term["node"] for term in self._terms.values())
+            edges = []
+            for doc_id, entry in self._docs.items():
+                edges.extend(self._term_edge(doc_id, term_id) for term_id in entry["terms"])
+            for a, neighbours in self._shared.items():
+                for b, concepts in neighbours.items():
+                    if a < b:
+                        edges.append(self._shared_edge(a, b, concepts))
+            return {"nodes": nodes, "edges": edges}
+
+    # -- adjacency queries -------------------------------------------------
+
+    def _node(self, node_id: str) -> Optional[dict]:
+        entry = self._docs.get(node_id) or self._terms.get(node_id)
+        return entry["node"] if entry else None
+
+    def _neighbors(self, node_id: str):
+        entry = self._docs.get(node_id)
+        if entry is not None:
+            yield from entry["terms"]
+            yield from self._shared.get(node_id, ())
+        else:
+            yield from self._terms[node_id]["docs"]
+
+    def _degree(self, node_id: str) -> int:
+        entry = self._docs.get(node_id)
+        if entry is not None:
+            return len(entry["terms"]) + len(self._shared.get(node_id, ()))
+        return len(self._terms[node_id]["docs"])
+
+    def _edge(self, a: str, b: str) -> dict:
+        """The edge between two adjacent nodes."""
+        if a in self._docs and b in self._docs:
+            a, b = min(a, b), max(a, b)
+            return self._shared_edge(a, b, self._shared[a][b])
+        doc_id, term_id = (a, b) if a in self._docs else (b, a)
+        return self._term_edge(doc_id, term_id)
+
+    def _with_degree(self, node_id: str) -> dict:
+        return {**self._node(node_id), "degree": self._degree(node_id)}
+
+    def _induced(self, node_ids) -> dict:
+        """Nodes plus every edge between two of them."""
+        node_ids = list(node_ids)
+        included = set(node_ids)
+        edges = []
+        for node_id in node_ids:
+            for other in self._neighbors(node_id):
+                # Each edge once: from its lexicographically larger endpoint
+                if other in included and other < node_id:
+                    edges.append(self._edge(node_id, other))
+        return {"nodes": [self._with_degree(n) for n in node_ids], "edges": edges}
+
+    def neighborhood(self, node_id: str, depth: int = 1, limit: int = 500) -> Optional[dict]:
+        """Nodes within `depth` hops of `node_id` (at most `limit`, nearest first)."""
+        with self._lock:
+            if self._node(node_id) is None:
+                return None
+            hops = {node_id: 0}
+            frontier = deque([node_id])
+            while frontier and len(hops) < limit:
+                current = frontier.popleft()
+                if hops[current] >= depth:
+                    continue
+                for other in self._neighbors(current):
+                    if other not in hops:
+                        hops[other] = hops[current] + 1
+                        frontier.append(other)
+                        if len(hops) >= limit:
+                            break
+            return self._induced(hops)
+
+    def top_nodes(self, n: int = 50, node_type: Optional[str] = None) -> dict:
+        """The `n` best-connected nodes, optionally of one type."""
+        with self._lock:
+            candidates = []
+            if node_type in (None, "document"):
+                candidates.append(self._docs)
+            if node_type != "document":
+                candidates.append(
+                    self._terms if node_type is None
+                    else {t: e for t, e in self._terms.items() if e["kind"] == node_type}
+                )
+            ids = (node_id for group in candidates for node_id in group)
+            return self._induced(heapq.nlargest(n, ids, key=self._degree))
+
+    def _sort_keys(self) -> List[list]:
+        if self._order is None:
+            keys = [[0, doc_id] for doc_id in self._docs]
+            keys.extend([_TYPE_ORDER[e["kind"]], t] for t, e in self._terms.items())
+            keys.sort()
+            self._order = keys
+        return self._order
+
+    def _matches(self, node_id: str, node_type: Optional[str], tag_id: Optional[str]) -> bool:
+        entry = self._docs.get(node_id)
+        kind = "document" if entry is not None else self._terms[node_id]["kind"]
+        if node_type and kind != node_type:
+            return False
+        if tag_id is None:
+            return True
+        if entry is not None:
+            return tag_id in entry["terms"]
+        # Concept and tag nodes qualify through any tagged document
+        return node_id == tag_id or any(tag_id in self._docs[d]["terms"] for d in self._terms[node_id]["docs"])
+
+    def page(
+        self,
+        node_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        after: Optional[list] = None,
+        limit: int = 200,
+    ) -> dict:
+        """One page of nodes in (type, id) order, with each edge between
+        matching nodes returned on the page of its later endpoint."""
+        tag_id = _term_id("tag", tag) if tag else None
+        with self._lock:
+            keys = self._sort_keys()
+            start = bisect.bisect_right(keys, list(after)) if after else 0
+            rank = {}
+            nodes, edges, last = [], [], None
+            for key in keys[start:]:
+                node_id = key[1]
+                if not self._matches(node_id, node_type, tag_id):
+                    continue
+                if len(nodes) == limit:
+                    break
+                nodes.append(self._with_degree(node_id))
+                rank[node_id] = key
+                last = key
+                for other in self._neighbors(node_id):
+                    other_key = rank.get(other)
+                    if other_key is None:
+                        other_key = [_TYPE_ORDER[self._kind(other)], other]
+                        if other_key >= key or not self._matches(other, node_type, tag_id):
+                            continue
+                    edges.append(self._edge(node_id, other))
+            else:
+                last = None  # ran out of nodes: this is the final page
+            return {"nodes": nodes, "edges": edges, "next": last}
+
+    def _kind(self, node_id: str) -> str:
+        return "document" if node_id in self._docs else self._terms[node_id]["kind"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "terms": len(self._terms),
+                "shared_edges": sum(len(n) for n in self._shared.values()) // 2,
+            }
+
+
+def get_graph_index() -> GraphIndex:
+    """Shared index, built from the ready documents on first use."""
+    global _index
+    if _index is None:
+        _index = GraphIndex()
+    if not _index.loaded:
+        with _index._lock:
+            if not _index.loaded:
+                _index.load(get_metadata_store().list(status=DocumentStatus.READY))
+    return _index
+
+
+def update_graph(doc: dict):
+    # Until the index is built the metadata store is the source of truth and
+    # the build will pick this document up; the lock orders us after a running build.
+    if _index is None:
+        return
+    with _index._lock:
+        if _index.loaded:
+            _index.add_document(doc)
+
+
+def remove_from_graph(doc_id: str):
+    if _index is None:
+        return
+    with _index._lock:
+        if _index.loaded:
+            _index.remove_document(doc_id)
 
 
 def build_knowledge_graph() -> dict:
     """Build graph nodes and edges from vault documents."""
-    documents = list_documents()
-    nodes = []
-    edges = []
-
-    concept_to_docs = {}  # concept/tag -> [doc_ids]
-
-    for doc in documents:
-        if doc["status"] != "ready":
-            continue
-
-        # Document node
-        nodes.append({
-            "id": doc["id"],
-            "label": _truncate(doc["original_name"], 30),
-            "type": "document",
-            "size": 18,
-            "color": "#7C3AED",
-            "metadata": {
-                "summary": doc.get("summary", ""),
-                "word_count": doc.get("word_count", 0),
-                "tags": doc.get("tags", []),
-            }
-        })
-
-        # Concept nodes + edges from key_concepts
-        for concept in doc.get("key_concepts", []):
-            concept_id = "concept_" + hashlib.md5(concept.lower().encode()).hexdigest()[:8]
-            if concept_id not in [n["id"] for n in nodes]:
-                nodes.append({
-                    "id": concept_id,
-                    "label": concept,
-                    "type": "concept",
-                    "size": 10,
-                    "color": "#06B6D4",
-                    "metadata": {}
-                })
-            edges.append({
-                "source": doc["id"],
-                "target": concept_id,
-                "weight": 0.8,
-                "label": "contains",
-            })
-            concept_to_docs.setdefault(concept.lower(), []).append(doc["id"])
-
-        # Tag nodes + edges
-        for tag in doc.get("tags", []):
-            tag_id = "tag_" + hashlib.md5(tag.lower().encode()).hexdigest()[:8]
-            if tag_id not in [n["id"] for n in nodes]:
-                nodes.append({
-                    "id": tag_id,
-                    "label": f"#{tag}",
-                    "type": "tag",
-                    "size": 8,
-                    "color": "#F59E0B",
-                    "metadata": {}
-                })
-            edges.append({
-                "source": doc["id"],
-                "target": tag_id,
-                "weight": 0.5,
-                "label": "tagged",
-            })
-
-    # Connect documents that share concepts
-    for concept, doc_ids in concept_to_docs.items():
-        if len(doc_ids) > 1:
-            for i in range(len(doc_ids)):
-                for j in range(i + 1, len(doc_ids)):
-                    edges.append({
-                        "source": doc_ids[i],
-                        "target": doc_ids[j],
-                        "weight": 0.3,
-                        "label": f"shares: {concept}",
-                    })
-
-    return {"nodes": nodes, "edges": edges}
+    return get_graph_index().snapshot()
 
 
 def _truncate(text: str, max_len: int) -> str:
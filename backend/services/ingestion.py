@@ -1,188 +1,696 @@
 """
-Document ingestion pipeline:
-1. Extract text from PDF/DOCX/TXT/MD
-2. Clean and chunk
-3. Generate embeddings
-4. Store in ChromaDB with metadata
-5. Auto-summarize and tag with LLM
+Document ingestion pipeline, run as queued stages with bounded worker pools:
+1. Extract text from PDF/DOCX/TXT/MD          (extract stage)
+2. Clean and chunk                             (embed stage)
+3. Generate embeddings                         (embed stage)
+4. Store in ChromaDB with metadata             (embed stage)
+5. Auto-summarize and tag with LLM             (summarize stage)
+
+Long PDFs skip whole-document extraction: the embed stage streams page
+windows through extract → chunk → embed/store concurrently instead.
+Bulk imports run a batch of small files through stages 1-4 together and
+hand each to the summarize stage.
 """
 import os
 import uuid
 import json
+import re
+import zlib
+import hashlib
 import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pathlib import Path
 
-from services.chunker import TextChunker
-from services.embedder import embed_texts
+from core.config import get_settings
+from services.chunker import get_chunker
+from services.extraction import count_pages_async, extract_pages_async, iter_page_windows
+from services.embed_batcher import aembed_texts
 from services.summarizer import summarize_and_tag
-from db.chroma import get_collection
+from db.chroma import write_chunks, delete_chunks, delete_document_chunks
+from db.metadata import get_metadata_store
+from services.lexical import update_lexical_index, remove_from_lexical_index
+from services.answer_cache import invalidate_answers
+from services.graph import update_graph, remove_from_graph
+from services.stats import update_stats, remove_from_stats
+from services.versioning import bump_content_version
 from models.schemas import DocumentStatus
+from services.jobs import (
+    IngestionJob,
+    IngestionQueue,
+    QueueFullError,
+    PRIORITY_BULK,
+    PRIORITY_NORMAL,
+    PRIORITY_SMALL,
+)
 
-# In-memory document store (replace with DB in production)
-_documents: dict = {}
+_queue: Optional[IngestionQueue] = None
 
+# Only the start of a document goes to the summarizer
+SUMMARY_EXCERPT_CHARS = 3000
 
-def get_document_store() -> dict:
-    return _documents
 
+class _DocumentDeleted(Exception):
+    pass
 
-def get_document(doc_id: str) -> Optional[dict]:
-    return _documents.get(doc_id)
 
+def get_document_store():
+    return get_metadata_store()
 
-def list_documents() -> list:
-    return list(_documents.values())
 
+def get_document(doc_id: str) -> Optional[dict]:
+    doc = get_metadata_store().get(doc_id)
+    if doc and doc["status"] in (DocumentStatus.PENDING, DocumentStatus.PROCESSING):
+        doc["queue"] = get_queue_position(doc_id)
+    return doc
+
+
+def list_documents(status: Optional[str] = None, tag: Optional[str] = None) -> list:
+    return get_metadata_store().list(status=status, tag=tag)
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Process-wide ingestion queue: extract → embed → summarize worker pools."""
+    global _queue
+    if _queue is None:
+        settings = get_settings()
+        _queue = IngestionQueue(
+            stages=[
+                ("extract", _stage_extract, settings.ingest_extract_workers),
+                ("embed", _stage_embed, settings.ingest_embed_workers),
+                ("summarize", _stage_summarize, settings.ingest_summarize_workers),
+            ],
+            on_failure=_on_job_failed,
+            max_pending=settings.ingest_max_pending,
+            max_retries=settings.ingest_max_retries,
+            retry_backoff=settings.ingest_retry_backoff_s,
+        )
+    return _queue
+
+
+def get_queue_position(doc_id: str) -> Optional[dict]:
+    if _queue is None:
+        return None
+    return _queue.position(doc_id)
+
+
+def _submit_job(
+    doc_id: str,
+    file_path: str,
+    original_name: str,
+    file_type: str,
+    file_size: int,
+    force_reindex: bool = False,
+):
+    small = file_size <= get_settings().ingest_small_file_mb * 1024 * 1024
+    get_ingestion_queue().submit(IngestionJob(
+        doc_id,
+        priority=PRIORITY_SMALL if small else PRIORITY_NORMAL,
+        file_path=file_path,
+        original_name=original_name,
+        file_type=file_type,
+        force_reindex=force_reindex,
+    ))
+
+
+def normalize_text(text: str) -> str:
+    """Extracted text as stored: NULs removed, runs of spaces and blank lines collapsed."""
+    text = text.replace("\x00", "")
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def text_fingerprint(text: str) -> str:
+    """SHA-256 of the whitespace-normalized, case-folded text."""
+    normalized = " ".join(text.split()).casefold()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class _TextAccumulator:
+    """Fingerprint, word count, summary excerpt and compressed copy of a
+    document's text, built up page by page without holding the text."""
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self._compressor = zlib.compressobj(6)
+        self._compressed = []
+        self.word_count = 0
+        self.excerpt = ""
+
+    def add(self, page: str):
+        words = page.split()
+        if not words:
+            return
+        if self.word_count:
+            self._digest.update(b" ")
+            self._compressed.append(self._compressor.compress(b"\n\n"))
+            if len(self.excerpt) < SUMMARY_EXCERPT_CHARS:
+                self.excerpt += "\n\n"
+        self._digest.update(" ".join(words).casefold().encode("utf-8"))
+        self._compressed.append(self._compressor.compress(page.encode("utf-8")))
+        self.word_count += len(words)
+        if len(self.excerpt) < SUMMARY_EXCERPT_CHARS:
+            self.excerpt = (self.excerpt + page)[:SUMMARY_EXCERPT_CHARS]
+
+    def fingerprint(self) -> str:
+        return self._digest.hexdigest()
+
+    def compressed(self) -> bytes:
+        return b"".join(self._compressed) + self._compressor.flush()
+
+
+def _linked_fields(source: dict) -> dict:
+    """Fields a duplicate inherits from the document that already holds its chunks."""
+    return {
+        "status": DocumentStatus.READY,
+        "chunk_source": source["chunk_source"] or source["id"],
+        "chunk_count": source["chunk_count"],
+        "word_count": source["word_count"],
+        "page_count": source["page_count"],
+        "tags": source["tags"],
+        "summary": source["summary"],
+        "key_concepts": source["key_concepts"],
+        "text_hash": source["text_hash"],
+        "updated_at": datetime.utcnow().isoformat(),
+    }
 
-async def ingest_document(file_path: str, original_name: str, file_type: str, file_size: int) -> str:
-    """Full ingestion pipeline — returns document ID."""
-    doc_id = str(uuid.uuid4())
-    created_at = datetime.utcnow()
 
-    # Register document immediately as pending
-    _documents[doc_id] = {
-        "id": doc_id,
+def _new_record(file_path: str, original_name: str, file_type: str, file_size: int, content_hash: str) -> dict:
+    created_at = datetime.utcnow().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
         "filename": Path(file_path).name,
         "original_name": original_name,
         "file_type": file_type,
         "file_size": file_size,
-        "status": DocumentStatus.PROCESSING,
+        "content_hash": content_hash,
+        "status": DocumentStatus.PENDING,
         "chunk_count": 0,
         "tags": [],
         "summary": "",
         "key_concepts": [],
-        "created_at": created_at.isoformat(),
-        "updated_at": created_at.isoformat(),
+        "created_at": created_at,
+        "updated_at": created_at,
         "word_count": 0,
         "page_count": 0,
     }
 
-    # Run pipeline in background
-    asyncio.create_task(_run_pipeline(doc_id, file_path, original_name, file_type))
-    return doc_id
 
+def _register(record: dict, force_reindex: bool) -> bool:
+    """Insert a new record; returns True if it was linked to an identical ready document."""
+    store = get_metadata_store()
+    existing = None if force_reindex else store.find_ready_by_hash("content_hash", record["content_hash"])
+    if existing:
+        store.insert({**record, **_linked_fields(existing)})
+        _document_ready(record["id"])
+        return True
+    store.insert(record)
+    return False
+
+
+async def ingest_document(
+    file_path: str,
+    original_name: str,
+    file_type: str,
+    file_size: int,
+    content_hash: str = "",
+    force_reindex: bool = False,
+) -> str:
+    """
+    Register a document and queue it for ingestion — returns document ID.
+    A byte-identical copy of a ready document is linked to its chunks and
+    summary instead of being processed again, unless `force_reindex` is set.
+    """
+    record = _new_record(file_path, original_name, file_type, file_size, content_hash)
+    doc_id = record["id"]
+    if _register(record, force_reindex):
+        return doc_id
 
-async def _run_pipeline(doc_id: str, file_path: str, original_name: str, file_type: str):
-    """Async pipeline: extract → chunk → embed → store → summarize."""
     try:
-        # Step 1: Extract text
-        text, page_count = extract_text(file_path, file_type)
-        word_count = len(text.split())
+        _submit_job(doc_id, file_path, original_name, file_type, file_size, force_reindex)
+    except QueueFullError:
+        get_metadata_store().delete(doc_id)
+        raise
+    return doc_id
 
-        _documents[doc_id].update({
-            "word_count": word_count,
-            "page_count": page_count,
-        })
 
-        if not text.strip():
-            _documents[doc_id]["status"] = DocumentStatus.ERROR
-            _documents[doc_id]["summary"] = "Could not extract text from document."
-            return
+def register_documents(files: List[dict]) -> List[dict]:
+    """Register saved files as pending documents without queueing them.
 
-        # Step 2: Chunk
-        chunker = TextChunker(chunk_size=512, chunk_overlap=64)
-        chunks = chunker.chunk_text(text, metadata={
-            "document_id": doc_id,
-            "document_name": original_name,
+    Each file is a dict of ingest_document's arguments. Returns the files
+    with "doc_id" and "linked" (True for copies of ready documents, which
+    need no processing) added, ready for ingest_registered().
+    """
+    registered = []
+    for file in files:
+        record = _new_record(
+            file["file_path"], file["original_name"], file["file_type"],
+            file["file_size"], file.get("content_hash", ""),
+        )
+        linked = _register(record, force_reindex=False)
+        registered.append({**file, "doc_id": record["id"], "linked": linked})
+    return registered
+
+
+async def ingest_registered(docs: List[dict]):
+    """Run registered documents through the pipeline as one batch.
+
+    Small files are extracted side by side and their chunks embedded and
+    written concurrently, so the embedding micro-batcher and the Chroma
+    writer coalesce them into large batches; each then joins the shared
+    summarize stage. Larger files, long PDFs and anything that fails here
+    go through the queue's own stages (and retries), except a document that
+    cannot be chunked, which is marked failed. Waits for room in the queue
+    rather than raising QueueFullError.
+    """
+    queue = get_ingestion_queue()
+    small_bytes = get_settings().ingest_small_file_mb * 1024 * 1024
+    batch = []
+    for doc in docs:
+        job = IngestionJob(
+            doc["doc_id"],
+            priority=PRIORITY_BULK,
+            file_path=doc["file_path"],
+            original_name=doc["original_name"],
+            file_type=doc["file_type"],
+            force_reindex=False,
+        )
+        if doc["file_size"] <= small_bytes:
+            batch.append(job)
+        else:
+            await queue.enter("extract", job)
+
+    extracted = await asyncio.gather(*(_stage_extract(job) for job in batch), return_exceptions=True)
+    chunked = []
+    for job, result in zip(batch, extracted):
+        if isinstance(result, BaseException):
+            print(f"[Ingestion] Batch extract failed for {job.doc_id}, handing it to the queue: {result}")
+            await queue.enter("extract", job)
+        elif result and "stream_pages" in job.state:
+            await queue.enter("embed", job)
+        elif result:
+            chunked.append(job)
+
+    # Chunking is CPU-bound: off the event loop, like the streamed path's windows
+    chunks = await asyncio.gather(
+        *(asyncio.to_thread(_chunk_pages, job) for job in chunked), return_exceptions=True,
+    )
+    embeddable = []
+    for job, result in zip(chunked, chunks):
+        if isinstance(result, BaseException):
+            # Chunking is deterministic, so a retry would fail the same way
+            await _on_job_failed(job, "embed", result)
+        else:
+            embeddable.append((job, result))
+    stored = await asyncio.gather(
+        *(_embed_chunks(job, job_chunks) for job, job_chunks in embeddable), return_exceptions=True,
+    )
+    for (job, _), result in zip(embeddable, stored):
+        if isinstance(result, BaseException):
+            print(f"[Ingestion] Batch embed failed for {job.doc_id}, handing it to the queue: {result}")
+            await queue.enter("embed", job)
+        elif result:
+            await queue.enter("summarize", job)
+
+
+async def reindex_document(doc_id: str) -> bool:
+    """Force a document through the full pipeline again, even if it is a duplicate."""
+    store = get_metadata_store()
+    doc = store.get(doc_id)
+    if not doc:
+        return False
+    if doc["status"] in (DocumentStatus.PENDING, DocumentStatus.PROCESSING):
+        raise ValueError("Document is already being processed.")
+    file_path = os.path.join(get_settings().upload_dir, doc["filename"])
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("The original upload for this document is no longer available.")
+
+    source = doc["chunk_source"]
+    _submit_job(doc_id, file_path, doc["original_name"], doc["file_type"], doc["file_size"], force_reindex=True)
+    # A linked duplicate gets chunks of its own; it no longer shares the source's
+    store.update(doc_id, {"status": DocumentStatus.PENDING, "chunk_source": "", "chunk_count": 0})
+    _document_removed(doc_id)
+    if source:
+        await asyncio.to_thread(_release_chunks, source)
+    return True
+
+
+def resume_interrupted_documents() -> int:
+    """Re-queue documents left pending or mid-pipeline by a previous process."""
+    store = get_metadata_store()
+    upload_dir = get_settings().upload_dir
+    interrupted = store.list(status=DocumentStatus.PROCESSING) + store.list(status=DocumentStatus.PENDING)
+    resumed = 0
+    for doc in interrupted:
+        file_path = os.path.join(upload_dir, doc["filename"])
+        if not os.path.exists(file_path):
+            store.update(doc["id"], {
+                "status": DocumentStatus.ERROR,
+                "summary": "Processing was interrupted and the uploaded file is missing. Please re-upload.",
+            })
+            continue
+        try:
+            _submit_job(doc["id"], file_path, doc["original_name"], doc["file_type"], doc["file_size"])
+        except QueueFullError:
+            store.update(doc["id"], {
+                "status": DocumentStatus.ERROR,
+                "summary": "Processing was interrupted by a server restart. Please re-upload.",
+            })
+            continue
+        store.update(doc["id"], {"status": DocumentStatus.PENDING})
+        resumed += 1
+    return resumed
+
+
+def _document_ready(doc_id: str):
+    """Bring derived views up to date with a document that just became ready."""
+    doc = get_metadata_store().get(doc_id)
+    if doc:
+        update_graph(doc)
+        update_stats(doc)
+    _views_updated()
+
+
+def _document_removed(doc_id: str):
+    """Drop a deleted (or re-queued) document from derived views."""
+    remove_from_graph(doc_id)
+    remove_from_stats(doc_id)
+    _views_updated()
+
+
+def _views_updated():
+    """Publish new versions once the derived views match the catalogue.
+
+    The record write already bumped the catalogue version; a read between
+    that write and the view update may have memoized the old view under it,
+    so the catalogue version moves again here.
+    """
+    bump_content_version()
+    get_metadata_store().touch()
+
+
+def _job_cancelled(job: IngestionJob) -> bool:
+    """A document deleted while queued drops out of the pipeline."""
+    if get_metadata_store().exists(job.doc_id):
+        return False
+    job.state = {}
+    return True
+
+
+async def _stage_extract(job: IngestionJob) -> bool:
+    """Stage 1: extract text."""
+    if _job_cancelled(job):
+        return False
+    store = get_metadata_store()
+    store.update(job.doc_id, {"status": DocumentStatus.PROCESSING})
+    file_path, file_type = job.payload["file_path"], job.payload["file_type"]
+
+    paged = file_type.lower() == "pdf"
+    page_count = await count_pages_async(file_path, file_type) if paged else None
+    min_pages = get_settings().ingest_stream_min_pages
+    if paged and 0 < min_pages <= page_count:
+        store.update(job.doc_id, {"page_count": page_count})
+        job.state["stream_pages"] = page_count
+        return True
+
+    pages = [normalize_text(page) for page in await extract_pages_async(file_path, file_type, page_count)]
+    text = "\n\n".join(page for page in pages if page)
+    word_count = len(text.split())
+
+    text_hash = text_fingerprint(text)
+    store.update(job.doc_id, {
+        "word_count": word_count,
+        "page_count": len(pages),
+        "text_hash": text_hash,
+    })
+
+    if not text.strip():
+        store.update(job.doc_id, {
+            "status": DocumentStatus.ERROR,
+            "summary": "Could not extract text from document.",
         })
+        return False
+    store.put_text(job.doc_id, text)
+
+    # Same normalized text as a ready document (e.g. a re-exported PDF):
+    # link to its chunks and summary, skipping embedding and the LLM call
+    if not job.payload.get("force_reindex"):
+        existing = store.find_ready_by_hash("text_hash", text_hash, exclude_id=job.doc_id)
+        if existing:
+            store.update(job.doc_id, _linked_fields(existing))
+            _document_ready(job.doc_id)
+            return False
+
+    # Only PDF pages are real pages worth citing
+    job.state.update(pages=pages, paged=paged, summary_text=text[:SUMMARY_EXCERPT_CHARS])
+    return True
 
-        if not chunks:
-            _documents[doc_id]["status"] = DocumentStatus.ERROR
-            return
 
-        # Step 3: Embed
-        texts = [c["content"] for c in chunks]
-        embeddings = await asyncio.get_event_loop().run_in_executor(
-            None, embed_texts, texts
-        )
+def _chunk_metadata(job: IngestionJob) -> dict:
+    return {"document_id": job.doc_id, "document_name": job.payload["original_name"]}
 
-        # Step 4: Store in ChromaDB
-        collection = get_collection()
-        ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
-        metadatas = [c["metadata"] for c in chunks]
 
-        collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
-        )
+async def _store_chunks(doc_id: str, chunks: List[dict]):
+    """Embed chunks and write them to ChromaDB and the lexical index.
 
-        # Step 5: LLM summarization + tagging (first 3000 chars for speed)
-        summary_text = text[:3000]
-        ai_result = await summarize_and_tag(summary_text, original_name)
-
-        _documents[doc_id].update({
-            "status": DocumentStatus.READY,
-            "chunk_count": len(chunks),
-            "tags": ai_result.get("tags", []),
-            "summary": ai_result.get("summary", ""),
-            "key_concepts": ai_result.get("key_concepts", []),
-            "updated_at": datetime.utcnow().isoformat(),
-        })
+    Returns once the Chroma batches holding them are written, so a document
+    is never marked ready ahead of its chunks.
+    """
+    texts = [c["content"] for c in chunks]
+    embeddings = await aembed_texts(texts)
 
-    except Exception as e:
-        _documents[doc_id]["status"] = DocumentStatus.ERROR
-        _documents[doc_id]["summary"] = f"Error during processing: {str(e)}"
-        print(f"[Ingestion Error] {doc_id}: {e}")
+    # Deterministic ids + upsert keep retries and resumed jobs idempotent
+    ids = [f"{doc_id}_chunk_{c['metadata']['chunk_index']}" for c in chunks]
+    metadatas = [c["metadata"] for c in chunks]
 
+    await write_chunks(
+        ids=ids,
+        embeddings=embeddings,
+        documents=texts,
+        metadatas=metadatas,
+    )
+    update_lexical_index(ids, doc_id, texts)
+    invalidate_answers([doc_id])
 
-def extract_text(file_path: str, file_type: str) -> tuple[str, int]:
-    """Extract text from various document types."""
-    file_type = file_type.lower()
 
-    if file_type == "pdf":
-        return _extract_pdf(file_path)
-    elif file_type in ["docx", "doc"]:
-        return _extract_docx(file_path)
-    elif file_type in ["txt", "md", "markdown"]:
-        return _extract_text_file(file_path)
-    else:
-        return _extract_text_file(file_path)
+# Chunk deletes wait for the Chroma writer to flush and query the
+# collection: callers on the event loop run them in a thread
 
+def _drop_stale_chunks(doc_id: str, chunk_count: int):
+    """Remove the document's chunks numbered past `chunk_count`: the tail of an
+    earlier, longer version (e.g. before a re-index) or of an interrupted run."""
+    stale = delete_chunks(where={"$and": [{"document_id": doc_id}, {"chunk_index": {"$gte": chunk_count}}]})
+    if stale:
+        remove_from_lexical_index(chunk_ids=stale)
 
-def _extract_pdf(file_path: str) -> tuple[str, int]:
-    """Extract text from PDF using PyMuPDF."""
-    import fitz  # pymupdf
-    texts = []
-    page_count = 0
-    with fitz.open(file_path) as doc:
-        page_count = len(doc)
-        for page in doc:
-            texts.append(page.get_text("text"))
-    return "\n\n".join(texts), page_count
 
+def _discard_chunks(doc_id: str):
+    delete_chunks(where={"document_id": doc_id})
+    remove_from_lexical_index(document_id=doc_id)
 
-def _extract_docx(file_path: str) -> tuple[str, int]:
-    """Extract text from DOCX."""
-    from docx import Document
-    doc = Document(file_path)
-    text = "\n".join([para.text for para in doc.paragraphs if para.text])
-    return text, 1
 
+async def _stage_embed(job: IngestionJob) -> bool:
+    """Stage 2: chunk → embed → store in ChromaDB."""
+    if _job_cancelled(job):
+        return False
+    if "stream_pages" in job.state:
+        return await _stream_embed(job)
+    return await _embed_chunks(job, await asyncio.to_thread(_chunk_pages, job))
 
-def _extract_text_file(file_path: str) -> tuple[str, int]:
-    """Extract text from TXT/MD files."""
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.read()
-    return text, 1
 
+def _chunk_pages(job: IngestionJob) -> List[dict]:
+    stream = get_chunker().stream(_chunk_metadata(job))
+    chunks = []
+    for number, page in enumerate(job.state["pages"], start=1):
+        chunks += stream.feed(page + "\n\n", number if job.state["paged"] else None)
+    return chunks + stream.close()
 
-def delete_document(doc_id: str) -> bool:
-    """Remove document from store and vector DB."""
-    if doc_id not in _documents:
+
+async def _embed_chunks(job: IngestionJob, chunks: List[dict]) -> bool:
+    """Store an extracted job's chunks; True when it should go on to summarization."""
+    if not chunks:
+        get_metadata_store().update(job.doc_id, {"status": DocumentStatus.ERROR})
+        return False
+
+    await _store_chunks(job.doc_id, chunks)
+    if not get_metadata_store().exists(job.doc_id):
+        # Deleted while its chunks were being written
+        await asyncio.to_thread(_discard_chunks, job.doc_id)
+        job.state = {}
         return False
+    await asyncio.to_thread(_drop_stale_chunks, job.doc_id, len(chunks))
 
-    # Delete from ChromaDB
+    job.state = {"summary_text": job.state["summary_text"], "chunk_count": len(chunks)}
+    return True
+
+
+async def _stream_embed(job: IngestionJob) -> bool:
+    """Stage 2 for long PDFs: page windows flow through extract → chunk →
+    embed/store concurrently, with bounded queues between the steps, so
+    memory stays flat and chunks are searchable as each window lands."""
+    settings = get_settings()
+    store = get_metadata_store()
+    doc_id = job.doc_id
+    windows: asyncio.Queue = asyncio.Queue(maxsize=settings.ingest_stream_queue)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=settings.ingest_stream_queue)
+    stream = get_chunker().stream(_chunk_metadata(job))
+    text = _TextAccumulator()
+
+    async def extract():
+        async for first_page, pages in iter_page_windows(
+            job.payload["file_path"], job.state["stream_pages"],
+            settings.ingest_stream_window_pages, prefetch=settings.ingest_stream_queue,
+        ):
+            await windows.put((first_page, pages))
+        await windows.put(None)
+
+    def chunk_window(first_page: int, pages: List[str]) -> List[dict]:
+        chunks = []
+        for number, page in enumerate(pages, start=first_page):
+            page = normalize_text(page)
+            text.add(page)
+            chunks += stream.feed(page + "\n\n", number)
+        return chunks
+
+    async def chunk():
+        while (window := await windows.get()) is not None:
+            chunks = await asyncio.to_thread(chunk_window, *window)
+            if chunks:
+                await batches.put(chunks)
+        chunks = stream.close()
+        if chunks:
+            await batches.put(chunks)
+        await batches.put(None)
+
+    async def write():
+        while (chunks := await batches.get()) is not None:
+            if not store.exists(doc_id):
+                raise _DocumentDeleted()
+            await _store_chunks(doc_id, chunks)
+        if not store.exists(doc_id):
+            raise _DocumentDeleted()
+
+    tasks = [asyncio.ensure_future(step()) for step in (extract, chunk, write)]
     try:
-        collection = get_collection()
-        results = collection.get(where={"document_id": doc_id})
-        if results and results["ids"]:
-            collection.delete(ids=results["ids"])
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+    failed = [task.exception() for task in done if not task.cancelled() and task.exception()]
+    if any(isinstance(error, _DocumentDeleted) for error in failed):
+        # Deleted mid-stream: take back what was already written
+        await asyncio.to_thread(_discard_chunks, doc_id)
+        job.state = {}
+        return False
+    if failed:
+        raise failed[0]
+
+    text_hash = text.fingerprint()
+    store.update(doc_id, {"word_count": text.word_count, "text_hash": text_hash})
+    if not text.word_count:
+        store.update(doc_id, {
+            "status": DocumentStatus.ERROR,
+            "summary": "Could not extract text from document.",
+        })
+        return False
+    store.put_compressed_text(doc_id, text.compressed())
+
+    # The text hash is only known at the end: a duplicate of a ready
+    # document gives its chunks back and links to the original's
+    if not job.payload.get("force_reindex"):
+        existing = store.find_ready_by_hash("text_hash", text_hash, exclude_id=doc_id)
+        if existing:
+            await asyncio.to_thread(_discard_chunks, doc_id)
+            store.update(doc_id, _linked_fields(existing))
+            _document_ready(doc_id)
+            return False
+
+    await asyncio.to_thread(_drop_stale_chunks, doc_id, stream.chunk_count)
+    job.state = {"summary_text": text.excerpt, "chunk_count": stream.chunk_count}
+    return True
+
+
+async def _stage_summarize(job: IngestionJob) -> bool:
+    """Stage 3: LLM summarization + tagging."""
+    if _job_cancelled(job):
+        return False
+    ai_result = await summarize_and_tag(job.state["summary_text"], job.payload["original_name"])
+
+    get_metadata_store().update(job.doc_id, {
+        "status": DocumentStatus.READY,
+        "chunk_count": job.state["chunk_count"],
+        "tags": ai_result.get("tags", []),
+        "summary": ai_result.get("summary", ""),
+        "key_concepts": ai_result.get("key_concepts", []),
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+    _document_ready(job.doc_id)
+    job.state = {}
+    return False
+
+
+async def _on_job_failed(job: IngestionJob, stage: str, error: Exception):
+    if not get_metadata_store().exists(job.doc_id):
+        # Deleted mid-pipeline (its upload may be gone too); nothing to report
+        job.state = {}
+        return
+    get_metadata_store().update(job.doc_id, {
+        "status": DocumentStatus.ERROR,
+        "summary": f"Error during processing: {str(error)}",
+    })
+    job.state = {}
+    print(f"[Ingestion Error] {job.doc_id} ({stage}): {error}")
+
+
+def _release_chunks(source_id: str):
+    """Delete a chunk set from ChromaDB once no document record refers to it."""
+    if get_metadata_store().chunk_source_refs(source_id):
+        return
+    try:
+        delete_chunks(where={"document_id": source_id})
+        remove_from_lexical_index(document_id=source_id)
     except Exception as e:
         print(f"[Delete Error] {e}")
 
-    del _documents[doc_id]
-    return True
+
+def delete_document(doc_id: str) -> bool:
+    """Remove a document from the store, its upload, and its chunks unless duplicates still link to them."""
+    return bool(delete_documents([doc_id]))
+
+
+def delete_documents(doc_ids: List[str]) -> List[str]:
+    """Remove many documents at once; returns the ids that existed.
+
+    Records go in one transaction, chunk sets nothing links to any more are
+    deleted by document filter without reading them back, and the uploaded
+    files are removed.
+    """
+    store = get_metadata_store()
+    docs = store.delete_many(doc_ids)
+    if not docs:
+        return []
+    for doc in docs:
+        remove_from_graph(doc["id"])
+        remove_from_stats(doc["id"])
+    _views_updated()
+
+    sources = list(dict.fromkeys(doc["chunk_source"] or doc["id"] for doc in docs))
+    invalidate_answers(list(dict.fromkeys([doc["id"] for doc in docs] + sources)))
+    still_used = store.referenced_chunk_sources(sources)
+    orphaned = [source for source in sources if source not in still_used]
+    try:
+        delete_document_chunks(orphaned)
+        remove_from_lexical_index(document_ids=orphaned)
+    except Exception as e:
+        print(f"[Delete Error] {e}")
+
+    upload_dir = get_settings().upload_dir
+    for doc in docs:
+        try:
+            os.remove(os.path.join(upload_dir, doc["filename"]))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[Delete Error] {doc['filename']}: {e}")
+    return [doc["id"] for doc in docs]
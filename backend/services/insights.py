@@ -0,0 +1,121 @@
+"""
+Materialized vault insights.
+Concept, tag and co-occurrence rankings come from the incrementally
+maintained vault counters. The LLM narrative is cached per time window and
+regenerated in the background once enough documents have changed (or it
+has aged out), so a page view never waits on the LLM.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from core.config import get_settings
+from db.metadata import get_metadata_store
+from models.schemas import DocumentStatus
+from services.stats import get_vault_counters
+from services.summarizer import generate_insights
+from services.versioning import content_version
+
+# window name -> days covered (None = all time)
+WINDOWS = {"week": 7, "month": 30, "all": None}
+
+_narratives: Dict[str, dict] = {}  # window -> {"version", "generated_at", "result"}
+_refreshing: Dict[str, asyncio.Task] = {}
+_epoch = 0  # bumped whenever a narrative is replaced
+
+
+def _window_start(window: str) -> str:
+    """ISO start of the window, aligned to UTC midnight so it only moves once a day."""
+    days = WINDOWS[window]
+    if days is None:
+        return ""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return (today - timedelta(days=days)).isoformat()
+
+
+def insights_version(window: str) -> str:
+    """Changes whenever the insights for `window` would: documents, narrative,
+    day, or the narrative going stale (which schedules a refresh on the next read)."""
+    return f"{content_version()}.{_epoch}.{_window_start(window)[:10]}.{int(_is_stale(window))}"
+
+
+def _is_stale(window: str) -> bool:
+    narrative = _narratives.get(window)
+    if narrative is None:
+        return True
+    changes = content_version() - narrative["version"]
+    if changes <= 0:
+        return False
+    settings = get_settings()
+    age = time.time() - narrative["generated_at"]
+    return changes >= settings.insights_regen_min_changes or age >= settings.insights_max_age_s
+
+
+async def _refresh(window: str):
+    global _epoch
+    version = content_version()
+    stats = get_vault_counters().window(_window_start(window), top_k=15)
+    recent, _ = get_metadata_store().page(
+        status=DocumentStatus.READY, created_from=_window_start(window) or None,
+        sort="created_at", descending=True, limit=8, fields=["original_name"],
+    )
+    try:
+        result = await generate_insights(
+            recent,
+            top_tags=[t["name"] for t in stats["tags"]],
+            top_concepts=[c["name"] for c in stats["concepts"]],
+        )
+    except Exception as e:
+        print(f"[Insights] Narrative refresh failed: {e}")
+        return
+    _narratives[window] = {"version": version, "generated_at": time.time(), "result": result}
+    _epoch += 1
+
+
+def _schedule_refresh(window: str):
+    task = _refreshing.get(window)
+    if task is not None and not task.done():
+        return
+    _refreshing[window] = asyncio.ensure_future(_refresh(window))
+
+
+def get_insights(window: str = "all") -> dict:
+    """Insights for a window, from cache; kicks off a narrative refresh when stale."""
+    stats = get_vault_counters().window(_window_start(window), top_k=10)
+    count = stats["document_count"]
+    narrative: Optional[dict] = _narratives.get(window)
+    stale = count > 0 and _is_stale(window)
+    if stale:
+        _schedule_refresh(window)
+
+    if count and narrative is not None:
+        result = narrative["result"]
+        summary = result.get("weekly_summary", "")
+        connections = result.get("suggested_connections", [])
+        generated_at = datetime.utcfromtimestamp(narrative["generated_at"]).isoformat()
+    else:
+        summary = (
+            f"You have {count} documents. Insights are being prepared."
+            if count else "Upload documents to get weekly AI insights."
+        )
+        connections, generated_at = [], None
+
+    return {
+        "window": window,
+        "weekly_summary": summary,
+        "top_concepts": [c["name"] for c in stats["concepts"]],
+        "top_tags": [t["name"] for t in stats["tags"]],
+        "concept_cooccurrence": stats["cooccurrence"],
+        "suggested_connections": connections,
+        "learning_streaks": count,
+        "document_count": count,
+        "generated_at": generated_at,
+        "refreshing": stale,
+    }
+
+
+async def cancel_insight_refreshes():
+    for task in _refreshing.values():
+        task.cancel()
+    _refreshing.clear()
@@ -0,0 +1,221 @@
+"""
+Bounded, multi-stage job queue for document ingestion.
+Each stage (extract → embed → summarize) has its own priority queue and
+worker pool, so a bulk upload can never start more pipelines than there
+are workers. Small files ride a priority lane, failed stages are retried
+with exponential backoff, and queue depth / wait times are tracked.
+"""
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+PRIORITY_SMALL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2  # bulk imports yield to interactive uploads
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue is at capacity."""
+
+
+class IngestionJob:
+    """A document moving through the pipeline; stages attach their output to `state`."""
+
+    def __init__(self, doc_id: str, priority: int = PRIORITY_NORMAL, **payload):
+        self.doc_id = doc_id
+        self.priority = priority
+        self.payload = payload
+        self.state: dict = {}
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+
+
+StageHandler = Callable[[IngestionJob], Awaitable[bool]]
+FailureHandler = Callable[[IngestionJob, str, Exception], Awaitable[None]]
+
+
+class _Stage:
+    def __init__(self, name: str, handler: StageHandler, workers: int, maxsize: int):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=maxsize)
+        self.waiting: dict = {}  # doc_id -> (priority, seq)
+        self.active: set = set()
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.tasks: List[asyncio.Task] = []
+
+    def stats(self) -> dict:
+        done = self.processed + self.failed
+        return {
+            "workers": self.workers,
+            "depth": len(self.waiting),
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "avg_wait_ms": round(self.wait_total / done * 1000, 1) if done else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class IngestionQueue:
+    """
+    Pipeline of stages connected by bounded priority queues.
+    A stage handler returns True to pass the job on to the next stage,
+    or False when the job is finished early (e.g. no text extracted).
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[str, StageHandler, int]],
+        on_failure: FailureHandler,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+    ):
+        self._stage_specs = stages
+        self._on_failure = on_failure
+        self._max_pending = max_pending
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._stages: List[_Stage] = []
+        self._seq = itertools.count()
+        self._retries: set = set()  # pending backoff tasks, referenced so they are not collected
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def start(self):
+        """Spawn the worker pools. Must be called from a running event loop."""
+        if self._started:
+            return
+        for i, (name, handler, workers) in enumerate(self._stage_specs):
+            # The first stage holds the backlog; later stages only buffer a few
+            # jobs so intermediate results (text, embeddings) stay bounded.
+            maxsize = self._max_pending if i == 0 else max(1, workers) * 2
+            self._stages.append(_Stage(name, handler, workers, maxsize))
+        for index, stage in enumerate(self._stages):
+            for _ in range(stage.workers):
+                stage.tasks.append(asyncio.create_task(self._worker(index)))
+        self._started = True
+
+    async def stop(self):
+        retries = list(self._retries)
+        for task in retries:
+            task.cancel()
+        for stage in self._stages:
+            for task in stage.tasks:
+                task.cancel()
+        await asyncio.gather(*retries, return_exceptions=True)
+        for stage in self._stages:
+            await asyncio.gather(*stage.tasks, return_exceptions=True)
+        self._stages = []
+        self._started = False
+
+    def submit(self, job: IngestionJob):
+        """Queue a job at the first stage. Raises QueueFullError when at capacity."""
+        if not self._started:
+            self.start()
+        first = self._stages[0]
+        if first.queue.full():
+            raise QueueFullError(f"Ingestion queue is full ({self._max_pending} pending)")
+        self._put_nowait(0, job)
+
+    async def enter(self, stage: str, job: IngestionJob):
+        """Queue a job at the named stage, waiting while it is full. For callers
+        that did the earlier stages' work themselves (e.g. bulk imports)."""
+        if not self._started:
+            self.start()
+        index = next(i for i, s in enumerate(self._stages) if s.name == stage)
+        await self._put(index, job)
+
+    def depth(self, stage: str) -> int:
+        """Jobs waiting at the named stage."""
+        return next((len(s.waiting) for s in self._stages if s.name == stage), 0)
+
+    def _entry(self, index: int, job: IngestionJob):
+        seq = next(self._seq)
+        self._stages[index].waiting[job.doc_id] = (job.priority, seq)
+        job.enqueued_at = time.monotonic()
+        return (job.priority, seq, job)
+
+    def _put_nowait(self, index: int, job: IngestionJob):
+        self._stages[index].queue.put_nowait(self._entry(index, job))
+
+    async def _put(self, index: int, job: IngestionJob):
+        await self._stages[index].queue.put(self._entry(index, job))
+
+    async def _worker(self, index: int):
+        stage = self._stages[index]
+        while True:
+            _, _, job = await stage.queue.get()
+            stage.waiting.pop(job.doc_id, None)
+            wait = time.monotonic() - job.enqueued_at
+            stage.wait_total += wait
+            stage.wait_max = max(stage.wait_max, wait)
+            stage.in_flight += 1
+            stage.active.add(job.doc_id)
+            try:
+                advance = await stage.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._handle_error(index, job, e)
+            else:
+                stage.processed += 1
+                job.attempts = 0
+                if advance and index + 1 < len(self._stages):
+                    await self._put(index + 1, job)
+            finally:
+                stage.active.discard(job.doc_id)
+                stage.in_flight -= 1
+                stage.queue.task_done()
+
+    async def _handle_error(self, index: int, job: IngestionJob, error: Exception):
+        stage = self._stages[index]
+        job.attempts += 1
+        if job.attempts <= self._max_retries:
+            stage.retried += 1
+            delay = self._retry_backoff * (2 ** (job.attempts - 1))
+            print(f"[Ingestion Queue] {stage.name} failed for {job.doc_id} "
+                  f"(attempt {job.attempts}), retrying in {delay:.1f}s: {error}")
+            task = asyncio.create_task(self._retry_later(index, job, delay))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+            return
+        stage.failed += 1
+        await self._on_failure(job, stage.name, error)
+
+    async def _retry_later(self, index: int, job: IngestionJob, delay: float):
+        await asyncio.sleep(delay)
+        if self._started:
+            await self._put(index, job)
+
+    def position(self, doc_id: str) -> Optional[dict]:
+        """
+        Where a document currently is: stage name and 1-based queue position,
+        or position 0 while a worker is processing it.
+        """
+        for stage in self._stages:
+            if doc_id in stage.active:
+                return {"stage": stage.name, "position": 0}
+            key = stage.waiting.get(doc_id)
+            if key is not None:
+                ahead = sum(1 for other in stage.waiting.values() if other < key)
+                return {"stage": stage.name, "position": ahead + 1}
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "started": self._started,
+            "stages": {stage.name: stage.stats() for stage in self._stages},
+        }
@@ -0,0 +1,369 @@
+"""
+In-process BM25 inverted index over vault chunks.
+Kept alongside the Chroma collection so exact identifiers, error codes and
+names are found even when dense retrieval misses them. Postings are
+compact typed arrays; deleted chunks are tombstoned and compacted away.
+"""
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.config import get_settings
+
+_index = None
+_load_lock = threading.Lock()  # one load at a time; the index's own lock stays free
+_journal: Optional[list] = None  # (function, args) updates made while a load runs
+_saver: Optional[threading.Thread] = None
+_stop_saving = threading.Event()
+
+_TOKEN_RE = re.compile(r"[a-z0-9](?:[a-z0-9_\-.]*[a-z0-9])?")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were will with what which who how why when where does do".split()
+)
+_SNAPSHOT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """BM25 (k1=1.2, b=0.75) over chunk texts, filterable by document id."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, common_term_ratio: float = 0.1):
+        self.k1 = k1
+        self.b = b
+        self.common_term_ratio = common_term_ratio
+        self._lock = threading.RLock()
+        self._clear()
+        self.loaded = False
+        self.changes = 0  # chunk additions and removals since the last save
+
+    def _adopt(self, other: "LexicalIndex"):
+        """Take over another index's contents (e.g. one built off to the side)."""
+        with self._lock:
+            self._postings = other._postings
+            self._chunk_ids = other._chunk_ids
+            self._doc_of = other._doc_of
+            self._lengths = other._lengths
+            self._ordinal = other._ordinal
+            self._by_document = other._by_document
+            self._total_length = other._total_length
+            self._deleted = other._deleted
+            self.changes += other.changes
+
+    def _clear(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}  # term -> (ordinals, term freqs)
+        self._chunk_ids: List[Optional[str]] = []             # ordinal -> chunk id
+        self._doc_of: List[Optional[str]] = []                # ordinal -> document id
+        self._lengths = array("I")                            # ordinal -> token count
+        self._ordinal: Dict[str, int] = {}                    # chunk id -> ordinal
+        self._by_document: Dict[str, List[int]] = {}
+        self._total_length = 0
+        self._deleted = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._ordinal)
+
+    def add(self, chunk_ids: List[str], document_id: str, texts: List[str]):
+        with self._lock:
+            for chunk_id, text in zip(chunk_ids, texts):
+                self._remove_chunk(chunk_id)
+                self.changes += 1
+                ordinal = len(self._chunk_ids)
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                self._chunk_ids.append(chunk_id)
+                self._doc_of.append(document_id)
+                self._lengths.append(length)
+                self._ordinal[chunk_id] = ordinal
+                self._by_document.setdefault(document_id, []).append(ordinal)
+                self._total_length += length
+                for term, tf in terms.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("I"), array("H"))
+                    postings[0].append(ordinal)
+                    postings[1].append(min(tf, 65535))
+            self._maybe_compact()
+
+    def remove(self, chunk_ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove_chunk(chunk_id)
+            self._maybe_compact()
+
+    def remove_document(self, document_id: str):
+        self.remove_documents([document_id])
+
+    def remove_documents(self, document_ids: Iterable[str]):
+        with self._lock:
+            for document_id in document_ids:
+                for ordinal in self._by_document.pop(document_id, []):
+                    chunk_id = self._chunk_ids[ordinal]
+                    if chunk_id is not None:
+                        self._remove_chunk(chunk_id)
+            self._maybe_compact()
+
+    def _remove_chunk(self, chunk_id: str):
+        ordinal = self._ordinal.pop(chunk_id, None)
+        if ordinal is None:
+            return
+        self._total_length -= self._lengths[ordinal]
+        self._chunk_ids[ordinal] = None
+        self._doc_of[ordinal] = None
+        self._deleted += 1
+        self.changes += 1
+
+    def _maybe_compact(self):
+        """Rebuild postings without tombstones once a quarter of ordinals are dead."""
+        if self._deleted < 1000 or self._deleted * 4 < len(self._chunk_ids):
+            return
+        remap = array("i", [-1]) * len(self._chunk_ids)
+        chunk_ids, doc_of, lengths = [], [], array("I")
+        for old, chunk_id in enumerate(self._chunk_ids):
+            if chunk_id is not None:
+                remap[old] = len(chunk_ids)
+                chunk_ids.append(chunk_id)
+                doc_of.append(self._doc_of[old])
+                lengths.append(self._lengths[old])
+        postings = {}
+        for term, (ordinals, tfs) in self._postings.items():
+            new_ordinals, new_tfs = array("I"), array("H")
+            for ordinal, tf in zip(ordinals, tfs):
+                mapped = remap[ordinal]
+                if mapped >= 0:
+                    new_ordinals.append(mapped)
+                    new_tfs.append(tf)
+            if new_ordinals:
+                postings[term] = (new_ordinals, new_tfs)
+        self._postings = postings
+        self._chunk_ids, self._doc_of, self._lengths = chunk_ids, doc_of, lengths
+        self._ordinal = {c: i for i, c in enumerate(chunk_ids)}
+        self._by_document = {}
+        for i, doc_id in enumerate(doc_of):
+            self._by_document.setdefault(doc_id, []).append(i)
+        self._deleted = 0
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        document_ids: Optional[List[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, bm25 score) for the query."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._ordinal)
+            if not terms or n == 0:
+                return []
+            avg_length = self._total_length / n or 1.0
+            allowed = None
+            if document_ids:
+                allowed = set()
+                for doc_id in document_ids:
+                    allowed.update(self._by_document.get(doc_id, ()))
+                if not allowed:
+                    return []
+
+            # Rarest terms first; very common terms (low idf) are skipped once a
+            # rarer term has matched, which keeps scoring proportional to the
+            # postings that actually discriminate
+            matched = sorted(
+                (self._postings[t] for t in terms if t in self._postings),
+                key=lambda postings: len(postings[0]),
+            )
+            max_df = max(1, int(n * self.common_term_ratio))
+            scores: Dict[int, float] = {}
+            k1, b, lengths, chunk_ids = self.k1, self.b, self._lengths, self._chunk_ids
+            for ordinals, tfs in matched:
+                if scores and len(ordinals) > max_df:
+                    break
+                idf = math.log(1 + (n - len(ordinals) + 0.5) / (len(ordinals) + 0.5))
+                for ordinal, tf in zip(ordinals, tfs):
+                    if chunk_ids[ordinal] is None or (allowed is not None and ordinal not in allowed):
+                        continue
+                    norm = tf + k1 * (1 - b + b * lengths[ordinal] / avg_length)
+                    scores[ordinal] = scores.get(ordinal, 0.0) + idf * tf * (k1 + 1) / norm
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [(chunk_ids[ordinal], score) for ordinal, score in best]
+
+    def save(self, path: str):
+        with self._lock:
+            state = {
+                "version": _SNAPSHOT_VERSION,
+                "postings": self._postings,
+                "chunk_ids": self._chunk_ids,
+                "doc_of": self._doc_of,
+                "lengths": self._lengths,
+                "total_length": self._total_length,
+                "deleted": self._deleted,
+            }
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.changes = 0
+
+    def load(self, path: str) -> bool:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != _SNAPSHOT_VERSION:
+            return False
+        with self._lock:
+            self._postings = state["postings"]
+            self._chunk_ids = state["chunk_ids"]
+            self._doc_of = state["doc_of"]
+            self._lengths = state["lengths"]
+            self._total_length = state["total_length"]
+            self._deleted = state["deleted"]
+            self._ordinal = {c: i for i, c in enumerate(self._chunk_ids) if c is not None}
+            self._by_document = {}
+            for i, doc_id in enumerate(self._doc_of):
+                if doc_id is not None:
+                    self._by_document.setdefault(doc_id, []).append(i)
+        return True
+
+    def rebuild(self, collection, page_size: int = 5000):
+        """Re-index every chunk in the Chroma collection."""
+        with self._lock:
+            self._clear()
+            offset = 0
+            while True:
+                page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+                ids = page["ids"]
+                if not ids:
+                    break
+                for chunk_id, text, metadata in zip(ids, page["documents"], page["metadatas"]):
+                    self.add([chunk_id], (metadata or {}).get("document_id", ""), [text or ""])
+                offset += len(ids)
+
+
+def _snapshot_path() -> str:
+    return os.path.join(get_settings().chroma_persist_dir, "lexical_index.pkl")
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Shared index; load it with ensure_lexical_index_loaded() before searching."""
+    global _index
+    if _index is None:
+        _index = LexicalIndex()
+    return _index
+
+
+def ensure_lexical_index_loaded() -> LexicalIndex:
+    """Load the on-disk snapshot, or rebuild from Chroma if it is missing or stale.
+
+    The index is built into a fresh LexicalIndex without holding the shared
+    one's lock, so ingestion is never stalled behind a long rebuild; updates
+    arriving meanwhile are journaled and replayed before the swap.
+    """
+    global _journal
+    from db.chroma import get_collection, get_chunk_count
+
+    index = get_lexical_index()
+    if index.loaded:
+        return index
+    with _load_lock:
+        if index.loaded:
+            return index
+        with index._lock:
+            _journal = []
+        try:
+            fresh = LexicalIndex(index.k1, index.b, index.common_term_ratio)
+            path = _snapshot_path()
+            restored = False
+            if os.path.exists(path):
+                try:
+                    restored = fresh.load(path) and fresh.size == get_chunk_count()
+                except Exception as e:
+                    print(f"[Lexical Index] Snapshot unreadable, rebuilding: {e}")
+            if not restored:
+                fresh.rebuild(get_collection())
+            with index._lock:
+                for apply, args in _journal:
+                    apply(fresh, *args)
+                index._adopt(fresh)
+                index.loaded = True
+        finally:
+            with index._lock:
+                _journal = None
+    _start_saver()
+    return index
+
+
+def _start_saver():
+    """Snapshot the index in the background, so a crash does not force a full rebuild."""
+    global _saver
+    interval = get_settings().lexical_snapshot_interval_s
+    if interval <= 0 or _saver is not None:
+        return
+    _stop_saving.clear()
+    _saver = threading.Thread(target=_save_periodically, args=(interval,), name="lexical-snapshot", daemon=True)
+    _saver.start()
+
+
+def _save_periodically(interval: float):
+    while not _stop_saving.wait(interval):
+        index = get_lexical_index()
+        if not index.changes:
+            continue
+        try:
+            index.save(_snapshot_path())
+        except Exception as e:
+            print(f"[Lexical Index] Snapshot failed: {e}")
+
+
+def _apply_remove(index: LexicalIndex, chunk_ids, document_id, document_ids):
+    if chunk_ids:
+        index.remove(chunk_ids)
+    if document_id:
+        index.remove_document(document_id)
+    if document_ids:
+        index.remove_documents(document_ids)
+
+
+def update_lexical_index(chunk_ids: List[str], document_id: str, texts: List[str]):
+    # Until the index is loaded, Chroma is the source of truth and the load
+    # will pick these chunks up; during a load they are also journaled, in
+    # case the load already read past them.
+    index = get_lexical_index()
+    with index._lock:
+        if index.loaded:
+            index.add(chunk_ids, document_id, texts)
+        elif _journal is not None:
+            _journal.append((LexicalIndex.add, (list(chunk_ids), document_id, list(texts))))
+
+
+def remove_from_lexical_index(
+    chunk_ids: Optional[List[str]] = None,
+    document_id: Optional[str] = None,
+    document_ids: Optional[List[str]] = None,
+):
+    index = get_lexical_index()
+    with index._lock:
+        if index.loaded:
+            _apply_remove(index, chunk_ids, document_id, document_ids)
+        elif _journal is not None:
+            _journal.append((_apply_remove, (chunk_ids, document_id, document_ids)))
+
+
+def save_lexical_index():
+    """Stop the background snapshots and write a final one."""
+    global _saver
+    if _saver is not None:
+        _stop_saving.set()
+        _saver.join()
+        _saver = None
+    index = get_lexical_index()
+    if index.loaded:
+        index.save(_snapshot_path())
@@ -0,0 +1,151 @@
+"""
+Process-wide LLM client registry.
+Chat models are created once per (model, temperature, max_tokens, streaming)
+and share one pooled async HTTP client, so keep-alive connections and TLS
+sessions are reused across chat, summarize, study and insights calls.
+"""
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from core.config import get_settings
+
+_http_client: Optional[httpx.AsyncClient] = None
+_models: dict = {}
+
+
+class LLMMetrics:
+    """Connection-pool usage and latency counters for LLM calls."""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.errors = 0
+        self._ttft = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+
+    def record_ttft(self, seconds: float):
+        self._ttft.append(seconds)
+
+    def record_latency(self, seconds: float):
+        self._latency.append(seconds)
+
+    @staticmethod
+    def _summary(samples) -> dict:
+        if not samples:
+            return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+        ordered = sorted(samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {
+            "count": len(ordered),
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p50_ms": round(pick(0.5) * 1000, 1),
+            "p95_ms": round(pick(0.95) * 1000, 1),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(_models),
+            "http_requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "errors": self.errors,
+            "open_connections": _open_connections(),
+            "time_to_first_token": self._summary(self._ttft),
+            "completion_latency": self._summary(self._latency),
+        }
+
+
+metrics = LLMMetrics()
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """Counts requests waiting on the connection pool or the API."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+
+
+def _open_connections() -> int:
+    if _http_client is None:
+        return 0
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    return len(getattr(pool, "connections", []) or [])
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        settings = get_settings()
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_s,
+        )
+        _http_client = httpx.AsyncClient(
+            transport=_MeteredTransport(limits=limits, http2=False),
+            limits=limits,
+            timeout=httpx.Timeout(settings.llm_timeout_s, connect=settings.llm_connect_timeout_s),
+        )
+    return _http_client
+
+
+def get_chat_model(temperature: float, max_tokens: int, streaming: bool = False):
+    """Shared ChatOpenAI for these parameters, or None without an API key."""
+    settings = get_settings()
+    if not settings.openai_api_key:
+        return None
+    key = (settings.llm_model, temperature, max_tokens, streaming)
+    model = _models.get(key)
+    if model is None:
+        from langchain_openai import ChatOpenAI
+        model = ChatOpenAI(
+            model=settings.llm_model,
+            openai_api_key=settings.openai_api_key,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=streaming,
+            http_async_client=get_http_client(),
+        )
+        _models[key] = model
+    return model
+
+
+async def ainvoke(llm, messages):
+    """llm.ainvoke, recording completion latency."""
+    start = time.perf_counter()
+    response = await llm.ainvoke(messages)
+    metrics.record_latency(time.perf_counter() - start)
+    return response
+
+
+async def astream(llm, messages):
+    """llm.astream, recording time to first token and completion latency."""
+    start = time.perf_counter()
+    first = True
+    async for chunk in llm.astream(messages):
+        if first and chunk.content:
+            metrics.record_ttft(time.perf_counter() - start)
+            first = False
+        yield chunk
+    metrics.record_latency(time.perf_counter() - start)
+
+
+async def close_llm_clients():
+    global _http_client
+    _models.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
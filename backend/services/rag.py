@@ -2,68 +2,182 @@
 RAG (Retrieval Augmented Generation) query engine.
 Handles semantic search + LLM-powered Q&A with streaming.
 """
+import asyncio
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, AsyncGenerator
-from services.embedder import embed_query
-from db.chroma import get_collection
+from services.embed_batcher import aembed_query
+from db.chroma import get_collection, get_chunk_count
+from db.metadata import get_metadata_store
+from services.lexical import ensure_lexical_index_loaded
+from services.llm import get_chat_model, ainvoke, astream
+from services.answer_cache import get_answer_cache
+from services.context import build_context, trim_history
 from core.config import get_settings
 
 settings = get_settings()
+_retrieval_pool: Optional[ThreadPoolExecutor] = None
+
+RRF_K = 60  # reciprocal rank fusion damping constant
 
 
 def _get_llm(stream: bool = False):
-    if settings.openai_api_key:
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(
-            model=settings.llm_model,
-            openai_api_key=settings.openai_api_key,
-            temperature=0.3,
-            max_tokens=600,
-            streaming=stream,
+    return get_chat_model(temperature=0.3, max_tokens=600, streaming=stream)
+
+
+def _get_retrieval_pool() -> ThreadPoolExecutor:
+    """Dedicated threads for vector queries, so retrieval never runs on the event loop."""
+    global _retrieval_pool
+    if _retrieval_pool is None:
+        _retrieval_pool = ThreadPoolExecutor(
+            max_workers=settings.retrieval_threads,
+            thread_name_prefix="retrieval",
         )
-    return None
+    return _retrieval_pool
 
 
-async def semantic_search(
+def shutdown_retrieval_pool():
+    global _retrieval_pool
+    if _retrieval_pool is not None:
+        _retrieval_pool.shutdown(wait=False)
+        _retrieval_pool = None
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _retrieve(
     query: str,
-    document_ids: Optional[List[str]] = None,
-    top_k: int = 10,
+    query_embedding: List[float],
+    document_ids: Optional[List[str]],
+    top_k: int,
+    mode: str,
 ) -> List[dict]:
-    """Retrieve most relevant chunks for a query."""
-    collection = get_collection()
-    query_embedding = embed_query(query)
+    """Blocking vector (+ BM25) retrieval — runs on the retrieval pool."""
+    chunk_count = get_chunk_count()
+    if chunk_count == 0:
+        return []
 
     where_filter = None
+    if document_ids:
+        # Linked duplicates share the chunks of the document they were matched to
+        document_ids = get_metadata_store().resolve_chunk_sources(document_ids)
     if document_ids and len(document_ids) > 0:
         if len(document_ids) == 1:
             where_filter = {"document_id": document_ids[0]}
         else:
             where_filter = {"document_id": {"$in": document_ids}}
 
+    hybrid = mode == "hybrid"
+    candidates = top_k * 2 if hybrid else top_k
+    collection = get_collection()
     results = collection.query(
         query_embeddings=[query_embedding],
-        n_results=min(top_k, collection.count() or 1),
+        n_results=min(candidates, chunk_count),
         where=where_filter,
         include=["documents", "metadatas", "distances"],
     )
 
-    search_results = []
+    hits = {}
+    vector_ranking = []
     if results and results["ids"] and results["ids"][0]:
         for i, chunk_id in enumerate(results["ids"][0]):
-            metadata = results["metadatas"][0][i] if results["metadatas"] else {}
             distance = results["distances"][0][i] if results["distances"] else 1.0
-            score = max(0.0, 1.0 - distance)
-
-            search_results.append({
-                "chunk_id": chunk_id,
-                "document_id": metadata.get("document_id", ""),
-                "document_name": metadata.get("document_name", ""),
+            hits[chunk_id] = {
+                "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
                 "content": results["documents"][0][i],
-                "score": round(score, 4),
-                "page_number": metadata.get("page_number"),
-                "chunk_index": metadata.get("chunk_index", 0),
-            })
+                "score": max(0.0, 1.0 - distance),
+            }
+            vector_ranking.append(chunk_id)
+    if not hybrid:
+        return _with_owners([{"chunk_id": cid, **hits[cid]} for cid in vector_ranking])
+
+    lexical_ranking = [
+        chunk_id for chunk_id, _ in
+        ensure_lexical_index_loaded().search(query, top_k=candidates, document_ids=document_ids)
+    ]
+
+    # Reciprocal rank fusion of the two rankings
+    fused = {}
+    for ranking in (vector_ranking, lexical_ranking):
+        for rank, chunk_id in enumerate(ranking):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+    # Lexical-only hits: fetch their payloads, and score them by cosine
+    # similarity like every other result
+    missing = [chunk_id for chunk_id in ranked if chunk_id not in hits]
+    if missing:
+        extra = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        for i, chunk_id in enumerate(extra["ids"]):
+            hits[chunk_id] = {
+                "metadata": extra["metadatas"][i] or {},
+                "content": extra["documents"][i],
+                "score": max(0.0, _cosine(query_embedding, extra["embeddings"][i])),
+            }
+    return _with_owners([{"chunk_id": cid, **hits[cid]} for cid in ranked if cid in hits])
 
-    return search_results
+
+def _with_owners(results: List[dict]) -> List[dict]:
+    """Name each hit after a live record. Chunks stay under the id of the
+    document first ingested; once it is deleted, a duplicate still linked
+    to them stands in. Hits no record refers to any more are dropped."""
+    owners = get_metadata_store().chunk_owners(
+        [r["metadata"].get("document_id", "") for r in results]
+    )
+    resolved = []
+    for result in results:
+        owner = owners.get(result["metadata"].get("document_id", ""))
+        if owner is None:
+            continue
+        result["metadata"] = {**result["metadata"], "document_id": owner["id"], "document_name": owner["original_name"]}
+        resolved.append(result)
+    return resolved
+
+
+async def semantic_search(
+    query: str,
+    document_ids: Optional[List[str]] = None,
+    top_k: int = 10,
+    mode: Optional[str] = None,
+) -> List[dict]:
+    """Retrieve most relevant chunks for a query (mode: "hybrid" or "vector")."""
+    _, results = await _search(query, document_ids, top_k, mode)
+    return results
+
+
+async def _search(query, document_ids, top_k, mode=None):
+    """semantic_search that also returns the query embedding."""
+    query_embedding = await aembed_query(query)
+    hits = await asyncio.get_running_loop().run_in_executor(
+        _get_retrieval_pool(), _retrieve, query, query_embedding, document_ids, top_k,
+        mode or settings.search_mode,
+    )
+
+    search_results = []
+    for hit in hits:
+        metadata = hit["metadata"]
+        search_results.append({
+            "chunk_id": hit["chunk_id"],
+            "document_id": metadata.get("document_id", ""),
+            "document_name": metadata.get("document_name", ""),
+            "content": hit["content"],
+            "score": round(hit["score"], 4),
+            "page_number": metadata.get("page_number"),
+            "chunk_index": metadata.get("chunk_index", 0),
+        })
+
+    return query_embedding, search_results
+
+
+def _replay_tokens(answer: str):
+    """Split a cached answer into word-sized SSE tokens."""
+    return re.findall(r"\s*\S+", answer) or [answer]
 
 
 async def chat_with_documents(
@@ -72,8 +186,8 @@ async def chat_with_documents(
     conversation_history: Optional[List[dict]] = None,
 ) -> dict:
     """Non-streaming RAG answer for a question."""
-    # Retrieve relevant context
-    chunks = await semantic_search(query, document_ids, top_k=4)
+    # Retrieve candidates, then keep as many as fit the prompt budget
+    query_embedding, chunks = await _search(query, document_ids, top_k=settings.rag_candidate_chunks)
 
     if not chunks:
         return {
@@ -81,10 +195,8 @@ async def chat_with_documents(
             "sources": [],
         }
 
-    context = "\n\n---\n\n".join([
-        f"[{c['document_name']}]\n{c['content'][:400]}"
-        for c in chunks[:3]
-    ])
+    context, sources = build_context(chunks, settings.rag_context_tokens)
+    history = trim_history(conversation_history, settings.rag_history_tokens)
 
     llm = _get_llm()
     if not llm:
@@ -93,28 +205,38 @@ async def chat_with_documents(
             "sources": chunks[:5],
         }
 
+    cache = get_answer_cache()
+    chunk_ids = [c["chunk_id"] for c in sources]
+    if cache:
+        cached = cache.get(query_embedding, document_ids, chunk_ids, history)
+        if cached is not None:
+            return {"answer": cached, "sources": sources, "cached": True}
+
     # Build conversation history
     from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
     messages = [
         SystemMessage(content="You are AstraOS AI, a knowledge assistant. Answer concisely from the provided vault context. Cite document names when relevant.")
     ]
 
-    if conversation_history:
-        for msg in conversation_history[-6:]:  # Last 6 messages
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                messages.append(AIMessage(content=msg["content"]))
+    for msg in history:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
 
     messages.append(HumanMessage(content=f"""Vault context:
 {context}
 
 Q: {query}"""))
 
-    response = await llm.ainvoke(messages)
+    response = await ainvoke(llm, messages)
+    if cache:
+        cache.put(query_embedding, document_ids, chunk_ids, history,
+                  response.content, [c["document_id"] for c in sources])
     return {
         "answer": response.content,
-        "sources": chunks[:3],
+        "sources": sources,
+        "cached": False,
     }
 
 
@@ -124,12 +246,12 @@ async def stream_chat_with_documents(
     conversation_history: Optional[List[dict]] = None,
 ) -> AsyncGenerator[str, None]:
     """Streaming RAG answer — yields text chunks."""
-    chunks = await semantic_search(query, document_ids, top_k=4)
+    query_embedding, chunks = await _search(query, document_ids, top_k=settings.rag_candidate_chunks)
 
-    context = "\n\n---\n\n".join([
-        f"[{c['document_name']}]\n{c['content'][:400]}"
-        for c in chunks[:3]
-    ]) if chunks else "No specific documents found."
+    context, sources = build_context(chunks, settings.rag_context_tokens)
+    if not sources:
+        context = "No specific documents found."
+    history = trim_history(conversation_history, settings.rag_history_tokens)
 
     llm = _get_llm(stream=True)
     if not llm:
@@ -142,21 +264,35 @@ async def stream_chat_with_documents(
         SystemMessage(content="You are AstraOS AI. Answer concisely from the vault context. Cite document names when relevant."),
     ]
 
-    if conversation_history:
-        for msg in conversation_history[-4:]:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                messages.append(AIMessage(content=msg["content"]))
+    for msg in history:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
 
     messages.append(HumanMessage(content=f"Context:\n{context}\n\nQuestion: {query}"))
 
     # Stream sources first
-    import json
-    yield f"data: {json.dumps({'type': 'sources', 'sources': chunks[:3]})}\n\n"
+    yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
+
+    cache = get_answer_cache() if sources else None
+    chunk_ids = [c["chunk_id"] for c in sources]
+    if cache:
+        cached = cache.get(query_embedding, document_ids, chunk_ids, history)
+        if cached is not None:
+            for token in _replay_tokens(cached):
+                yield f"data: {json.dumps({'type': 'token', 'token': token})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'cached': True})}\n\n"
+            return
 
-    async for chunk in llm.astream(messages):
+    answer = []
+    async for chunk in astream(llm, messages):
         if chunk.content:
+            answer.append(chunk.content)
             yield f"data: {json.dumps({'type': 'token', 'token': chunk.content})}\n\n"
 
+    # Only completed answers are cached; a disconnected client never gets here
+    if cache:
+        cache.put(query_embedding, document_ids, chunk_ids, history,
+                  "".join(answer), [c["document_id"] for c in sources])
     yield f"data: {json.dumps({'type': 'done'})}\n\n"
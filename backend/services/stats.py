@@ -0,0 +1,175 @@
+"""
+Vault statistics, maintained incrementally.
+Chunk, word, tag and concept totals (and concept co-occurrence) over ready
+documents are adjusted as documents become ready or are removed, so
+/vault/stats and insights never scan the catalogue. Document counts by
+status come from the metadata store's counters.
+"""
+import threading
+from collections import Counter
+from itertools import combinations
+
+from db.metadata import get_metadata_store
+from models.schemas import DocumentStatus
+
+_stats = None
+
+
+class _Frequencies:
+    """Case-insensitive term counts that keep the first spelling seen."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.labels = {}
+
+    def add(self, terms, delta: int):
+        for term in terms:
+            key = term.lower()
+            self.counts[key] += delta
+            if self.counts[key] <= 0:
+                del self.counts[key]
+                self.labels.pop(key, None)
+            else:
+                self.labels.setdefault(key, term)
+
+    def top(self, k: int) -> list:
+        return [{"name": self.labels[key], "count": n} for key, n in self.counts.most_common(k)]
+
+
+def _unique(terms) -> list:
+    seen = {}
+    for term in terms:
+        if term:
+            seen.setdefault(term.lower(), term)
+    return list(seen.values())
+
+
+def _pairs(concepts) -> list:
+    return list(combinations(sorted(c.lower() for c in concepts), 2))
+
+
+class VaultStats:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._contributions = {}  # doc id -> (chunks, words, tags, concepts, created_at)
+        self.chunks = 0
+        self.words = 0
+        self.tags = _Frequencies()
+        self.concepts = _Frequencies()
+        self.cooccurrence = Counter()  # (concept, concept) lowercased and sorted -> documents
+        self.loaded = False
+
+    def load(self, documents):
+        with self._lock:
+            for doc in documents:
+                self.add_document(doc)
+            self.loaded = True
+
+    def add_document(self, doc: dict):
+        with self._lock:
+            self.remove_document(doc["id"])
+            tags = _unique(doc.get("tags", []))
+            concepts = _unique(doc.get("key_concepts", []))
+            contribution = (
+                doc.get("chunk_count", 0), doc.get("word_count", 0), tags, concepts, doc.get("created_at", ""),
+            )
+            self._contributions[doc["id"]] = contribution
+            self._apply(contribution, 1)
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            contribution = self._contributions.pop(doc_id, None)
+            if contribution is not None:
+                self._apply(contribution, -1)
+
+    def _apply(self, contribution, sign: int):
+        chunks, words, tags, concepts, _ = contribution
+        self.chunks += sign * chunks
+        self.words += sign * words
+        self.tags.add(tags, sign)
+        self.concepts.add(concepts, sign)
+        for pair in _pairs(concepts):
+            self.cooccurrence[pair] += sign
+            if self.cooccurrence[pair] <= 0:
+                del self.cooccurrence[pair]
+
+    def window(self, since: str = "", top_k: int = 10) -> dict:
+        """Concept, tag and co-occurrence rankings over ready documents created
+        at or after `since` (ISO-8601; "" means all time)."""
+        with self._lock:
+            if not since:
+                return {
+                    "document_count": len(self._contributions),
+                    "tags": self.tags.top(top_k),
+                    "concepts": self.concepts.top(top_k),
+                    "cooccurrence": self._top_pairs(self.cooccurrence, self.concepts.labels, top_k),
+                }
+            tags, concepts, pairs, count = _Frequencies(), _Frequencies(), Counter(), 0
+            for _, _, doc_tags, doc_concepts, created_at in self._contributions.values():
+                if created_at >= since:
+                    count += 1
+                    tags.add(doc_tags, 1)
+                    concepts.add(doc_concepts, 1)
+                    pairs.update(_pairs(doc_concepts))
+            return {
+                "document_count": count,
+                "tags": tags.top(top_k),
+                "concepts": concepts.top(top_k),
+                "cooccurrence": self._top_pairs(pairs, concepts.labels, top_k),
+            }
+
+    @staticmethod
+    def _top_pairs(pairs: Counter, labels: dict, k: int) -> list:
+        return [
+            {"concepts": [labels.get(a, a), labels.get(b, b)], "count": n}
+            for (a, b), n in pairs.most_common(k)
+        ]
+
+    def summary(self, top_k: int = 10) -> dict:
+        store = get_metadata_store()
+        with self._lock:
+            top_tags = self.tags.top(top_k)
+            top_concepts = self.concepts.top(top_k)
+            return {
+                "total_documents": store.count(),
+                "ready_documents": len(self._contributions),
+                "documents_by_status": store.status_counts(),
+                "total_chunks": self.chunks,
+                "total_words": self.words,
+                "unique_tags": len(self.tags.counts),
+                "unique_concepts": len(self.concepts.counts),
+                "top_tags": [t["name"] for t in top_tags],
+                "top_concepts": [c["name"] for c in top_concepts],
+                "tag_frequencies": top_tags,
+                "concept_frequencies": top_concepts,
+            }
+
+
+def get_vault_counters() -> VaultStats:
+    """Shared counters, seeded from the ready documents on first use."""
+    global _stats
+    if _stats is None:
+        _stats = VaultStats()
+    if not _stats.loaded:
+        with _stats._lock:
+            if not _stats.loaded:
+                _stats.load(get_metadata_store().list(status=DocumentStatus.READY))
+    return _stats
+
+
+def update_stats(doc: dict):
+    # Same ordering rule as the graph index: the initial load picks up
+    # anything that became ready before it ran
+    if _stats is None:
+        return
+    with _stats._lock:
+        if _stats.loaded:
+            _stats.add_document(doc)
+
+
+def remove_from_stats(doc_id: str):
+    if _stats is None:
+        return
+    with _stats._lock:
+        if _stats.loaded:
+            _stats.remove_document(doc_id)
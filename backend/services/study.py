@@ -0,0 +1,58 @@
+"""
+Study mode: flashcards, quiz and key points for a document.
+Generated material is cached per document and extracted-text hash, and
+the text itself comes from the copy stored at ingestion rather than a
+fresh extraction of the upload.
+"""
+import os
+from datetime import datetime
+from typing import Optional
+
+from core.config import get_settings
+from db.metadata import get_metadata_store
+from services.extraction import extract_text_async
+from services.ingestion import normalize_text
+from services.summarizer import generate_study_content
+
+STUDY_EXCERPT_CHARS = 5000
+
+
+async def get_document_text(doc: dict) -> Optional[str]:
+    """Extracted text of a document, from the stored copy when there is one.
+
+    Documents ingested before text was stored are extracted once more and
+    the result is kept for next time.
+    """
+    store = get_metadata_store()
+    for doc_id in filter(None, (doc["id"], doc.get("chunk_source"))):
+        text = store.get_text(doc_id)
+        if text is not None:
+            return text
+
+    file_path = os.path.join(get_settings().upload_dir, doc["filename"])
+    try:
+        text, _ = await extract_text_async(file_path, doc["file_type"])
+    except Exception:
+        return None
+    text = normalize_text(text)
+    if text:
+        store.put_text(doc["id"], text)
+    return text
+
+
+async def get_study_content(doc: dict, regenerate: bool = False) -> dict:
+    """Cached study material for a ready document; `regenerate` forces a new LLM call."""
+    store = get_metadata_store()
+    text_hash = doc.get("text_hash") or ""
+    if not regenerate and text_hash:
+        cached = store.get_study(doc["id"], text_hash)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    text = await get_document_text(doc) or doc.get("summary", "")
+    result = await generate_study_content(text[:STUDY_EXCERPT_CHARS], doc["original_name"])
+
+    # Placeholder (no API key) and failed generations are not worth keeping
+    if text_hash and get_settings().openai_api_key and (result.get("flashcards") or result.get("quiz")):
+        store.put_study(doc["id"], text_hash, result, datetime.utcnow().isoformat())
+    return {**result, "cached": False}
@@ -3,21 +3,15 @@ LLM-powered summarization, tagging, and key concept extraction.
 Optimized: max_tokens caps + short prompts = 2-3x faster responses.
 """
 import json
+from typing import List, Optional
 from core.config import get_settings
+from services.llm import get_chat_model, ainvoke
 
 settings = get_settings()
 
 
 def _get_llm(max_tokens: int = 300):
-    if settings.openai_api_key:
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(
-            model=settings.llm_model,
-            openai_api_key=settings.openai_api_key,
-            temperature=0.2,
-            max_tokens=max_tokens,
-        )
-    return None
+    return get_chat_model(temperature=0.2, max_tokens=max_tokens)
 
 
 def _parse_json(content: str) -> dict:
@@ -53,7 +47,7 @@ JSON:
 
     try:
         from langchain_core.messages import HumanMessage
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await ainvoke(llm, [HumanMessage(content=prompt)])
         return _parse_json(response.content)
     except Exception as e:
         print(f"[Summarizer] {e}")
@@ -84,15 +78,20 @@ Text: {excerpt}
 
     try:
         from langchain_core.messages import HumanMessage
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await ainvoke(llm, [HumanMessage(content=prompt)])
         return _parse_json(response.content)
     except Exception as e:
         print(f"[StudyContent] {e}")
         return {"flashcards": [], "quiz": [], "summary": "", "key_points": []}
 
 
-async def generate_insights(documents: list) -> dict:
-    """Generate weekly insights from vault documents. Fast and concise."""
+async def generate_insights(
+    documents: list,
+    top_tags: Optional[List[str]] = None,
+    top_concepts: Optional[List[str]] = None,
+) -> dict:
+    """Generate weekly insights from vault documents. Fast and concise.
+    Pass frequency-ranked tags/concepts to use them instead of scanning `documents`."""
     llm = _get_llm(max_tokens=400)
     if not llm or not documents:
         return {
@@ -103,8 +102,11 @@ async def generate_insights(documents: list) -> dict:
             "suggested_connections": [],
         }
 
-    all_tags = list(set(t for d in documents for t in d.get("tags", [])))[:15]
-    all_concepts = list(set(c for d in documents for c in d.get("key_concepts", [])))[:15]
+    all_tags = (top_tags if top_tags is not None else list(set(t for d in documents for t in d.get("tags", []))))[:15]
+    all_concepts = (
+        top_concepts if top_concepts is not None
+        else list(set(c for d in documents for c in d.get("key_concepts", [])))
+    )[:15]
     doc_names = [d.get("original_name", "")[:30] for d in documents[:8]]
 
     prompt = f"""Vault insight for a knowledge worker. JSON only.
@@ -117,7 +119,7 @@ Concepts: {', '.join(all_concepts)}
 
     try:
         from langchain_core.messages import HumanMessage
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await ainvoke(llm, [HumanMessage(content=prompt)])
         result = _parse_json(response.content)
         result["learning_streaks"] = len(documents)
         result["document_count"] = len(documents)
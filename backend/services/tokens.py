@@ -0,0 +1,73 @@
+"""
+Token counting for prompt budgets and chunk sizing.
+Uses the tiktoken encoding of the configured LLM; if it cannot be loaded
+(e.g. no network to fetch the BPE file) falls back to ~4 characters per token.
+"""
+import threading
+from typing import Callable
+
+from core.config import get_settings
+
+_encoding = None
+_encoding_loaded = False
+_lock = threading.Lock()
+
+
+def get_encoding():
+    """tiktoken encoding for the LLM model, or None when unavailable."""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                try:
+                    _encoding = tiktoken.encoding_for_model(get_settings().llm_model)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"[Tokens] tiktoken unavailable, estimating tokens from length: {e}")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def get_tokenizer(name: str = "") -> Callable[[str], int]:
+    """Token counter by name: "" for the LLM's encoding, "estimate" for the
+    length heuristic, anything else a tiktoken encoding (e.g. "cl100k_base")."""
+    if not name:
+        return count_tokens
+    if name == "estimate":
+        return estimate_tokens
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(name)
+    except Exception as e:
+        print(f"[Tokens] Encoding {name!r} unavailable, estimating tokens from length: {e}")
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Leading part of `text` that fits in `max_tokens`."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,30 @@
+"""
+Vault versions for cache validation.
+The content version is bumped when a document finishes ingestion or is
+deleted (what the graph and insights are built from); the catalogue version
+changes on any document record write (what listings and stats show).
+Both are in-memory, so ETags also carry a per-process boot id.
+"""
+import threading
+import uuid
+
+from db.metadata import get_metadata_store
+
+BOOT_ID = uuid.uuid4().hex[:8]
+
+_content_version = 0
+_lock = threading.Lock()  # deletes bump it from worker threads
+
+
+def bump_content_version():
+    global _content_version
+    with _lock:
+        _content_version += 1
+
+
+def content_version() -> int:
+    return _content_version
+
+
+def catalog_version() -> int:
+    return get_metadata_store().version
@@ -0,0 +1,94 @@
+"""
+Shared test setup: an isolated vault (temporary uploads, databases and
+Chroma collection), a deterministic fake embedder and no LLM, so the
+suite runs offline.
+
+    cd backend && python -m pytest tests
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+_root = tempfile.mkdtemp(prefix="astraos-tests-")
+IMPORT_ROOT = os.path.join(_root, "import-root")  # the only directory imports may read
+os.environ.update({
+    "OPENAI_API_KEY": "sk-test",
+    "EMBEDDING_MODEL": "openai",
+    "CHROMA_PERSIST_DIR": os.path.join(_root, "chroma"),
+    "METADATA_DB_PATH": os.path.join(_root, "vault.db"),
+    "UPLOAD_DIR": os.path.join(_root, "uploads"),
+    "EMBEDDING_CACHE_PATH": os.path.join(_root, "embedding_cache.db"),
+    "CHUNK_TOKENIZER": "estimate",
+    "EXTRACT_PROCESSES": "2",
+    "INGEST_RETRY_BACKOFF_S": "0.01",
+    "WARMUP_IN_BACKGROUND": "false",
+    "BULK_IMPORT_ROOTS": IMPORT_ROOT,
+    "BULK_IMPORT_POLL_S": "0.02",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+class FakeEmbedder:
+    """16-dimensional vectors derived from a hash of the text."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255 for b in digest[:16]]
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The API with its lifespan running (queue, writer, warm-up)."""
+    import services.embedder as embedder
+    import services.rag as rag
+    import services.summarizer as summarizer
+
+    embedder._embedder = FakeEmbedder()
+    summarizer._get_llm = lambda *args, **kwargs: None
+    rag._get_llm = lambda *args, **kwargs: None
+
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def upload(client):
+    """Upload text as a file; returns the document id."""
+    def _upload(name: str, text: str, **params) -> str:
+        response = client.post(
+            "/api/vault/upload",
+            files={"file": (name, text.encode("utf-8"), "text/plain")},
+            params=params,
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return _upload
+
+
+@pytest.fixture
+def wait_ready(client):
+    """Poll until a document leaves pending/processing; returns its record."""
+    def _wait(doc_id: str, timeout: float = 30.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            doc = client.get(f"/api/vault/documents/{doc_id}").json()
+            if doc["status"] in ("ready", "error"):
+                return doc
+            time.sleep(0.02)
+        raise AssertionError(f"{doc_id} still processing after {timeout}s")
+    return _wait
+
+
+def prose(sentences: int, topic: str = "vault") -> str:
+    """Distinct sentences, about 12 tokens each."""
+    return " ".join(f"Sentence {i} explains how the {topic} keeps item {i} searchable." for i in range(sentences))
@@ -0,0 +1,46 @@
+import services.answer_cache as answer_cache
+from services.answer_cache import AnswerCache
+
+CHUNKS = ["a_chunk_0", "b_chunk_3"]
+
+
+def _cache(**kwargs) -> AnswerCache:
+    return AnswerCache(**{"max_entries": 10, "ttl_s": 60, "threshold": 0.95, **kwargs})
+
+
+def test_similar_question_over_the_same_chunks_hits():
+    cache = _cache()
+    cache.put([1.0, 0.0], None, CHUNKS, [], "cached answer", ["a", "b"])
+
+    assert cache.get([2.0, 0.1], None, CHUNKS, []) == "cached answer"  # scale does not matter
+    assert cache.get([0.6, 0.8], None, CHUNKS, []) is None  # too dissimilar
+    assert cache.get([1.0, 0.0], None, CHUNKS[:1], []) is None  # different chunks retrieved
+    assert cache.get([1.0, 0.0], ["a"], CHUNKS, []) is None  # different document filter
+    assert cache.get([1.0, 0.0], None, CHUNKS, [{"role": "user", "content": "hi"}]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 4
+
+
+def test_documents_invalidate_their_answers():
+    cache = _cache()
+    cache.put([1.0, 0.0], None, CHUNKS, [], "from a and b", ["a", "b"])
+    cache.put([0.0, 1.0], ["c"], ["c_chunk_0"], [], "from c", ["c"])
+
+    cache.invalidate_documents(["b"])
+    assert cache.get([1.0, 0.0], None, CHUNKS, []) is None
+    assert cache.get([0.0, 1.0], ["c"], ["c_chunk_0"], []) == "from c"
+    assert cache.stats()["entries"] == 1 and cache.stats()["invalidations"] == 1
+    assert "a" not in cache._by_document  # no index entries left behind
+
+
+def test_entries_expire_and_are_evicted_oldest_first(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: clock[0])
+    cache = _cache(max_entries=2, ttl_s=30)
+    for i in range(3):
+        cache.put([1.0, float(i)], None, [f"chunk_{i}"], [], f"answer {i}", ["a"])
+    assert cache.get([1.0, 0.0], None, ["chunk_0"], []) is None  # evicted
+    assert cache.get([1.0, 2.0], None, ["chunk_2"], []) == "answer 2"
+
+    clock[0] += 31
+    assert cache.get([1.0, 2.0], None, ["chunk_2"], []) is None
+    assert cache.stats()["entries"] == 1
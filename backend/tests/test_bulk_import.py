@@ -0,0 +1,239 @@
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+from conftest import IMPORT_ROOT, prose
+
+import services.bulk_import as bulk_import
+from db.metadata import get_metadata_store
+from services.bulk_import import LINK_OUTSIDE_ROOT, archive_dir, scan_directory
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _tree(files: dict) -> str:
+    """A fresh directory under the import root holding `files` (relative path -> text)."""
+    root = os.path.join(IMPORT_ROOT, uuid.uuid4().hex[:8])
+    for path, text in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(text)
+    return root
+
+
+def _finished(client, import_id: str, timeout: float = 30.0) -> dict:
+    """Poll until the import stops running and its documents have settled."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = client.get(f"/api/vault/imports/{import_id}").json()
+        if record["status"] != "running" and not record["progress"]["processing"] and import_id not in bulk_import._runs:
+            return record
+        time.sleep(0.02)
+    raise AssertionError(f"import {import_id} still running after {timeout}s")
+
+
+def _names(record: dict) -> dict:
+    return {f["path"]: f["error"] for f in record["failures"]}
+
+
+def _documents_named(client, prefix: str) -> dict:
+    docs = client.get("/api/vault/documents", params={"fields": "original_name,status"}).json()["documents"]
+    return {d["original_name"]: d["status"] for d in docs if d["original_name"].startswith(prefix)}
+
+
+def test_directory_import_skips_what_it_cannot_ingest(client):
+    root = _tree({
+        "dir-notes/a.txt": prose(3, "alpha"),
+        "dir-notes/sub/b.md": prose(3, "beta"),
+        "dir-notes/photo.png": "not an image",
+        "dir-notes/.hidden.txt": "dotfiles are left out",
+    })
+    assert client.post("/api/vault/imports/directory", json={"path": "/etc"}).status_code == 403
+    assert client.post("/api/vault/imports/directory", json={"path": os.path.join(root, "nope")}).status_code == 400
+
+    created = client.post("/api/vault/imports/directory", json={"path": root}).json()
+    assert created["total"] == 3
+    record = _finished(client, created["id"])
+
+    assert record["status"] == "completed"
+    assert record["progress"] == {"pending": 0, "processing": 0, "done": 2, "failed": 0, "skipped": 1}
+    assert _names(record) == {"dir-notes/photo.png": "File type not supported."}
+    assert _documents_named(client, "dir-notes/") == {"dir-notes/a.txt": "ready", "dir-notes/sub/b.md": "ready"}
+
+
+def test_links_leaving_the_import_root_are_skipped(client):
+    outside = tempfile.mkdtemp(prefix="astraos-outside-")
+    with open(os.path.join(outside, "secret.txt"), "w") as f:
+        f.write("private key material")
+    root = _tree({"links/own.txt": prose(3, "owned")})
+    os.symlink(os.path.join(outside, "secret.txt"), os.path.join(root, "links", "leak.txt"))
+    os.symlink(os.path.join(root, "links", "own.txt"), os.path.join(root, "links", "alias.txt"))
+    os.symlink(outside, os.path.join(root, "links", "outside-dir"))  # directory links are not walked
+
+    record = _finished(client, client.post("/api/vault/imports/directory", json={"path": root}).json()["id"])
+    assert record["progress"]["skipped"] == 1 and record["progress"]["done"] == 2
+    assert _names(record) == {"links/leak.txt": LINK_OUTSIDE_ROOT}
+    assert set(_documents_named(client, "links/")) == {"links/own.txt", "links/alias.txt"}
+
+    # A link swapped in after the scan is caught when the file is copied
+    os.remove(os.path.join(root, "links", "alias.txt"))
+    os.symlink(os.path.join(outside, "secret.txt"), os.path.join(root, "links", "alias.txt"))
+    record = {"id": "swap", "kind": "directory", "source": os.path.realpath(root), "archive": ""}
+    copied = bulk_import._copy_window(record, [{"seq": 0, "path": "links/alias.txt"}])
+    assert copied == [{"seq": 0, "error": LINK_OUTSIDE_ROOT}]
+
+
+def test_oversized_files_are_skipped_by_the_scan(monkeypatch):
+    from core.config import get_settings
+
+    root = _tree({"big/small.txt": "fine"})
+    with open(os.path.join(root, "big", "huge.txt"), "wb") as f:
+        f.truncate(2 * 1024 * 1024)
+    monkeypatch.setattr(get_settings(), "max_file_size_mb", 1)
+    assert scan_directory(root) == [
+        ("big/huge.txt", 2 * 1024 * 1024, "skipped", "File too large. Max size: 1MB"),
+        ("big/small.txt", 4, "pending", ""),
+    ]
+
+
+def test_zip_import(client):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("zip-notes/", "")
+        archive.writestr("zip-notes/one.txt", prose(3, "zipone"))
+        archive.writestr("zip-notes/two.md", prose(3, "ziptwo"))
+        archive.writestr("zip-notes/tool.exe", "binary")
+        archive.writestr("__MACOSX/zip-notes/._one.txt", "resource fork")
+
+    response = client.post("/api/vault/imports", files={"file": ("notes.zip", buffer.getvalue(), "application/zip")})
+    assert response.status_code == 200
+    record = _finished(client, response.json()["id"])
+
+    assert record["status"] == "completed" and record["kind"] == "zip" and record["total"] == 3
+    assert record["progress"]["done"] == 2 and record["progress"]["skipped"] == 1
+    assert _documents_named(client, "zip-notes/") == {"zip-notes/one.txt": "ready", "zip-notes/two.md": "ready"}
+    assert os.listdir(archive_dir()) == []  # the uploaded archive is removed when done
+
+    bad = client.post("/api/vault/imports", files={"file": ("bad.zip", b"not a zip", "application/zip")})
+    assert bad.status_code == 400
+    assert client.post("/api/vault/imports", files={"file": ("notes.tar", b"x", "application/x-tar")}).status_code == 400
+
+
+def test_unchunkable_file_fails_alone(client, monkeypatch):
+    import services.ingestion as ingestion
+
+    chunk_pages = ingestion._chunk_pages
+
+    def failing(job):
+        if job.payload["original_name"].endswith("broken.txt"):
+            raise RuntimeError("cannot chunk")
+        return chunk_pages(job)
+
+    monkeypatch.setattr(ingestion, "_chunk_pages", failing)
+    root = _tree({f"chunking/{name}.txt": prose(3, name) for name in ("fine1", "broken", "fine2")})
+    record = _finished(client, client.post("/api/vault/imports/directory", json={"path": root}).json()["id"])
+
+    assert record["status"] == "completed"
+    assert record["progress"]["done"] == 2 and record["progress"]["failed"] == 1
+    assert _documents_named(client, "chunking/") == {
+        "chunking/fine1.txt": "ready", "chunking/broken.txt": "error", "chunking/fine2.txt": "ready",
+    }
+
+
+def test_cancel_stops_after_the_current_window(client, monkeypatch):
+    from core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "bulk_import_window", 1)
+    gate = threading.Event()
+    ingest_registered = bulk_import.ingest_registered
+
+    async def held(docs):
+        while not gate.is_set():
+            await asyncio.sleep(0.01)
+        await ingest_registered(docs)
+
+    monkeypatch.setattr(bulk_import, "ingest_registered", held)
+    root = _tree({f"cancel/{i}.txt": prose(2, f"cancel{i}") for i in range(5)})
+    import_id = client.post("/api/vault/imports/directory", json={"path": root}).json()["id"]
+    assert client.delete(f"/api/vault/imports/{import_id}").json()["status"] == "cancelled"
+    gate.set()
+    record = _finished(client, import_id)
+
+    assert record["status"] == "cancelled"
+    assert record["progress"]["done"] == 1 and record["progress"]["pending"] == 4
+    assert client.delete("/api/vault/imports/missing").status_code == 404
+
+
+def test_interrupted_import_resumes_from_its_manifest(client):
+    root = os.path.realpath(_tree({f"resume/{i}.txt": prose(2, f"resume{i}") for i in range(4)}))
+    store = get_metadata_store()
+    # As a previous process left it: still running, first file failed, the rest never registered
+    import_id = str(uuid.uuid4())
+    now = "2026-01-01T00:00:00"
+    store.create_import(
+        {"id": import_id, "kind": "directory", "source": root, "archive": "", "status": "running",
+         "total": 4, "created_at": now, "updated_at": now},
+        scan_directory(root),
+    )
+    store.set_import_files(import_id, [(0, "failed", "", "disk error")])
+
+    async def resume():
+        return bulk_import.resume_imports(source=root)
+
+    assert client.portal.call(resume) == 1
+    record = _finished(client, import_id)
+    assert record["status"] == "completed"
+    assert record["progress"]["done"] == 3 and record["progress"]["failed"] == 1
+    assert set(_documents_named(client, "resume/")) == {"resume/1.txt", "resume/2.txt", "resume/3.txt"}
+
+
+_CLI = """
+import os, sys
+sys.path.insert(0, "tests")
+environ = dict(os.environ)
+import conftest  # noqa: E402 (for FakeEmbedder; keep this run's own directories)
+os.environ.update(environ)
+import services.embedder, services.summarizer
+services.embedder._embedder = conftest.FakeEmbedder()
+services.summarizer._get_llm = lambda *args, **kwargs: None
+import cli
+sys.argv = ["cli.py", *sys.argv[1:]]
+sys.exit(cli.main())
+"""
+
+
+def test_cli_import(tmp_path):
+    source = tmp_path / "export"
+    source.mkdir()
+    for i in range(3):
+        (source / f"page{i}.txt").write_text(prose(3, f"cli{i}"))
+    (source / "image.gif").write_text("gif")
+    env = {
+        **os.environ,
+        "CHROMA_PERSIST_DIR": str(tmp_path / "chroma"),
+        "METADATA_DB_PATH": str(tmp_path / "vault.db"),
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+        "EMBEDDING_CACHE_PATH": str(tmp_path / "embedding_cache.db"),
+    }
+
+    def run(*args):
+        return subprocess.run(
+            [sys.executable, "-c", _CLI, *args], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120,
+        )
+
+    result = run("import", str(source), "--interval", "0.1")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "3 done, 0 processing, 0 pending, 0 failed, 1 skipped (completed)" in result.stdout
+    assert "skipped: image.gif" in result.stdout
+
+    listed = run("imports")
+    assert listed.returncode == 0 and str(source) in listed.stdout
+    assert run("import", str(tmp_path / "missing")).returncode == 2
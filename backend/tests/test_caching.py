@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import api.caching as caching
+from api.caching import versioned_json
+
+state = {"version": 1, "builds": 0}
+
+
+def _build() -> dict:
+    state["builds"] += 1
+    return {"version": state["version"], "build": state["builds"]}
+
+
+async def _build_async() -> dict:
+    return _build()
+
+
+app = FastAPI()
+
+
+@app.get("/thing")
+async def thing(request: Request, kind: str = "plain"):
+    build = _build_async if kind == "async" else _build
+    return await versioned_json(request, f"thing?{kind}", state["version"], build)
+
+
+@pytest.fixture
+def http(monkeypatch):
+    monkeypatch.setattr(caching, "_bodies", OrderedDict())
+    state.update(version=1, builds=0)
+    return TestClient(app)
+
+
+def test_matching_etag_gets_an_empty_304(http):
+    first = http.get("/thing")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = http.get("/thing", headers={"If-None-Match": header})
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag
+    assert http.get("/thing", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert state["builds"] == 1  # neither a 304 nor a memo hit rebuilds
+
+
+def test_body_is_reused_until_the_version_changes(http):
+    first = http.get("/thing").json()
+    assert http.get("/thing").json() == first
+    assert state["builds"] == 1
+
+    old_etag = http.get("/thing").headers["etag"]
+    state["version"] = 2
+    bumped = http.get("/thing", headers={"If-None-Match": old_etag})
+    assert bumped.status_code == 200
+    assert bumped.json() == {"version": 2, "build": 2}
+    assert bumped.headers["etag"] != old_etag
+
+
+def test_keys_are_memoized_separately_and_async_builds_are_awaited(http, monkeypatch):
+    monkeypatch.setattr(caching, "MAX_BODIES", 1)
+    plain = http.get("/thing").json()
+    assert http.get("/thing", params={"kind": "async"}).json() == {"version": 1, "build": 2}
+    assert http.get("/thing").headers["etag"] != http.get("/thing", params={"kind": "async"}).headers["etag"]
+    # Only one body fits, so the keys keep evicting each other
+    assert http.get("/thing").json() != plain
+    assert len(caching._bodies) == 1
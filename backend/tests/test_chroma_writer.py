@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+import db.chroma as chroma
+from db.chroma import ChromaWriter, RECORD_OVERHEAD_BYTES
+
+
+class FakeCollection:
+    """In-memory stand-in for a Chroma collection; fails upserts containing a poisoned id."""
+
+    def __init__(self, poisoned=()):
+        self.rows = {}  # id -> metadata
+        self.upserts = []  # ids per upsert call, in order
+        self.poisoned = set(poisoned)
+        self.counts = 0  # count() round trips
+        self.lock = threading.Lock()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        with self.lock:
+            if self.poisoned & set(ids):
+                raise RuntimeError("upsert rejected")
+            self.upserts.append(list(ids))
+            self.rows.update(zip(ids, metadatas))
+
+    def _matching(self, ids=None, where=None):
+        if ids is not None:
+            return [i for i in ids if i in self.rows]
+        key, value = next(iter(where.items()))
+        allowed = value["$in"] if isinstance(value, dict) else [value]
+        return [i for i, meta in self.rows.items() if meta.get(key) in allowed]
+
+    def get(self, ids=None, where=None, include=None):
+        with self.lock:
+            return {"ids": self._matching(ids, where)}
+
+    def delete(self, ids=None, where=None):
+        with self.lock:
+            for i in self._matching(ids, where):
+                del self.rows[i]
+
+    def count(self):
+        self.counts += 1
+        return len(self.rows)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    fake = FakeCollection(poisoned={"bad_chunk_0"})
+    monkeypatch.setattr(chroma, "get_collection", lambda: fake)
+    monkeypatch.setattr(chroma, "max_batch_size", lambda: 1000)
+    monkeypatch.setattr(chroma, "_chunk_count", None)
+    return fake
+
+
+@pytest.fixture
+def make_writer(monkeypatch):
+    writers = []
+
+    def _make(max_batch=100, max_batch_bytes=1 << 20, flush_ms=10_000):
+        writer = ChromaWriter(max_batch=max_batch, max_batch_bytes=max_batch_bytes, flush_ms=flush_ms)
+        monkeypatch.setattr(chroma, "_writer", writer)  # what delete_chunks flushes
+        writers.append(writer)
+        return writer
+
+    yield _make
+    for writer in writers:
+        writer.close()
+
+
+def _chunks(doc_id: str, n: int, text: str = "x") -> tuple:
+    ids = [f"{doc_id}_chunk_{i}" for i in range(n)]
+    return ids, [[0.0] * 4] * n, [text] * n, [{"document_id": doc_id, "chunk_index": i} for i in range(n)]
+
+
+def test_writes_from_several_documents_coalesce_and_flush_on_timeout(collection, make_writer):
+    writer = make_writer(flush_ms=30)
+    futures = [writer.submit(*_chunks(doc, 3)) for doc in ("a", "b", "c")]
+    assert [f.result(timeout=5) for f in futures] == [3, 3, 3]  # no explicit flush
+    assert collection.upserts == [[f"{doc}_chunk_{i}" for doc in "abc" for i in range(3)]]
+    assert chroma.get_chunk_count() == 9
+
+
+def test_flushes_are_split_by_records_and_bytes(collection, make_writer):
+    writer = make_writer(max_batch=4)
+    future = writer.submit(*_chunks("a", 10))
+    writer.flush(timeout=5)
+    assert future.result(timeout=5) == 10
+    assert [len(ids) for ids in collection.upserts] == [4, 4, 2]
+
+    record = 4 * 4 + 100 + RECORD_OVERHEAD_BYTES  # vector, text and overhead
+    collection.upserts.clear()
+    writer = make_writer(max_batch=100, max_batch_bytes=3 * record)
+    writer.submit(*_chunks("b", 7, text="y" * 100)).result(timeout=5)  # the byte limit is reached at once
+    assert [len(ids) for ids in collection.upserts] == [3, 3, 1]
+
+
+def test_a_failed_batch_fails_every_caller_in_it(collection, make_writer):
+    writer = make_writer(max_batch=3)
+    ok = writer.submit(*_chunks("ok", 3))
+    bad = writer.submit(*_chunks("bad", 2))  # shares its batch with other_0
+    other = writer.submit(*_chunks("other", 2))
+    writer.flush(timeout=5)
+
+    assert ok.result(timeout=5) == 3
+    for future in (bad, other):
+        with pytest.raises(RuntimeError, match="upsert rejected"):
+            future.result(timeout=5)
+    assert set(collection.rows) == {"ok_chunk_0", "ok_chunk_1", "ok_chunk_2", "other_chunk_1"}
+    assert writer.stats()["errors"] == 1
+
+
+def test_deletes_never_overtake_buffered_upserts(collection, make_writer):
+    writer = make_writer()
+    buffered = writer.submit(*_chunks("a", 3))
+    assert not buffered.done()  # waiting out the flush window
+
+    assert sorted(chroma.delete_chunks(where={"document_id": "a"})) == ["a_chunk_0", "a_chunk_1", "a_chunk_2"]
+    assert buffered.result(timeout=0) == 3 and collection.rows == {}
+
+    writer.submit(*_chunks("b", 2))
+    chroma.delete_document_chunks(["b"])
+    assert collection.rows == {}
+    assert chroma.get_chunk_count() == 0
+
+
+def test_close_drains_the_buffer(collection):
+    writer = ChromaWriter(max_batch=100, max_batch_bytes=1 << 20, flush_ms=10_000)
+    future = writer.submit(*_chunks("a", 2))
+    writer.close()
+    assert future.result(timeout=0) == 2 and len(collection.rows) == 2
+    with pytest.raises(RuntimeError):
+        writer.submit(*_chunks("b", 1))
+
+
+def test_deleting_documents_keeps_the_chunk_count_without_recounting(collection):
+    for doc in ("a", "b", "c"):
+        chroma.upsert_chunks(*_chunks(doc, 3))
+    assert chroma.get_chunk_count() == 9
+    collection.rows["a_chunk_99"] = {"document_id": "a"}  # a stray the count never saw
+    chroma._adjust_chunk_count(1)
+
+    chroma.delete_document_chunks(["a", "b", "missing"])
+    assert chroma.get_chunk_count() == 3 == len(collection.rows)
+    assert collection.counts == 1  # only the first lookup went to the collection
@@ -0,0 +1,58 @@
+import random
+
+from services.chunker import TextChunker
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def _text(paragraphs: int = 12) -> str:
+    rng = random.Random(7)
+    vocabulary = ["vault", "index", "chunk", "token", "page", "query", "answer", "cache"]
+    out = []
+    for p in range(paragraphs):
+        sentences = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 30))).capitalize() + rng.choice(".!?")
+            for _ in range(rng.randint(1, 6))
+        ]
+        out.append(" ".join(sentences))
+    out.append("x" * 500)  # one word longer than a chunk
+    return "\n\n".join(out)
+
+
+def _strip(chunks: list) -> list:
+    return [(c["content"], c["metadata"]["chunk_index"], c["metadata"]["token_count"]) for c in chunks]
+
+
+def test_stream_matches_chunk_text_for_any_split():
+    chunker = TextChunker(chunk_tokens=40, overlap_tokens=8, tokenizer=_words)
+    text = _text()
+    expected = _strip(chunker.chunk_text(text, {"document_id": "d"}))
+    assert len(expected) > 5
+
+    rng = random.Random(1)
+    for _ in range(20):
+        cuts = sorted(rng.sample(range(1, len(text)), 15))  # mid-word and mid-boundary included
+        pieces = [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+        stream = chunker.stream({"document_id": "d"})
+        chunks = [c for piece in pieces for c in stream.feed(piece)] + stream.close()
+        assert _strip(chunks) == expected
+        assert all(c["metadata"]["document_id"] == "d" for c in chunks)
+
+
+def test_stream_records_the_page_each_chunk_starts_on():
+    chunker = TextChunker(chunk_tokens=10, overlap_tokens=0, tokenizer=_words)
+    stream = chunker.stream({})
+    chunks = stream.feed("One two three four five six. Seven eight", page_number=1)
+    chunks += stream.feed(" nine ten eleven. Twelve thirteen.", page_number=2)
+    chunks += stream.feed("\n\nFourteen fifteen sixteen seventeen.", page_number=3)
+    chunks += stream.close()
+
+    assert [c["content"] for c in chunks] == [
+        "One two three four five six.",
+        "Seven eight nine ten eleven. Twelve thirteen.",
+        "Fourteen fifteen sixteen seventeen.",
+    ]
+    assert [c["metadata"]["page_number"] for c in chunks] == [1, 1, 3]
+    assert stream.chunk_count == 3
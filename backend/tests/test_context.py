@@ -0,0 +1,67 @@
+import pytest
+
+import services.context as context
+from services.context import SEPARATOR, build_context, trim_history
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """One token per word, so budgets are easy to reason about."""
+    monkeypatch.setattr(context, "count_tokens", _words)
+    monkeypatch.setattr(context, "truncate_to_tokens", lambda text, n: " ".join(text.split()[:n]))
+
+
+def _chunk(doc: str, index: int, words: range, score: float) -> dict:
+    return {
+        "document_id": doc,
+        "document_name": doc.upper(),
+        "chunk_index": index,
+        "content": " ".join(f"w{i}" for i in words),
+        "score": score,
+    }
+
+
+def test_neighbouring_chunks_share_their_overlap_once():
+    chunks = [
+        _chunk("a", 0, range(0, 10), 0.7),
+        _chunk("a", 1, range(8, 20), 0.9),  # repeats w8 w9 from chunk 0
+        _chunk("b", 4, range(100, 105), 0.8),
+    ]
+    text, used = build_context(chunks, budget_tokens=1000)
+
+    assert text == SEPARATOR.join([
+        "[A]\n" + " ".join(f"w{i}" for i in range(20)),
+        "[B]\nw100 w101 w102 w103 w104",
+    ])
+    assert [(c["document_id"], c["chunk_index"]) for c in used] == [("a", 1), ("b", 4), ("a", 0)]
+
+
+def test_budget_keeps_the_best_chunks_and_cuts_the_last_one():
+    chunks = [_chunk(f"d{i}", 0, range(i * 100, i * 100 + 60), 1.0 - i / 10) for i in range(5)]
+    text, used = build_context(chunks, budget_tokens=180)
+
+    assert [c["document_id"] for c in used] == ["d0", "d1", "d2"]
+    assert _words(text) <= 180
+    assert text.endswith(" …")  # d2 only partly fits
+    assert "w254" not in text and "w253" in text
+
+    # Less room than MIN_PARTIAL_TOKENS left: no stub of a chunk is added
+    text, used = build_context(chunks, budget_tokens=170)
+    assert [c["document_id"] for c in used] == ["d0", "d1"]
+    assert "…" not in text
+
+
+def test_trim_history_keeps_the_newest_messages_that_fit():
+    history = [
+        {"role": "user", "content": "one two three"},
+        {"role": "assistant", "content": "four five"},
+        {"role": "system", "content": "ignored"},
+        {"role": "user", "content": "six"},
+    ]
+    assert trim_history(history, 11) == [history[1], history[3]]  # 4 + 2 and 4 + 1 tokens
+    assert trim_history(history, 4) == []
+    assert trim_history(None, 100) == []
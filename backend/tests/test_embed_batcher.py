@@ -0,0 +1,37 @@
+import asyncio
+
+import services.embed_batcher as embed_batcher
+from services.embed_batcher import EmbeddingBatcher
+
+
+def _fake_embed(calls):
+    def embed_texts(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+    return embed_texts
+
+
+def test_concurrent_requests_share_a_batch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embed_batcher, "embed_texts", _fake_embed(calls))
+    batcher = EmbeddingBatcher(window_ms=20, max_batch=64, max_batch_tokens=10_000)
+
+    async def scenario():
+        return await asyncio.gather(batcher.embed(["a", "bb"]), batcher.embed(["ccc"]))
+
+    assert asyncio.run(scenario()) == [[[1.0], [2.0]], [[3.0]]]
+    assert calls == [["a", "bb", "ccc"]]
+    assert batcher.stats()["batches"] == 1
+    assert not batcher._tasks
+
+
+def test_full_window_is_split_by_batch_size(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embed_batcher, "embed_texts", _fake_embed(calls))
+    batcher = EmbeddingBatcher(window_ms=1000, max_batch=2, max_batch_tokens=10_000)
+
+    async def scenario():
+        return await batcher.embed(["a", "bb", "ccc"])  # flushes at once, without waiting out the window
+
+    assert asyncio.run(scenario()) == [[1.0], [2.0], [3.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
@@ -0,0 +1,67 @@
+import threading
+
+from services.embedding_cache import EmbeddingCache
+
+VECTOR = [0.1, -0.5, 0.333333, 1.0, 0.0]
+VECTOR_BYTES = len(VECTOR) * 2  # float16
+
+
+def test_float16_round_trip_and_model_isolation(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_bytes=1 << 20)
+    cache.put_many("model-a", ["hello"], [VECTOR])
+
+    found = cache.get_many("model-a", ["hello", "other"])
+    assert list(found) == [0]
+    assert all(abs(x - y) <= 1e-3 * max(1.0, abs(y)) for x, y in zip(found[0], VECTOR))
+    assert cache.get_many("model-b", ["hello"]) == {}  # keyed by model too
+    assert cache.bytes == VECTOR_BYTES
+
+    exact = EmbeddingCache(str(tmp_path / "exact.db"), max_bytes=1 << 20, dtype="float32")
+    exact.put_many("model-a", ["hello"], [[0.5, -2.0]])
+    assert exact.get_many("model-a", ["hello"]) == {0: [0.5, -2.0]}
+    cache.close()
+    exact.close()
+
+
+def test_hits_and_misses_are_counted_per_text(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_bytes=1 << 20)
+    cache.put_many("m", [f"t{i}" for i in range(10)], [VECTOR] * 10)
+
+    def lookups():
+        for _ in range(50):
+            cache.get_many("m", ["t1", "t2", "t1", "missing"])
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["hits"] == 8 * 50 * 3 and stats["misses"] == 8 * 50
+    assert stats["hit_rate"] == 0.75
+    cache.close()
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path, monkeypatch):
+    import services.embedding_cache as embedding_cache
+
+    clock = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: clock[0])
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(path, max_bytes=4 * VECTOR_BYTES)
+    for i in range(4):
+        clock[0] += 1
+        cache.put_many("m", [f"t{i}"], [VECTOR])
+    clock[0] += 1
+    assert cache.get_many("m", ["t0"])  # t0 is now the most recently used
+
+    clock[0] += 1
+    cache.put_many("m", ["t4"], [VECTOR])  # over budget: evict down to 90%
+    remaining = cache.get_many("m", [f"t{i}" for i in range(5)])
+    assert sorted(remaining) == [0, 3, 4]
+    assert cache.stats()["evictions"] == 2 and cache.entries == 3
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_bytes=4 * VECTOR_BYTES)
+    assert (reopened.entries, reopened.bytes) == (3, 3 * VECTOR_BYTES)
+    reopened.close()
@@ -0,0 +1,126 @@
+from core.pagination import encode_cursor
+from services.graph import GraphIndex
+
+
+def _doc(i: int, concepts, tags=()) -> dict:
+    return {"id": f"doc{i:02d}", "original_name": f"Doc {i}", "key_concepts": list(concepts), "tags": list(tags)}
+
+
+def _index() -> GraphIndex:
+    index = GraphIndex()
+    index.load([
+        _doc(i, [f"c{i % 3}", f"c{i % 4}"], ["even"] if i % 2 == 0 else ["odd"])
+        for i in range(12)
+    ])
+    return index
+
+
+def _pairs(edges) -> list:
+    return sorted(tuple(sorted((e["source"], e["target"]))) for e in edges)
+
+
+def _walk(index: GraphIndex, limit: int, **filters) -> tuple:
+    nodes, edges, after = [], [], None
+    while True:
+        page = index.page(after=after, limit=limit, **filters)
+        nodes.extend(n["id"] for n in page["nodes"])
+        edges.extend(page["edges"])
+        after = page["next"]
+        if after is None:
+            return nodes, edges
+
+
+def test_pages_together_form_the_whole_graph():
+    index = _index()
+    full = index.snapshot()
+    for limit in (1, 5, 1000):
+        nodes, edges = _walk(index, limit)
+        assert sorted(nodes) == sorted(n["id"] for n in full["nodes"])
+        assert len(nodes) == len(set(nodes))
+        assert _pairs(edges) == _pairs(full["edges"])  # every edge exactly once
+
+
+def test_filtered_pages_form_the_induced_subgraph():
+    index = _index()
+    nodes, edges = _walk(index, 4, node_type="document", tag="even")
+    assert nodes == [f"doc{i:02d}" for i in range(0, 12, 2)]
+    assert _pairs(edges) == _pairs(index._induced(nodes)["edges"])
+
+
+def test_top_nodes_and_neighborhood():
+    index = _index()
+    top = index.top_nodes(2, node_type="tag")
+    assert {n["label"] for n in top["nodes"]} == {"#even", "#odd"}
+    assert all(n["degree"] == 6 for n in top["nodes"])
+
+    near = index.neighborhood("doc00", depth=1)
+    ids = {n["id"] for n in near["nodes"]}
+    assert ids >= {"doc00", "doc04", "doc08", "doc03", "doc06", "doc09"}  # documents sharing concept c0
+    assert all("doc00" in (e["source"], e["target"]) or e["source"] in ids for e in near["edges"])
+    assert len(index.neighborhood("doc00", depth=3, limit=5)["nodes"]) == 5
+    assert index.neighborhood("missing") is None
+
+
+def test_graph_routes(client, upload, wait_ready):
+    from conftest import prose
+
+    for i in range(3):
+        wait_ready(upload(f"graph-{i}.txt", prose(3, f"graph{i}")))
+    full = client.get("/api/graph/").json()
+
+    nodes, edges, cursor = [], [], None
+    while True:
+        page = client.get("/api/graph/nodes", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+        nodes.extend(n["id"] for n in page["nodes"])
+        edges.extend(page["edges"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(nodes) == sorted(n["id"] for n in full["nodes"])
+    assert _pairs(edges) == _pairs(full["edges"])
+
+    for bad in ("not base64!", encode_cursor(["x"]), encode_cursor([1]), encode_cursor(["doc", 0]), encode_cursor([True, "a"])):
+        assert client.get("/api/graph/nodes", params={"cursor": bad}).status_code == 400
+    assert client.get("/api/graph/top", params={"n": 3}).status_code == 200
+    assert client.get("/api/graph/neighborhood/missing").status_code == 404
+
+
+def _canonical(snapshot: dict) -> tuple:
+    nodes = sorted((n["id"], n["label"], n["type"]) for n in snapshot["nodes"])
+    edges = sorted(
+        (*sorted((e["source"], e["target"])), e["label"], e["weight"], e.get("shared"))
+        for e in snapshot["edges"]
+    )
+    return nodes, edges
+
+
+def test_incremental_updates_match_a_rebuild(monkeypatch):
+    import random
+
+    import services.graph as graph
+
+    monkeypatch.setattr(graph, "SHARED_CONCEPT_MAX_DOCS", 4)  # small, so hubs form and dissolve
+    rng = random.Random(3)
+    index, live = GraphIndex(), {}
+    index.load([])
+    for step in range(400):
+        doc_id = f"doc{rng.randrange(12):02d}"
+        if doc_id in live and rng.random() < 0.4:
+            index.remove_document(doc_id)
+            del live[doc_id]
+        else:
+            concepts = rng.sample([f"c{i}" for i in range(6)], rng.randint(0, 4))
+            live[doc_id] = _doc(int(doc_id[3:]), concepts, rng.sample(["t0", "t1", "t2"], rng.randint(0, 2)))
+            index.add_document(live[doc_id])
+        if step % 20 == 0:
+            rebuilt = GraphIndex()
+            rebuilt.load(sorted(live.values(), key=lambda d: d["id"]))
+            assert _canonical(index.snapshot()) == _canonical(rebuilt.snapshot())
+
+
+def test_shared_edge_label_does_not_depend_on_history():
+    index = GraphIndex()
+    index.load([_doc(1, ["c3", "c0"]), _doc(2, ["c0", "c3"])])
+    index.add_document(_doc(1, ["c3", "c0"]))  # a re-add links the concepts in another order
+    labels = [e["label"] for e in index.snapshot()["edges"] if e["label"].startswith("shares")]
+    assert labels == ["shares: c0, c3"]
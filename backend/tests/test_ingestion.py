@@ -0,0 +1,77 @@
+import os
+
+from conftest import prose
+from core.config import get_settings
+from db.chroma import get_collection
+from services.lexical import get_lexical_index
+
+
+def _chunk_ids(doc_id: str) -> set:
+    return set(get_collection().get(where={"document_id": doc_id}, include=[])["ids"])
+
+
+def test_reindex_into_fewer_chunks_drops_the_tail(client, upload, wait_ready):
+    doc_id = upload("shrinking.txt", prose(120, "shrinking"))
+    doc = wait_ready(doc_id)
+    assert doc["status"] == "ready" and doc["chunk_count"] > 3
+    assert len(_chunk_ids(doc_id)) == doc["chunk_count"]
+
+    # Same upload, now much shorter
+    with open(os.path.join(get_settings().upload_dir, doc["filename"]), "w") as f:
+        f.write(prose(2, "shrinking"))
+    assert client.post(f"/api/vault/documents/{doc_id}/reindex").status_code == 200
+    doc = wait_ready(doc_id)
+
+    assert doc["status"] == "ready" and doc["chunk_count"] == 1
+    assert _chunk_ids(doc_id) == {f"{doc_id}_chunk_0"}
+    hits = get_lexical_index().search("shrinking item searchable", top_k=50, document_ids=[doc_id])
+    assert {chunk_id for chunk_id, _ in hits} == {f"{doc_id}_chunk_0"}
+
+
+def test_delete_removes_chunks_beyond_the_recorded_count(client, upload, wait_ready):
+    doc_id = upload("leftover.txt", prose(20, "leftover"))
+    doc = wait_ready(doc_id)
+    # A chunk from an earlier, interrupted run that the record does not count
+    get_collection().upsert(
+        ids=[f"{doc_id}_chunk_99"], embeddings=[[0.5] * 16], documents=["orphan"],
+        metadatas=[{"document_id": doc_id, "chunk_index": 99}],
+    )
+    assert len(_chunk_ids(doc_id)) == doc["chunk_count"] + 1
+
+    assert client.delete(f"/api/vault/documents/{doc_id}").status_code == 200
+    assert _chunk_ids(doc_id) == set()
+    assert client.get(f"/api/vault/documents/{doc_id}").status_code == 404
+
+
+def test_identical_upload_links_to_existing_chunks(client, upload, wait_ready):
+    text = prose(10, "twin")
+    original = wait_ready(upload("twin-a.txt", text))
+    copy_id = upload("twin-b.txt", text)
+    copy = client.get(f"/api/vault/documents/{copy_id}").json()  # linked at upload, no pipeline run
+
+    assert copy["status"] == "ready"
+    assert copy["chunk_count"] == original["chunk_count"]
+    assert _chunk_ids(copy_id) == set()  # shares the original's chunks
+
+    results = client.post("/api/search/", json={"query": "twin item", "document_ids": [copy_id]}).json()["results"]
+    assert results and all(r["document_id"] == original["id"] for r in results)
+
+
+def test_deleting_the_source_hands_its_chunks_to_a_duplicate(client, upload, wait_ready):
+    text = prose(10, "heirloom")
+    source_id = upload("heirloom-a.txt", text)
+    wait_ready(source_id)
+    copy_id = upload("heirloom-b.txt", text)
+
+    assert client.delete(f"/api/vault/documents/{source_id}").status_code == 200
+    assert _chunk_ids(source_id)  # still backing the duplicate
+
+    for body in ({"query": "heirloom item"}, {"query": "heirloom item", "document_ids": [copy_id]}):
+        results = [r for r in client.post("/api/search/", json=body).json()["results"] if "heirloom" in r["content"]]
+        assert results
+        assert {(r["document_id"], r["document_name"]) for r in results} == {(copy_id, "heirloom-b.txt")}
+    assert client.get(f"/api/vault/documents/{copy_id}").status_code == 200
+
+    # The last reference going takes the chunks with it
+    assert client.delete(f"/api/vault/documents/{copy_id}").status_code == 200
+    assert _chunk_ids(source_id) == set()
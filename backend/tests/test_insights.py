@@ -0,0 +1,43 @@
+from conftest import prose
+
+
+def test_insights_default_to_all_documents(client, upload, wait_ready):
+    wait_ready(upload("insight.txt", prose(5, "insight")))
+    ready = client.get("/api/vault/stats").json()["ready_documents"]
+
+    insights = client.get("/api/insights/").json()
+    assert insights["window"] == "all"
+    assert insights["document_count"] == ready
+    assert client.get("/api/insights/", params={"window": "week"}).json()["window"] == "week"
+    assert client.get("/api/insights/", params={"window": "year"}).status_code == 422
+
+
+def test_aged_narrative_is_refreshed(client, upload, wait_ready, monkeypatch):
+    import time
+
+    import services.insights as insights
+    from core.config import get_settings
+    from services.versioning import bump_content_version
+
+    def settled() -> dict:
+        deadline = time.monotonic() + 10
+        while True:
+            response = client.get("/api/insights/")
+            if not response.json()["refreshing"]:
+                return response
+            assert time.monotonic() < deadline, "narrative refresh did not finish"
+            time.sleep(0.02)
+
+    wait_ready(upload("aging.txt", prose(5, "aging")))
+    first = settled()
+    bump_content_version()  # one change: fewer than INSIGHTS_REGEN_MIN_CHANGES
+    current = settled()
+    assert current.json()["generated_at"] == first.json()["generated_at"]
+    assert client.get("/api/insights/", headers={"If-None-Match": current.headers["etag"]}).status_code == 304
+
+    now = time.time
+    monkeypatch.setattr(time, "time", lambda: now() + get_settings().insights_max_age_s + 1)
+    aged = client.get("/api/insights/", headers={"If-None-Match": current.headers["etag"]})
+    assert aged.status_code == 200 and aged.json()["refreshing"]
+    assert "all" in insights._refreshing
+    assert settled().json()["generated_at"] != first.json()["generated_at"]
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from services.jobs import PRIORITY_NORMAL, PRIORITY_SMALL, IngestionJob, IngestionQueue, QueueFullError
+
+
+def _queue(handler, failures=None, **kwargs) -> IngestionQueue:
+    async def on_failure(job, stage, error):
+        failures.append((job.doc_id, stage, str(error)))
+
+    kwargs.setdefault("retry_backoff", 0.001)
+    return IngestionQueue(stages=[("only", handler, 1)], on_failure=on_failure, **kwargs)
+
+
+async def _until(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.001)
+
+
+def test_failed_stage_is_retried_with_backoff():
+    async def scenario():
+        calls, failures = [], []
+
+        async def flaky(job):
+            calls.append(job.doc_id)
+            if len(calls) < 3:
+                raise RuntimeError("transient")
+            return False
+
+        queue = _queue(flaky, failures, max_retries=3)
+        queue.submit(IngestionJob("doc"))
+        await _until(lambda: queue.stats()["stages"]["only"]["processed"] == 1)
+        stats = queue.stats()["stages"]["only"]
+        await queue.stop()
+        return calls, failures, stats
+
+    calls, failures, stats = asyncio.run(scenario())
+    assert calls == ["doc", "doc", "doc"]
+    assert failures == []
+    assert stats["retried"] == 2 and stats["failed"] == 0
+
+
+def test_exhausted_retries_report_the_failure():
+    async def scenario():
+        failures = []
+
+        async def broken(job):
+            raise ValueError("corrupt file")
+
+        queue = _queue(broken, failures, max_retries=2)
+        queue.submit(IngestionJob("doc"))
+        await _until(lambda: failures)
+        stats = queue.stats()["stages"]["only"]
+        await queue.stop()
+        return failures, stats
+
+    failures, stats = asyncio.run(scenario())
+    assert failures == [("doc", "only", "corrupt file")]
+    assert stats["retried"] == 2 and stats["failed"] == 1
+
+
+def test_stop_cancels_pending_retries():
+    async def scenario():
+        async def broken(job):
+            raise RuntimeError("down")
+
+        queue = _queue(broken, [], max_retries=3, retry_backoff=60)
+        queue.submit(IngestionJob("doc"))
+        await _until(lambda: queue._retries)
+        retries = list(queue._retries)
+        await queue.stop()
+        return queue, retries
+
+    queue, retries = asyncio.run(scenario())
+    assert all(task.cancelled() for task in retries)
+    assert not queue._retries
+
+
+def test_position_reports_active_and_waiting_jobs_by_priority():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def blocked(job):
+            await release.wait()
+            return False
+
+        queue = _queue(blocked, [], max_pending=2)
+        queue.submit(IngestionJob("first", priority=PRIORITY_NORMAL))
+        await _until(lambda: queue.position("first") == {"stage": "only", "position": 0})
+        queue.submit(IngestionJob("large", priority=PRIORITY_NORMAL))
+        queue.submit(IngestionJob("small", priority=PRIORITY_SMALL))
+        positions = {doc_id: queue.position(doc_id) for doc_id in ("first", "small", "large", "unknown")}
+        with pytest.raises(QueueFullError):
+            queue.submit(IngestionJob("overflow"))
+        release.set()
+        await _until(lambda: queue.stats()["stages"]["only"]["processed"] == 3)
+        await queue.stop()
+        return positions
+
+    positions = asyncio.run(scenario())
+    assert positions == {
+        "first": {"stage": "only", "position": 0},
+        "small": {"stage": "only", "position": 1},
+        "large": {"stage": "only", "position": 2},
+        "unknown": None,
+    }
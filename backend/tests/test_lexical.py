@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+import services.lexical as lexical
+from services.lexical import LexicalIndex
+
+
+def _ids(hits) -> list:
+    return [chunk_id for chunk_id, _ in hits]
+
+
+def test_search_ranks_exact_terms_and_filters_by_document():
+    index = LexicalIndex()
+    index.add(["a_0", "a_1"], "a", ["error code E1234 in the parser", "unrelated text about gardens"])
+    index.add(["b_0"], "b", ["the parser raised E1234 twice, E1234 again"])
+
+    assert _ids(index.search("E1234")) == ["b_0", "a_0"]
+    assert _ids(index.search("E1234", document_ids=["a"])) == ["a_0"]
+    assert index.search("E1234", document_ids=["missing"]) == []
+    assert index.search("the of and") == []
+
+
+def test_replacing_and_removing_chunks():
+    index = LexicalIndex()
+    index.add(["a_0"], "a", ["alpha beta"])
+    index.add(["a_0"], "a", ["gamma delta"])  # upsert of the same chunk id
+    assert index.size == 1
+    assert index.search("alpha") == []
+    assert _ids(index.search("gamma")) == ["a_0"]
+
+    index.add(["b_0", "b_1"], "b", ["gamma one", "gamma two"])
+    index.remove(["b_0"])
+    assert set(_ids(index.search("gamma"))) == {"a_0", "b_1"}
+    index.remove_documents(["a", "b"])
+    assert index.size == 0 and index.search("gamma") == []
+
+
+def test_repeated_reingest_is_compacted():
+    index = LexicalIndex()
+    for _ in range(5):
+        index.add([f"doc_chunk_{i}" for i in range(1000)], "doc", [f"term{i} shared" for i in range(1000)])
+    # Tombstones are compacted away as add() replaces chunks, not only on remove()
+    assert index.size == 1000
+    assert len(index._chunk_ids) < 2000
+    assert len(index._by_document["doc"]) < 2000
+    assert _ids(index.search("term7")) == ["doc_chunk_7"]
+
+
+class _SlowCollection:
+    """Two pages of chunks; `during_read` runs between them."""
+
+    def __init__(self, during_read):
+        self.during_read = during_read
+        self.pages = [
+            {"ids": ["a_0"], "documents": ["apple pie"], "metadatas": [{"document_id": "a"}]},
+            {"ids": ["b_0"], "documents": ["banana bread"], "metadatas": [{"document_id": "b"}]},
+            {"ids": [], "documents": [], "metadatas": []},
+        ]
+
+    def get(self, include, limit, offset):
+        if offset == 1:
+            self.during_read()
+        return self.pages[min(offset, 2)]
+
+
+def test_rebuild_does_not_block_updates_and_replays_them(monkeypatch, tmp_path):
+    import db.chroma
+
+    monkeypatch.setattr(lexical, "_index", None)
+    monkeypatch.setattr(lexical, "_snapshot_path", lambda: str(tmp_path / "missing.pkl"))
+    monkeypatch.setattr(lexical, "_start_saver", lambda: None)
+    finished = []
+
+    def concurrent_updates():
+        lexical.update_lexical_index(["c_0"], "c", ["cherry tart"])
+        lexical.remove_from_lexical_index(chunk_ids=["a_0"])
+        finished.append(True)
+
+    def during_read():
+        worker = threading.Thread(target=concurrent_updates)
+        worker.start()
+        worker.join(timeout=5)
+
+    monkeypatch.setattr(db.chroma, "get_collection", lambda: _SlowCollection(during_read))
+    index = lexical.ensure_lexical_index_loaded()
+
+    assert finished == [True]  # the updates did not wait for the rebuild
+    assert index.loaded
+    assert _ids(index.search("cherry")) == ["c_0"]
+    assert _ids(index.search("banana")) == ["b_0"]
+    assert index.search("apple") == []
+    assert lexical._journal is None
+
+
+def test_snapshot_is_saved_in_the_background(monkeypatch, tmp_path):
+    import db.chroma
+    from core.config import get_settings
+
+    path = str(tmp_path / "lexical_index.pkl")
+    monkeypatch.setattr(lexical, "_index", None)
+    monkeypatch.setattr(lexical, "_saver", None)
+    monkeypatch.setattr(lexical, "_stop_saving", threading.Event())
+    monkeypatch.setattr(lexical, "_snapshot_path", lambda: path)
+    monkeypatch.setattr(get_settings(), "lexical_snapshot_interval_s", 0.02)
+    monkeypatch.setattr(db.chroma, "get_collection", lambda: _SlowCollection(lambda: None))
+    index = lexical.ensure_lexical_index_loaded()
+
+    def saved() -> LexicalIndex:
+        deadline = time.monotonic() + 5
+        while index.changes:
+            assert time.monotonic() < deadline, "snapshot not written"
+            time.sleep(0.01)
+        snapshot = LexicalIndex()
+        assert snapshot.load(path)
+        return snapshot
+
+    assert _ids(saved().search("banana")) == ["b_0"]  # the rebuilt index
+    lexical.update_lexical_index(["c_0"], "c", ["cherry tart"])
+    assert _ids(saved().search("cherry")) == ["c_0"]
+    written = os.stat(path).st_mtime_ns
+    time.sleep(0.1)
+    assert os.stat(path).st_mtime_ns == written  # nothing changed, nothing rewritten
+
+    lexical.save_lexical_index()
+    assert lexical._saver is None
@@ -0,0 +1,69 @@
+from db.metadata import DocumentStore
+
+
+def _doc(i: int, status: str = "ready", **fields) -> dict:
+    doc = {
+        "id": f"doc{i:02d}",
+        "filename": f"doc{i:02d}.txt",
+        "original_name": f"Doc {i:02d}.txt",
+        "file_type": "txt",
+        "file_size": 1000 - i,
+        "status": status,
+        "created_at": f"2026-01-{1 + i // 3:02d}T00:00:00",  # three documents per day
+        "updated_at": "2026-01-01T00:00:00",
+    }
+    doc.update(fields)
+    return doc
+
+
+def _walk(store: DocumentStore, **kwargs) -> list:
+    """All ids in page order, following the cursor."""
+    seen, after = [], None
+    while True:
+        docs, after = store.page(after=after, **kwargs)
+        seen.extend(d["id"] for d in docs)
+        if after is None:
+            return seen
+
+
+def test_page_cursors_cover_every_document_once(tmp_path):
+    store = DocumentStore(str(tmp_path / "vault.db"))
+    for i in range(10):
+        store.insert(_doc(i, tags=["even"] if i % 2 == 0 else []))
+
+    ids = [f"doc{i:02d}" for i in range(10)]
+    assert _walk(store, limit=3) == ids  # ties on created_at are broken by id
+    assert _walk(store, limit=4, descending=True) == ids[::-1]
+    assert _walk(store, limit=3, sort="file_size") == ids[::-1]
+    assert _walk(store, limit=2, tag="EVEN") == ids[::2]
+
+    docs, after = store.page(limit=None, fields=["original_name"], sort="file_size")
+    assert after is None and len(docs) == 10
+    assert set(docs[0]) == {"id", "original_name"}
+
+    docs, after = store.page(limit=10)
+    assert len(docs) == 10 and after is None  # an exactly full page is the last one
+    store.close()
+
+
+def test_status_counters_follow_writes_and_survive_reopening(tmp_path):
+    path = str(tmp_path / "vault.db")
+    store = DocumentStore(path)
+    for i in range(4):
+        store.insert(_doc(i, status="pending"))
+    store.update("doc00", {"status": "ready"})
+    store.update("doc01", {"status": "error"})
+    store.insert(_doc(2, status="ready"))  # replacing a record moves its count
+    store.update("missing", {"status": "ready"})
+    store.delete("doc03")
+    store.delete_many(["doc01", "missing"])
+
+    expected = {"ready": 2}
+    assert store.status_counts() == expected
+    assert store.count() == 2 and store.count("ready") == 2 and store.count("error") == 0
+    assert store.count_matching(status="ready", file_type="txt") == 2
+    store.close()
+
+    reopened = DocumentStore(path)
+    assert reopened.status_counts() == expected
+    reopened.close()
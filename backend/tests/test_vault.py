@@ -0,0 +1,62 @@
+from conftest import prose
+from core.pagination import encode_cursor
+
+
+def test_document_listing_pages_by_cursor(client, upload, wait_ready):
+    for i in range(3):
+        wait_ready(upload(f"listing-{i}.txt", prose(2 + i, "listing")))
+
+    everything = client.get("/api/vault/documents", params={"sort": "file_size", "fields": "id"}).json()
+    seen, cursor = [], None
+    while True:
+        params = {"sort": "file_size", "order": "desc", "limit": 2, "fields": "id,file_size"}
+        page = client.get("/api/vault/documents", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        seen.extend(d["id"] for d in page["documents"])
+        assert page["total"] == everything["total"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [d["id"] for d in reversed(everything["documents"])]
+
+
+def test_malformed_document_cursors_are_rejected(client):
+    bad = [
+        "not base64!",
+        encode_cursor(["file_size", "asc", 10]),
+        encode_cursor(["created_at", "asc", "2026-01-01", "id"]),  # another sort order
+        encode_cursor(["file_size", "asc", {"x": 1}, "id"]),
+        encode_cursor(["file_size", "asc", "10", "id"]),
+        encode_cursor(["file_size", "asc", True, "id"]),
+        encode_cursor(["file_size", "asc", 10, ["id"]]),
+    ]
+    for cursor in bad:
+        response = client.get("/api/vault/documents", params={"sort": "file_size", "cursor": cursor})
+        assert response.status_code == 400, cursor
+    bad_name = encode_cursor(["original_name", "asc", 3, "id"])
+    assert client.get("/api/vault/documents", params={"sort": "original_name", "cursor": bad_name}).status_code == 400
+    good = encode_cursor(["file_size", "asc", 10, "id"])
+    assert client.get("/api/vault/documents", params={"sort": "file_size", "cursor": good}).status_code == 200
+
+
+def test_stats_read_during_a_delete_is_not_served_afterwards(client, upload, wait_ready, monkeypatch):
+    import services.ingestion as ingestion
+
+    doc_id = upload("counted.txt", prose(4, "counted"))
+    wait_ready(doc_id)
+    before = client.get("/api/vault/stats").json()["ready_documents"]
+
+    raced = []
+    remove_from_stats = ingestion.remove_from_stats
+
+    def read_then_remove(removed_id):
+        # A poll landing after the record is gone but before the counters move
+        raced.append(client.get("/api/vault/stats"))
+        remove_from_stats(removed_id)
+
+    monkeypatch.setattr(ingestion, "remove_from_stats", read_then_remove)
+    assert client.delete(f"/api/vault/documents/{doc_id}").status_code == 200
+    assert raced and raced[0].json()["ready_documents"] == before  # the stale view
+
+    after = client.get("/api/vault/stats", headers={"If-None-Match": raced[0].headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["ready_documents"] == before - 1